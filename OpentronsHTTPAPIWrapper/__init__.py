@@ -1,4 +1,22 @@
 from .opentronsHTTPAPI_clientBuilder import *  # Import everything from your script
+from .opentronsHTTPAPI_asyncClient import AsyncOpentronsClient
+from .opentronsHTTPAPI_fleet import Fleet, fleetResult
+from .opentronsHTTPAPI_standInServer import standInRobotServer
+from .opentronsHTTPAPI_instrumentation import commandTiming, commandTimingAggregator
+from .opentronsHTTPAPI_runAnalyzer import analyzeRunIdleGaps, runIdleReport, commandGap
+from .opentronsHTTPAPI_sessionRecorder import sessionRecorder, readSession
+from .opentronsHTTPAPI_replay import replaySession, replayReport, replayDivergence
+from .opentronsHTTPAPI_labwareCache import labwareDefinitionCache, hashLabwareDefinition, defaultLabwareCache
+from .opentronsHTTPAPI_runPool import runPool
+from .opentronsHTTPAPI_runCollector import runCollector
+from .opentronsHTTPAPI_deck import deckModel, labwareRecord
+from .opentronsHTTPAPI_runSync import runStateMirror
+from .opentronsHTTPAPI_runMonitor import runMonitor
+from .opentronsHTTPAPI_protocolCompiler import protocolCompiler
+from .opentronsHTTPAPI_transfer import transferPlan, planTransfer
+from .opentronsHTTPAPI_pathOptimizer import optimizeVisitOrder, pathLength
+from .opentronsHTTPAPI_tipTracker import tipManager
+from .opentronsHTTPAPI_robotState import robotStateMirror
 
 __version__ = "0.0.2"
 __author__ = 'Daniel Persaud, Nis Fisker-Bødker'
\ No newline at end of file
@@ -0,0 +1,637 @@
+import json
+import logging
+from typing import Literal, Union
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, see the "async" extra
+    aiohttp = None
+
+from .opentronsHTTPAPI_labwareCache import defaultLabwareCache
+
+LOGGER = logging.getLogger(__name__)
+
+class AsyncOpentronsClient:
+    '''
+    asyncio counterpart of opentronsClient - each object will represent a single
+    experiment, and many objects can be driven from one event loop
+
+    usage
+    ----------
+    async with AsyncOpentronsClient(strRobotIP = "10.0.0.2") as client:
+        await client.loadPipette("p300_single_gen2", "left")
+    '''
+
+    def __init__(self,
+                 strRobotIP: str,
+                 dicHeaders: dict = {"opentrons-version": "*"},
+                 strRobot: Literal["flex","ot2"] = "ot2",
+                 intPort: int = 31950,
+                 intPoolSize: int = 4,
+                 labwareCache = None):
+        '''
+        initializes the object with the robot IP and headers - the run is created
+        by initializeRun or when entering the async context manager
+
+        arguments
+        ----------
+        strRobotIP: str
+            the IP address of the robot
+
+        dicHeaders: dict
+            the headers to be used in the requests
+
+        strRobot: str
+            the type of robot, either "flex" or "ot2"
+            default: "ot2"
+
+        intPort: int
+            the port the robot server listens on
+            default: 31950
+
+        intPoolSize: int
+            the number of keep-alive connections kept open to the robot
+            default: 4
+
+        labwareCache: labwareDefinitionCache
+            the cache of custom labware definitions, shared with the other
+            clients of the process if None
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        if aiohttp is None:
+            raise ImportError("AsyncOpentronsClient requires aiohttp, install it with: pip install OpentronsHTTPAPIWrapper[async]")
+
+        self.robotType = strRobot
+        self.robotIP = strRobotIP
+        self.baseURL = f"http://{strRobotIP}:{intPort}"
+        self.headers = dict(dicHeaders, **{"Content-Type": "application/json"})
+        self.runID = None
+        self.commandURL = None
+        self.labware = {}
+        self.pipettes = {}
+
+        # content hash -> definitionUri of the definitions uploaded to this run
+        self.labwareCache = labwareCache or defaultLabwareCache
+        self.labwareDefinitions = {}
+
+        self.__intPoolSize = intPoolSize
+        self.session = None
+
+    async def __aenter__(self):
+        await self.initializeRun()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        '''
+        closes the pooled connections to the robot
+        '''
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def __getSession(self):
+        # the session has to be created from inside a running event loop
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                headers = self.headers,
+                connector = aiohttp.TCPConnector(limit = self.__intPoolSize),
+                timeout = aiohttp.ClientTimeout(total = None)
+            )
+        return self.session
+
+    async def __request(self,
+                        strMethod: str,
+                        strURL: str,
+                        dicCommand: dict = None,
+                        dicParams: dict = None):
+        '''
+        sends a request to the robot and returns the status code and body text
+        '''
+        strCommand = None if dicCommand is None else json.dumps(dicCommand)
+        # LOG - debug
+        LOGGER.debug(f"Command: {strCommand}")
+
+        async with self.__getSession().request(strMethod,
+                                               strURL,
+                                               params = dicParams,
+                                               data = strCommand) as response:
+            strResponse = await response.text()
+
+        # LOG - debug
+        LOGGER.debug(f"Response: {strResponse}")
+        return response.status, strResponse
+
+    async def __postCommand(self,
+                            dicCommand: dict,
+                            strAction: str):
+        '''
+        posts a command to the run, waits for it to complete and returns the
+        command data from the response
+
+        arguments
+        ----------
+        dicCommand: dict
+            the command to be posted
+
+        strAction: str
+            the action used in error messages, e.g. "aspirate"
+
+        returns
+        ----------
+        dicData: dict
+            the "data" member of the response
+        '''
+        intStatus, strResponse = await self.__request("POST",
+                                                      self.commandURL,
+                                                      dicCommand,
+                                                      {"waitUntilComplete": "true"})
+
+        if intStatus != 201:
+            raise Exception(f"Failed to {strAction}.\nError code: {intStatus}\n Error message: {strResponse}")
+
+        dicData = json.loads(strResponse)['data']
+        if dicData['status'] == "failed":
+            dicError = dicData.get('error', {})
+            strError = f"Failed to {strAction}.\nResponse error code: {dicError.get('errorCode')}\n Error type: {dicError.get('errorType')}\n Error message: {dicError.get('detail')}"
+            # LOG - error
+            LOGGER.error(strError)
+            raise Exception(strError)
+
+        return dicData
+
+    async def initializeRun(self):
+        '''
+        creates a new blank run on the opentrons with command endpoints
+
+        arguments
+        ----------
+        None
+
+        returns
+        ----------
+        None
+        '''
+        strRunURL = f"{self.baseURL}/runs"
+        intStatus, strResponse = await self.__request("POST", strRunURL)
+
+        if intStatus == 201:
+            self.runID = json.loads(strResponse)['data']['id']
+            self.commandURL = strRunURL + f"/{self.runID}/commands"
+            self.labwareDefinitions = {}
+
+            # LOG - info
+            LOGGER.info(f"New run created with ID: {self.runID}")
+            LOGGER.info(f"Command URL: {self.commandURL}")
+        else:
+            raise Exception(f"Failed to create a new run.\nError code: {intStatus}\n Error message: {strResponse}")
+
+    async def getRunInfo(self):
+        '''
+        gets the information for the current run
+
+        returns
+        ----------
+        dicRunInfo: dict
+            the information for the current run
+        '''
+        intStatus, strResponse = await self.__request("GET", f"{self.baseURL}/runs/{self.runID}")
+
+        if intStatus != 200:
+            raise Exception(f"Failed to get run information.\nError code: {intStatus}\n Error message: {strResponse}")
+
+        return json.loads(strResponse)
+
+    async def loadLabware(self,
+                          strSlot: Union[str, int],
+                          strLabwareName: str,
+                          strLabwareLocation: str = None,
+                          strNamespace: str = "opentrons",
+                          intVersion: int = 1,
+                          strIntent: str = "setup"):
+        '''
+        loads labware onto the robot - see opentronsClient.loadLabware
+
+        returns
+        ----------
+        strLabwareIdentifier_temp: str
+            the identifier of the labware that was loaded
+        '''
+        loc = {"slotName": str(strSlot)}
+        if strLabwareLocation is not None:
+            loc = {"labwareId": str(self.labware[strLabwareLocation]['id'])}
+
+        # LOG - info
+        LOGGER.info(f"Loading labware: {strLabwareName} in slot: {strSlot}")
+
+        dicData = await self.__postCommand({
+            "data": {
+                "commandType": "loadLabware",
+                "params": {
+                    "location": loc,
+                    "loadName": strLabwareName,
+                    "namespace": strNamespace,
+                    "version": str(intVersion)
+                },
+                "intent": strIntent
+            }
+        }, "load labware")
+
+        strLabwareID = dicData['result']['labwareId']
+        strLabwareIdentifier_temp = strLabwareName + "_" + str(strSlot)
+        self.labware[strLabwareIdentifier_temp] = {"id": strLabwareID, "slot": strSlot}
+        # LOG - info
+        LOGGER.info(f"Labware loaded with name: {strLabwareName} and ID: {strLabwareID}")
+
+        return strLabwareIdentifier_temp
+
+    async def loadCustomLabware(self,
+                                dicLabware: dict,
+                                strSlot: Union[str, int],
+                                strLabware: str = None):
+        '''
+        loads custom labware onto the robot - see opentronsClient.loadCustomLabware
+
+        returns
+        ----------
+        strLabwareIdentifier_temp: str
+            the identifier of the labware that was loaded
+        '''
+        # LOG - info
+        LOGGER.info(f"Loading custom labware: {dicLabware['parameters']['loadName']} in slot: {strSlot}")
+
+        # a definition already held by the run is not uploaded again
+        strHash = self.labwareCache.hash(dicLabware)
+        if strHash not in self.labwareDefinitions:
+            intStatus, strResponse = await self.__request("POST",
+                                                          f"{self.baseURL}/runs/{self.runID}/labware_definitions",
+                                                          {'data': dicLabware})
+            if intStatus != 201:
+                raise Exception(f"Failed to load custom labware.\nError code: {intStatus}\n Error message: {strResponse}")
+            self.labwareDefinitions[strHash] = json.loads(strResponse)['data'].get('definitionUri')
+
+        return await self.loadLabware(strSlot = strSlot,
+                                      strLabwareName = dicLabware['parameters']['loadName'],
+                                      strNamespace = dicLabware['namespace'],
+                                      intVersion = dicLabware['version'],
+                                      strIntent = "setup",
+                                      strLabwareLocation = strLabware)
+
+    async def loadPipette(self,
+                          strPipetteName: str,
+                          strMount: str):
+        '''
+        loads a pipette onto the robot - see opentronsClient.loadPipette
+        '''
+        # LOG - info
+        LOGGER.info(f"Loading pipette: {strPipetteName} on mount: {strMount}")
+
+        dicData = await self.__postCommand({
+            "data": {
+                "commandType": "loadPipette",
+                "params": {
+                    "pipetteName": strPipetteName,
+                    "mount": strMount
+                },
+                "intent": "setup"
+            }
+        }, "load pipette")
+
+        strPipetteID = dicData['result']['pipetteId']
+        self.pipettes[strPipetteName] = {"id": strPipetteID, "mount": strMount}
+        # LOG - info
+        LOGGER.info(f"Pipette loaded with name: {strPipetteName} and ID: {strPipetteID}")
+
+    async def homeRobot(self):
+        '''
+        homes the robot - see opentronsClient.homeRobot
+        '''
+        # LOG - info
+        LOGGER.info(f"Homing the robot")
+
+        intStatus, strResponse = await self.__request("POST",
+                                                      f"{self.baseURL}/robot/home",
+                                                      {"target": "robot"})
+        if intStatus != 200:
+            raise Exception(f"Failed to home the robot.\nError code: {intStatus}\n Error message: {strResponse}")
+
+    async def pickUpTip(self,
+                        strLabwareName: str,
+                        strPipetteName: str,
+                        strOffsetStart: str = "top",
+                        fltOffsetX: float = 0,
+                        fltOffsetY: float = 0,
+                        fltOffsetZ: float = 0,
+                        strWellName: str = "A1",
+                        strIntent: str = "setup"):
+        '''
+        picks up a tip from a labware - see opentronsClient.pickUpTip
+        '''
+        # LOG - info
+        LOGGER.info(f"Picking up tip from labware: {strLabwareName}")
+
+        await self.__postCommand({
+            "data": {
+                "commandType": "pickUpTip",
+                "params": {
+                    "labwareId": self.labware[strLabwareName]["id"],
+                    "wellName": strWellName,
+                    "wellLocation": {
+                        "origin": strOffsetStart,
+                        "offset": {"x": fltOffsetX,
+                                   "y": fltOffsetY,
+                                   "z": fltOffsetZ}
+                    },
+                    "pipetteId": self.pipettes[strPipetteName]["id"],
+                },
+                "intent": strIntent
+            }
+        }, "pick up tip")
+
+    async def dropTip(self,
+                      strPipetteName: str,
+                      boolDropInDisposal: bool = True,
+                      strLabwareName: str = None,
+                      strWellName: str = "A1",
+                      strOffsetStart: str = "center",
+                      fltOffsetX: float = 0,
+                      fltOffsetY: float = 0,
+                      fltOffsetZ: float = 0,
+                      boolHomeAfter: bool = False,
+                      boolAlternateDropLocation: bool = False,
+                      intSpeed: int = 200,
+                      strIntent: str = "setup"):
+        '''
+        drops a tip into the robot's disposal or a labware well - see opentronsClient.dropTip
+        '''
+        strPipetteID = self.pipettes[strPipetteName]["id"]
+
+        if boolDropInDisposal:
+            # LOG - info
+            LOGGER.info(f"Disposing of held tip: {strPipetteName}")
+            await self.__postCommand({
+                "data": {
+                    "commandType": "moveToAddressableAreaForDropTip",
+                    "params": {
+                        "speed": intSpeed,
+                        "pipetteId": strPipetteID,
+                        "addressableAreaName": 'movableTrashA3' if self.robotType == "flex" else 'fixedTrash'
+                    },
+                    "intent": strIntent
+                }
+            }, "drop tip")
+            await self.__postCommand({
+                "data": {
+                    "commandType": "dropTipInPlace",
+                    "params": {
+                        "pipetteId": strPipetteID,
+                        "homeAfter": boolHomeAfter
+                    },
+                    "intent": strIntent
+                }
+            }, "drop tip in place")
+            return
+
+        # LOG - info
+        LOGGER.info(f"Dropping tip into labware: {strLabwareName}")
+        await self.__postCommand({
+            "data": {
+                "commandType": "dropTip",
+                "params": {
+                    "pipetteId": strPipetteID,
+                    "labwareId": self.labware[strLabwareName]["id"],
+                    "wellName": strWellName,
+                    "wellLocation": {
+                        "origin": strOffsetStart,
+                        "offset": {"x": fltOffsetX,
+                                   "y": fltOffsetY,
+                                   "z": fltOffsetZ}
+                    },
+                    "homeAfter": boolHomeAfter,
+                    "alternateDropLocation": boolAlternateDropLocation
+                },
+                "intent": strIntent
+            }
+        }, "drop tip")
+
+    async def aspirate(self,
+                       strLabwareName: str,
+                       strWellName: str,
+                       strPipetteName: str,
+                       intVolume: int,                        # uL
+                       fltFlowRate: float = 274.7,            # uL/s
+                       strOffsetStart: str = "center",
+                       fltOffsetX: float = 0,
+                       fltOffsetY: float = 0,
+                       fltOffsetZ: float = 0,
+                       strIntent: str = "setup"):
+        '''
+        aspirates liquid from a well - see opentronsClient.aspirate
+        '''
+        # LOG - info
+        LOGGER.info(f"Aspirating from labware: {strLabwareName}, well: {strWellName}")
+
+        await self.__postCommand({
+            "data": {
+                "commandType": "aspirate",
+                "params": {
+                    "labwareId": self.labware[strLabwareName]["id"],
+                    "wellName": strWellName,
+                    "wellLocation": {
+                        "origin": strOffsetStart,
+                        "offset": {"x": fltOffsetX,
+                                   "y": fltOffsetY,
+                                   "z": fltOffsetZ}
+                    },
+                    "flowRate": str(fltFlowRate),
+                    "volume": str(intVolume),
+                    "pipetteId": self.pipettes[strPipetteName]["id"]
+                },
+                "intent": strIntent
+            }
+        }, "aspirate")
+
+    async def dispense(self,
+                       strLabwareName: str,
+                       strWellName: str,
+                       strPipetteName: str,
+                       intVolume: int,                        # uL
+                       fltFlowRate: float = 274.7,            # uL/s
+                       strOffsetStart: str = "top",
+                       fltOffsetX: float = 0,
+                       fltOffsetY: float = 0,
+                       fltOffsetZ: float = 0,
+                       strIntent: str = "setup"):
+        '''
+        dispenses liquid into a well - see opentronsClient.dispense
+        '''
+        # LOG - info
+        LOGGER.info(f"Dispensing into labware: {strLabwareName}, well: {strWellName}")
+
+        await self.__postCommand({
+            "data": {
+                "commandType": "dispense",
+                "params": {
+                    "labwareId": self.labware[strLabwareName]["id"],
+                    "wellName": strWellName,
+                    "wellLocation": {
+                        "origin": strOffsetStart,
+                        "offset": {"x": fltOffsetX,
+                                   "y": fltOffsetY,
+                                   "z": fltOffsetZ}
+                    },
+                    "flowRate": fltFlowRate,
+                    "volume": intVolume,
+                    "pipetteId": self.pipettes[strPipetteName]["id"]
+                },
+                "intent": strIntent
+            }
+        }, "dispense")
+
+    async def blowout(self,
+                      strLabwareName: str,
+                      strWellName: str,
+                      strPipetteName: str,
+                      fltFlowRate: float = 274.7,            # uL/s
+                      strOffsetStart: str = "top",
+                      fltOffsetX: float = 0,
+                      fltOffsetY: float = 0,
+                      fltOffsetZ: float = 0) -> None:
+        '''
+        blows out liquid from a pipette - see opentronsClient.blowout
+        '''
+        # LOG - info
+        LOGGER.info(f"Blowing out from labware: {strLabwareName}, well: {strWellName}")
+
+        await self.__postCommand({
+            "data": {
+                "commandType": "blowout",
+                "params": {
+                    "labwareId": self.labware[strLabwareName]["id"],
+                    "wellName": strWellName,
+                    "wellLocation": {
+                        "origin": strOffsetStart,
+                        "offset": {"x": fltOffsetX,
+                                   "y": fltOffsetY,
+                                   "z": fltOffsetZ}
+                    },
+                    "flowRate": fltFlowRate,
+                    "pipetteId": self.pipettes[strPipetteName]["id"]
+                },
+                "intent": "setup"
+            }
+        }, "blowout")
+
+    async def moveToWell(self,
+                         strLabwareName: str,
+                         strWellName: str,
+                         strPipetteName: str,
+                         strOffsetStart: str = "top",
+                         fltOffsetX: float = 0,
+                         fltOffsetY: float = 0,
+                         fltOffsetZ: float = 0,
+                         strIntent: str = "setup",
+                         intSpeed: int = 400):   # mm/s
+        '''
+        moves the pipette to a well - see opentronsClient.moveToWell
+        '''
+        # LOG - info
+        LOGGER.info(f"Moving pipette to labware: {strLabwareName}, well: {strWellName}")
+
+        await self.__postCommand({
+            "data": {
+                "commandType": "moveToWell",
+                "params": {
+                    "speed": intSpeed,
+                    "labwareId": self.labware[strLabwareName]["id"],
+                    "wellName": strWellName,
+                    "wellLocation": {
+                        "origin": strOffsetStart,
+                        "offset": {"x": fltOffsetX,
+                                   "y": fltOffsetY,
+                                   "z": fltOffsetZ},
+                    },
+                    "pipetteId": self.pipettes[strPipetteName]["id"],
+                },
+                "intent": strIntent,
+            }
+        }, "move pipette")
+
+    async def moveLabware(self,
+                          strMovingLabware: str = None,
+                          strDestinationLabware: str = None,
+                          strIntent: str = "setup"):
+        '''
+        moves labware onto another labware with the gripper - see opentronsClient.moveLabware
+        '''
+        # LOG - info
+        LOGGER.info(f"Moving labware: {strMovingLabware} onto: {strDestinationLabware}")
+
+        await self.__postCommand({
+            "data": {
+                "commandType": "moveLabware",
+                "params": {
+                    "labwareId": self.labware[strMovingLabware]['id'],
+                    "newLocation": {
+                        "labwareId": self.labware[strDestinationLabware]['id']
+                    },
+                    "strategy": "usingGripper",
+                    "dropOffset": {
+                        "x": 0,
+                        "y": 0,
+                        "z": -8,
+                    }
+                },
+                "intent": strIntent
+            }
+        }, "move labware")
+
+    async def lights(self,
+                     strState: str = 'true') -> None:
+        '''
+        turns the lights on or off - see opentronsClient.lights
+        '''
+        strState = str(strState).lower()
+        if strState not in ['true', 'false']:
+            raise Exception(f"Invalid state: {strState}, needs to be 'true' or 'false'")
+
+        # LOG - info
+        LOGGER.info(f"Lights On: {strState}")
+
+        intStatus, strResponse = await self.__request("POST",
+                                                      f"{self.baseURL}/robot/lights",
+                                                      {"on": strState})
+        if intStatus != 200:
+            # LOG - error
+            LOGGER.error(f"Failed to turn lights {strState}.")
+            raise Exception(f"Failed to turn lights {strState}.\nError code: {intStatus}\n Error message: {strResponse}")
+
+    async def controlAction(self,
+                            strAction: str):
+        '''
+        performs a control action - see opentronsClient.controlAction
+
+        arguments
+        ----------
+        strAction: str
+            the action to be performed
+            options: "pause", "play", "stop"
+        '''
+        strAction = strAction.lower()
+        if strAction not in ["pause", "play", "stop"]:
+            raise Exception(f"Invalid action: {strAction}, needs to be 'pause', 'play', or 'stop'")
+
+        # LOG - info
+        LOGGER.info(f"Performing action: {strAction}")
+
+        intStatus, strResponse = await self.__request("POST",
+                                                      f"{self.baseURL}/runs/{self.runID}/actions",
+                                                      {"data": {"actionType": strAction}})
+        if intStatus != 201:
+            raise Exception(f"Failed to perform action.\nError code: {intStatus}\n Error message: {strResponse}")
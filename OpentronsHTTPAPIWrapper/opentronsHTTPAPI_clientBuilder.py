@@ -1,12 +1,122 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import logging
+import os
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Literal, Union
 
+from .opentronsHTTPAPI_instrumentation import commandTiming
+from .opentronsHTTPAPI_sessionRecorder import sessionRecorder
+from .opentronsHTTPAPI_labwareCache import defaultLabwareCache
+from .opentronsHTTPAPI_deck import deckModel
+from .opentronsHTTPAPI_protocolCompiler import protocolCompiler
+from .opentronsHTTPAPI_transfer import transferPlan, planTransfer
+from .opentronsHTTPAPI_tipTracker import tipManager, pipetteChannels
+from .opentronsHTTPAPI_robotState import robotStateMirror
+from .opentronsHTTPAPI_pathOptimizer import wellCoordinates, gridCoordinate, gridPitch, slotOrigin, optimizeVisitOrder
+
 # from prefect import task
 
 LOGGER = logging.getLogger(__name__)
 
+# most command origins kept per run, the oldest are forgotten first
+INT_MAX_COMMAND_ORIGINS = 100000
+
+class opentronsCommand:
+    '''
+    lightweight handle of a command posted to a run
+    '''
+
+    __slots__ = ("client", "id", "commandType", "status", "result", "error")
+
+    def __init__(self,
+                 client,
+                 dicData: dict):
+        '''
+        initializes the handle from the "data" member of a command response
+
+        arguments
+        ----------
+        client: opentronsClient
+            the client that posted the command
+
+        dicData: dict
+            the command as returned by the robot
+
+        returns
+        ----------
+        None
+        '''
+        self.client = client
+        self.id = dicData['id']
+        self.commandType = dicData.get('commandType')
+        self.update(dicData)
+
+    def __repr__(self):
+        return f"opentronsCommand({self.commandType}, id={self.id}, status={self.status})"
+
+    def update(self,
+               dicData: dict):
+        '''
+        updates the handle from the "data" member of a command response
+        '''
+        boolFailed = getattr(self, "status", None) not in (None, "failed") and dicData.get('status') == "failed"
+        self.status = dicData.get('status')
+        self.result = dicData.get('result')
+        self.error = dicData.get('error')
+        if boolFailed:
+            # a pipelined command failed after it was queued: what the client
+            # assumed about the robot since is not known anymore
+            self.client.state.invalidate()
+            self.client.tips.forgetPipettes()
+
+    @property
+    def isComplete(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def wait(self,
+             fltTimeout: float = None) -> "opentronsCommand":
+        '''
+        blocks until the command has completed on the robot
+
+        arguments
+        ----------
+        fltTimeout: float
+            the maximum time to wait in seconds, waits forever if None
+            default: None
+
+        returns
+        ----------
+        self: opentronsCommand
+            the completed command
+        '''
+        fltDeadline = None if fltTimeout is None else time.monotonic() + fltTimeout
+
+        while not self.isComplete:
+            # the robot holds the request open until the command completes or
+            # the timeout (in ms) elapses, so this loop rarely spins
+            fltRemaining = 30 if fltDeadline is None else fltDeadline - time.monotonic()
+            if fltRemaining <= 0:
+                raise TimeoutError(f"Command {self.id} did not complete within {fltTimeout} s.")
+
+            self.update(self.client.getCommand(self.id,
+                                               boolWaitUntilComplete = True,
+                                               fltTimeout = min(fltRemaining, 30)))
+
+        if self.status == "failed":
+            strError = f"Command {self.commandType} failed.\nResponse error code: {self.error.get('errorCode')}\n Error type: {self.error.get('errorType')}\n Error message: {self.error.get('detail')}"
+            # LOG - error
+            LOGGER.error(strError)
+            raise Exception(strError)
+
+        return self
+
 class opentronsClient:
     '''
     each object will represent a single experiment
@@ -15,7 +125,22 @@ class opentronsClient:
     def __init__(self,
                  strRobotIP: str,
                  dicHeaders: dict = {"opentrons-version": "*"},
-                 strRobot: Literal["flex","ot2"] = "ot2"):
+                 strRobot: Literal["flex","ot2"] = "ot2",
+                 intPort: int = 31950,
+                 intPoolSize: int = 4,
+                 intMaxRetries: int = 0,
+                 boolPipelined: bool = False,
+                 strRecordingPath: str = None,
+                 labwareCache = None,
+                 boolLazyRun: bool = False,
+                 runPool = None,
+                 strRunID: str = None,
+                 strCheckpointPath: str = None,
+                 runCollector = None,
+                 fltControlTimeout: float = 2.0,
+                 boolCompile: bool = False,
+                 strTipStatePath: str = None,
+                 boolElideRedundant: bool = False):
         '''
         initializes the object with the robot IP and headers
 
@@ -27,21 +152,207 @@ class opentronsClient:
         dicHeaders: dict
             the headers to be used in the requests
 
+        strRobot: str
+            the type of robot, either "flex" or "ot2"
+            default: "ot2"
+
+        intPort: int
+            the port the robot server listens on
+            default: 31950
+
+        intPoolSize: int
+            the number of keep-alive connections kept open to the robot
+            default: 4
+
+        intMaxRetries: int
+            the number of times a failed connection is retried by the pool
+            default: 0
+
+        boolPipelined: bool
+            when true motion and liquid handling commands are queued on the
+            robot without waiting for them to complete
+            default: False
+
+        strRecordingPath: str
+            when given every request and response, starting with the run
+            creation, is recorded to this file - see startRecording
+            default: None
+
+        labwareCache: labwareDefinitionCache
+            the cache of custom labware definitions, shared with the other
+            clients of the process if None
+            default: None
+
+        boolLazyRun: bool
+            when true the run is only created once it is first needed, e.g.
+            by the first command, so constructing the client sends nothing
+            default: False
+
+        runPool: runPool
+            the pool the run is taken from instead of being created, see
+            runPool
+            default: None
+
+        strRunID: str
+            the ID of an existing run to attach to instead of creating one,
+            see attachRun
+            default: None
+
+        strCheckpointPath: str
+            when given the client's state is written to this file after
+            every change to the deck, pipettes, offsets or tips used, see
+            saveCheckpoint
+            default: None
+
+        runCollector: runCollector
+            the collector that the client's run is registered with when it
+            is created and retired to on close, see runCollector
+            default: None
+
+        fltControlTimeout: float
+            the longest time controlAction and lights wait for the robot to
+            answer in seconds, see controlAction
+            default: 2.0
+
+        boolCompile: bool
+            when true nothing is sent to the robot: the client's requests are
+            captured and compiled into a protocol that runs on the robot
+            without a round trip per step, see compileProtocol and
+            runCompiledProtocol
+            default: False
+
+        strTipStatePath: str
+            the file the state of the tip racks is kept in, so partly used
+            racks carry over to later clients, see tipManager
+            default: None
+
+        boolElideRedundant: bool
+            whether moves to where the pipette already is are skipped, see
+            robotStateMirror
+            default: False
+
         returns
         ----------
         None
         '''
         self.robotType = strRobot
         self.robotIP = strRobotIP
+        self.baseURL = f"http://{strRobotIP}:{intPort}"
         self.headers = dicHeaders
-        self.runID = None
-        self.commandURL = None
+        self.__strRunID = None
+        self.__runLock = threading.Lock()
+        self.runPool = runPool
+        self.runCollector = runCollector
+        self.compiler = protocolCompiler(strRobot) if boolCompile else None
+
+        # one pooled session is shared by every endpoint so that connections
+        # to the robot are reused instead of opened per request
+        self.__intPoolSize = intPoolSize
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections = 1,
+                                                  pool_maxsize = intPoolSize,
+                                                  max_retries = intMaxRetries))
+
+        # control actions and lights go over their own connection so that
+        # they never queue behind commands held open by waitUntilComplete,
+        # and may be sent from any thread while another one is blocked
+        self.controlTimeout = fltControlTimeout
+        self.controlSession = requests.Session()
+        self.controlSession.mount("http://", HTTPAdapter(pool_connections = 1,
+                                                         pool_maxsize = 1,
+                                                         max_retries = 0))
+        self.__controlLock = threading.Lock()
 
         # *** NEED TO ADD FIXED TRASH TO LABWARE BY DEFAULT ***
-        self.labware = {}#{"fixed-trash": {'id': 'fixed-trash', 'slot': 12}}
+        # name -> labwareRecord, indexed by ID, slot, load name and stacking
+        self.labware = deckModel()
 
         self.pipettes = {}
-        self.__initalizeRun()
+
+        # offsets added to the run, as returned by the robot
+        self.labwareOffsets = []
+
+        # tips left in every tip rack and which pipettes hold a tip
+        self.tips = tipManager(strTipStatePath)
+
+        # where the pipettes are and what they hold, from the commands sent
+        self.state = robotStateMirror(boolElideRedundant)
+
+        # definitionUri -> well name -> (x, y) from the definitions the robot
+        # returned, for ordering well visits
+        self.wellCoordinates = {}
+
+        self.checkpointPath = strCheckpointPath
+        self.__checkpointLock = threading.Lock()
+
+        # custom labware definitions are parsed once per process and uploaded
+        # once per run: content hash -> definitionUri uploaded to this run
+        self.labwareCache = labwareCache or defaultLabwareCache
+        self.labwareDefinitions = {}
+
+        # handles of commands that were queued without waiting
+        self.pipelined = boolPipelined
+        self.pendingCommands = []
+
+        # command ID -> name of the client method that issued it, for the
+        # commands of the current run
+        self.commandOrigins = {}
+
+        # callables receiving a commandTiming for every request sent
+        self.instrumentationHooks = []
+        # command type and encoding time of the body about to be sent
+        self.__serialization = threading.local()
+
+        self.recorder = None
+        if strRecordingPath is not None:
+            self.startRecording(strRecordingPath)
+
+        if strRunID is not None:
+            self.attachRun(strRunID)
+        elif not boolLazyRun:
+            self.__initalizeRun()
+
+    @property
+    def runID(self) -> str:
+        '''
+        the ID of the client's run, created on first use by lazy clients
+        '''
+        if self.__strRunID is None:
+            with self.__runLock:
+                if self.__strRunID is None:
+                    self.__initalizeRun()
+        return self.__strRunID
+
+    @runID.setter
+    def runID(self, strRunID: str):
+        self.__strRunID = strRunID
+
+    @property
+    def createdRunID(self) -> str:
+        '''
+        the ID of the client's run, None if a lazy client has not created it
+        yet; unlike runID it never creates one, e.g. after close()
+        '''
+        return self.__strRunID
+
+    @property
+    def tipsUsed(self) -> dict:
+        '''
+        tip rack name -> wells whose tips were taken, see tips
+        '''
+        return {strRack: self.tips.used(strRack) for strRack in self.tips.racks}
+
+    def pipetteVolume(self,
+                      strPipetteName: str) -> float:
+        '''
+        the volume a pipette holds in uL from the commands sent, None if
+        unknown
+        '''
+        return self.state.volume(self.pipettes[strPipetteName]['id'])
+
+    @property
+    def commandURL(self) -> str:
+        return f"{self.baseURL}/runs/{self.runID}/commands"
 
     # @task
     def __initalizeRun(self):
@@ -57,18 +368,30 @@ class opentronsClient:
         None
         '''
 
-        strRunURL = f"http://{self.robotIP}:31950/runs"
+        if self.runPool is not None and self.compiler is None:
+            # a run pre-created by the pool
+            self.__strRunID = self.runPool.acquire()
+            self.labwareDefinitions = {}
+            self.commandOrigins = {}
+            if self.runCollector is not None:
+                self.runCollector.track(self.__strRunID)
+
+            # LOG - info
+            LOGGER.info(f"Run taken from pool with ID: {self.__strRunID}")
+            return
+
+        strRunURL = f"{self.baseURL}/runs"
         # create a new run
-        response = requests.post(url=strRunURL,
-                                 headers=self.headers
-                                 )
+        response = self.__sendRequest("POST", strRunURL, "createRun")
 
         if response.status_code == 201:
             dicResponse = json.loads(response.text)
             # get the run ID
-            self.runID = dicResponse['data']['id']
-            # setup command endpoints
-            self.commandURL = strRunURL + f"/{self.runID}/commands"
+            self.__strRunID = dicResponse['data']['id']
+            self.labwareDefinitions = {}
+            self.commandOrigins = {}
+            if self.runCollector is not None and self.compiler is None:
+                self.runCollector.track(self.__strRunID)
 
             # LOG - info
             LOGGER.info(f"New run created with ID: {self.runID}")
@@ -76,7 +399,729 @@ class opentronsClient:
 
         else:
             raise Exception(f"Failed to create a new run.\nError code: {response.status_code}\n Error message: {response.text}")
-        
+
+    def attachRun(self,
+                  strRunID: str):
+        '''
+        attaches the client to an existing run and rebuilds its labware,
+        pipettes and offsets from the run's state with a single request,
+        without issuing any commands
+
+        labware is named "<loadName>_<slot>" as by loadLabware, stacked
+        labware taking the slot of the labware below it
+
+        arguments
+        ----------
+        strRunID: str
+            the ID of the run
+
+        returns
+        ----------
+        dicRun: dict
+            the run as returned by the robot
+        '''
+        response = self.__sendRequest("GET", f"{self.baseURL}/runs/{strRunID}", "getRunInfo")
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to attach to run {strRunID}.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        dicRun = json.loads(response.text)['data']
+
+        self.__strRunID = strRunID
+        self.labwareDefinitions = {}
+        self.pendingCommands = []
+        self.commandOrigins = {}
+
+        # the robot lists labware in load order, but labware may since have
+        # been moved onto labware loaded after it, so every labware is added
+        # after the labware it sits on
+        lstLabware = dicRun.get('labware', [])
+        setIDs = {dicLabware['id'] for dicLabware in lstLabware}
+        lstOrdered = []
+        setAdded = set()
+        intAdded = -1
+        while len(lstOrdered) > intAdded:
+            intAdded = len(lstOrdered)
+            for dicLabware in lstLabware:
+                dicLocation = dicLabware.get('location')
+                strParentID = dicLocation.get('labwareId') if isinstance(dicLocation, dict) else None
+                if dicLabware['id'] not in setAdded and (strParentID not in setIDs or strParentID in setAdded):
+                    lstOrdered.append(dicLabware)
+                    setAdded.add(dicLabware['id'])
+
+        self.labware = deckModel()
+        for dicLabware in lstOrdered:
+            dicLocation = dicLabware.get('location')
+            strSlot = None
+            strParentID = None
+            if isinstance(dicLocation, dict):
+                strParentID = dicLocation.get('labwareId')
+                strSlot = dicLocation.get('slotName', dicLocation.get('addressableAreaName'))
+            if strParentID is not None and self.labware.byID(strParentID) is not None:
+                strSlot = self.labware.byID(strParentID).slot
+            self.__addLoadedLabware(f"{dicLabware['loadName']}_{strSlot}",
+                                    dicLabware['id'],
+                                    dicLabware['loadName'],
+                                    dicLabware['definitionUri'],
+                                    strSlot,
+                                    strParentID)
+
+        self.pipettes = {dicPipette['pipetteName']: {"id": dicPipette['id'], "mount": dicPipette['mount']}
+                         for dicPipette in dicRun.get('pipettes', [])}
+        self.labwareOffsets = list(dicRun.get('labwareOffsets', []))
+        # nothing is known about where the gantry was left
+        self.state.invalidate()
+
+        # LOG - info
+        LOGGER.info(f"Attached to run {strRunID} with labware: {list(self.labware)} and pipettes: {list(self.pipettes)}")
+
+        return dicRun
+
+    def saveCheckpoint(self,
+                       strFilePath: str = None):
+        '''
+        writes the client's state to a JSON file from which fromCheckpoint
+        can resume the run after the script was interrupted, replacing the
+        file atomically so that a crash never leaves it half written
+
+        arguments
+        ----------
+        strFilePath: str
+            the file to write, the client's checkpoint path if None
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        strFilePath = strFilePath or self.checkpointPath
+
+        dicCheckpoint = {
+            "robotIP": self.robotIP,
+            "baseURL": self.baseURL,
+            "robotType": self.robotType,
+            "runID": self.__strRunID,
+            "commandURL": self.commandURL if self.__strRunID is not None else None,
+            "labware": self.labware.toDict(),
+            "pipettes": self.pipettes,
+            "labwareOffsets": self.labwareOffsets,
+            "labwareDefinitions": self.labwareDefinitions,
+            "tips": self.tips.toDict()
+        }
+        # the tip file is kept in step with the checkpoint
+        self.tips.save()
+
+        strTempPath = f"{strFilePath}.tmp"
+        with self.__checkpointLock:
+            with open(strTempPath, "w") as file:
+                json.dump(dicCheckpoint, file, indent = 2)
+            os.replace(strTempPath, strFilePath)
+
+        # LOG - debug
+        LOGGER.debug(f"Checkpoint written to: {strFilePath}")
+
+    def __checkpoint(self):
+        # called after every change of state kept in the checkpoint
+        if self.checkpointPath is not None:
+            self.saveCheckpoint()
+
+    @classmethod
+    def fromCheckpoint(cls,
+                       strFilePath: str,
+                       **dicOptions):
+        '''
+        creates a client attached to the run of a checkpoint written by
+        saveCheckpoint, keeping the labware and pipette names and tips used
+        of the checkpoint and adding anything loaded after it was written
+
+        arguments
+        ----------
+        strFilePath: str
+            the checkpoint file
+
+        dicOptions: dict
+            further arguments of opentronsClient, e.g. dicHeaders; the robot,
+            port and checkpoint path default to those of the checkpoint
+
+        returns
+        ----------
+        client: opentronsClient
+            the client, attached to the run
+        '''
+        with open(strFilePath, "r") as file:
+            dicCheckpoint = json.load(file)
+
+        dicOptions.setdefault('strRobot', dicCheckpoint['robotType'])
+        dicOptions.setdefault('intPort', int(dicCheckpoint['baseURL'].rsplit(":", 1)[1]))
+        dicOptions.setdefault('strCheckpointPath', strFilePath)
+        client = cls(strRobotIP = dicCheckpoint['robotIP'],
+                     strRunID = dicCheckpoint['runID'],
+                     **dicOptions)
+
+        # the run is authoritative for what is loaded, the checkpoint for
+        # the names the script refers to it by
+        for strName, dicLabware in dicCheckpoint['labware'].items():
+            record = client.labware.byID(dicLabware['id'])
+            if record is not None and record.name != strName:
+                if record.name in client.tips:
+                    client.tips.renameRack(record.name, strName)
+                client.labware.rename(record.name, strName)
+
+        client.labwareDefinitions = dicCheckpoint.get('labwareDefinitions', {})
+        if 'tips' in dicCheckpoint:
+            client.tips.restore(dicCheckpoint['tips'])
+        else:
+            # checkpoints written before tip racks were tracked as bitmaps
+            for strRack, lstWells in dicCheckpoint.get('tipsUsed', {}).items():
+                client.tips.addRack(strRack)
+                for strWell in lstWells:
+                    client.tips.use(strRack, strWell)
+
+        # LOG - info
+        LOGGER.info(f"Resumed run {client.runID} from checkpoint: {strFilePath}")
+
+        return client
+
+    def compileProtocol(self,
+                        strFilePath: str = None) -> str:
+        '''
+        writes the session captured in compile mode as a python protocol
+
+        arguments
+        ----------
+        strFilePath: str
+            the file to write the protocol to, e.g. "protocol.py", only
+            returned if None
+            default: None
+
+        returns
+        ----------
+        strProtocol: str
+            the source of the protocol
+        '''
+        if self.compiler is None:
+            raise Exception("The client is not in compile mode.")
+
+        strProtocol = self.compiler.toPython()
+        if strFilePath is not None:
+            with open(strFilePath, "w") as file:
+                file.write(strProtocol)
+
+        # LOG - info
+        LOGGER.info(f"Compiled {len(self.compiler.commands)} commands into a protocol")
+
+        return strProtocol
+
+    def runCompiledProtocol(self,
+                            boolPlay: bool = True) -> str:
+        '''
+        uploads the session captured in compile mode as a protocol, creates a
+        run of it with the captured labware offsets and starts it; the client
+        then leaves compile mode and is attached to that run, e.g. for
+        runMonitor or controlAction
+
+        arguments
+        ----------
+        boolPlay: bool
+            whether to start the run
+            default: True
+
+        returns
+        ----------
+        strRunID: str
+            the ID of the protocol's run
+        '''
+        strProtocol = self.compileProtocol()
+        compiler, self.compiler = self.compiler, None
+
+        response = self.__sendRequest("POST",
+                                      f"{self.baseURL}/protocols",
+                                      "uploadProtocol",
+                                      lstFiles = [("files", ("protocol.py", strProtocol.encode(), "text/x-python"))])
+        if response.status_code not in (200, 201):
+            self.compiler = compiler
+            raise Exception(f"Failed to upload protocol.\nError code: {response.status_code}\n Error message: {response.text}")
+        strProtocolID = json.loads(response.text)['data']['id']
+
+        # LOG - info
+        LOGGER.info(f"Protocol uploaded with ID: {strProtocolID}")
+
+        response = self.__sendRequest("POST",
+                                      f"{self.baseURL}/runs",
+                                      "createRun",
+                                      strCommand = self.__serialize({"data": {"protocolId": strProtocolID}}))
+        if response.status_code != 201:
+            raise Exception(f"Failed to create a run of the protocol.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        # the captured labware and pipette IDs do not exist in the new run
+        self.__strRunID = json.loads(response.text)['data']['id']
+        self.labware = deckModel()
+        self.pipettes = {}
+        self.labwareDefinitions = {}
+        self.pendingCommands = []
+        self.commandOrigins = {}
+        if self.runCollector is not None:
+            self.runCollector.track(self.__strRunID)
+
+        for dicOffset in compiler.labwareOffsets:
+            response = self.__sendRequest("POST",
+                                          f"{self.baseURL}/runs/{self.__strRunID}/labware_offsets",
+                                          "labwareOffset",
+                                          strCommand = self.__serialize({"data": {strKey: dicOffset[strKey] for strKey in ("definitionUri", "location", "vector")}}))
+            if response.status_code != 201:
+                raise Exception(f"Failed to add offsets to labware.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        # LOG - info
+        LOGGER.info(f"Protocol run created with ID: {self.__strRunID}")
+
+        if boolPlay:
+            self.controlAction("play")
+
+        return self.__strRunID
+
+    def close(self):
+        '''
+        closes the pooled connections to the robot
+
+        arguments
+        ----------
+        None
+
+        returns
+        ----------
+        None
+        '''
+        self.stopRecording()
+        self.tips.save()
+        if self.state.elidedCount:
+            # LOG - info
+            LOGGER.info(f"Commands elided by the state mirror: {self.state.report()}")
+        self.session.close()
+        self.controlSession.close()
+        if self.runPool is not None and self.__strRunID is not None:
+            # the pool warms the next run
+            self.runPool.release(self.__strRunID)
+        if self.runCollector is not None and self.__strRunID is not None:
+            self.runCollector.retire(self.__strRunID)
+
+    def startRecording(self,
+                       strFilePath: str,
+                       intBufferSize: int = 1000):
+        '''
+        starts appending every request and response to a compressed, line
+        oriented file that can be replayed later
+
+        arguments
+        ----------
+        strFilePath: str
+            the file to append to, e.g. "session.jsonl.gz"
+
+        intBufferSize: int
+            the number of requests held in memory between writes
+            default: 1000
+
+        returns
+        ----------
+        recorder: sessionRecorder
+            the recorder, also available as self.recorder
+        '''
+        self.stopRecording()
+        self.recorder = sessionRecorder(strFilePath,
+                                        intBufferSize = intBufferSize,
+                                        dicSession = {"robotIP": self.robotIP,
+                                                      "robotType": self.robotType,
+                                                      "runId": self.__strRunID})
+        self.addInstrumentationHook(self.recorder)
+
+        # LOG - info
+        LOGGER.info(f"Recording session to: {strFilePath}")
+        return self.recorder
+
+    def stopRecording(self):
+        '''
+        stops recording and writes out the buffered requests
+        '''
+        if self.recorder is None:
+            return
+        self.removeInstrumentationHook(self.recorder)
+        self.recorder.close()
+        self.recorder = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def addInstrumentationHook(self,
+                               funcHook):
+        '''
+        registers a callable that receives a commandTiming for every request
+        the client sends, e.g. a commandTimingAggregator
+
+        arguments
+        ----------
+        funcHook: callable
+            called as funcHook(timing) once the response has been received
+
+        returns
+        ----------
+        None
+        '''
+        self.instrumentationHooks.append(funcHook)
+
+    def removeInstrumentationHook(self,
+                                  funcHook):
+        '''
+        unregisters a callable added with addInstrumentationHook
+        '''
+        self.instrumentationHooks.remove(funcHook)
+
+    def __serialize(self,
+                    dicCommand: dict) -> str:
+        '''
+        encodes a request body, remembering its command type and encoding time
+        for the instrumentation of the request that sends it
+        '''
+        fltStart = time.perf_counter()
+        strCommand = json.dumps(dicCommand)
+        self.__serialization.seconds = time.perf_counter() - fltStart
+        self.__serialization.commandType = dicCommand.get('data', {}).get('commandType')
+        return strCommand
+
+    def __sendRequest(self,
+                      strMethod: str,
+                      strURL: str,
+                      strRequestKind: str,
+                      strCommand: str = None,
+                      dicParams: dict = None,
+                      strCommandType: str = None,
+                      session: requests.Session = None,
+                      fltTimeout: float = None,
+                      lstFiles: list = None):
+        '''
+        sends a request to the robot through the pooled session and passes its
+        timing to the instrumentation hooks
+
+        arguments
+        ----------
+        strMethod: str
+            the HTTP method
+
+        strURL: str
+            the URL of the endpoint
+
+        strRequestKind: str
+            what the request is for, see commandTiming.requestKind
+
+        strCommand: str
+            the JSON encoded request body
+            default: None
+
+        dicParams: dict
+            the query parameters
+            default: None
+
+        strCommandType: str
+            the command type reported to the hooks, taken from the last
+            serialized body (commands) or the request kind if None
+            default: None
+
+        session: requests.Session
+            the session to send the request through, the pooled session if
+            None
+            default: None
+
+        fltTimeout: float
+            the longest time to wait for the robot in seconds, forever if None
+            default: None
+
+        lstFiles: list
+            files sent as a multipart body in place of strCommand, as
+            requests takes them
+            default: None
+
+        returns
+        ----------
+        response: requests.Response
+            the response from the robot
+        '''
+        fltSerialization = 0.0
+        if strCommand is not None:
+            fltSerialization = getattr(self.__serialization, "seconds", 0.0)
+            if strCommandType is None and strRequestKind == "command":
+                strCommandType = self.__serialization.commandType
+
+        if self.compiler is not None:
+            # compile mode: the compiler answers in place of the robot
+            return self.compiler.handle(strMethod, strURL, strRequestKind, strCommand)
+
+        session = session or self.session
+
+        if not self.instrumentationHooks:
+            return session.request(strMethod, url = strURL, headers = self.headers,
+                                   params = dicParams, data = strCommand, files = lstFiles, timeout = fltTimeout)
+
+        fltStart = time.time()
+        response = session.request(strMethod, url = strURL, headers = self.headers,
+                                   params = dicParams, data = strCommand, files = lstFiles, timeout = fltTimeout)
+        fltEnd = time.time()
+
+        dicData = None
+        if strRequestKind in ("command", "commandStatus") and response.status_code in (200, 201):
+            dicData = json.loads(response.text).get('data')
+            strCommandType = strCommandType or dicData.get('commandType')
+
+        timing = commandTiming(strRequestKind,
+                               strCommandType or strRequestKind,
+                               strMethod,
+                               strURL,
+                               strCommand,
+                               fltSerialization,
+                               fltStart,
+                               fltEnd,
+                               response.status_code,
+                               response.text,
+                               dicData,
+                               params = dicParams)
+
+        for funcHook in self.instrumentationHooks:
+            try:
+                funcHook(timing)
+            except Exception as error:
+                # LOG - error
+                LOGGER.error(f"Instrumentation hook {funcHook!r} failed: {error}")
+
+        return response
+
+    def getCommand(self,
+                   strCommandID: str,
+                   boolWaitUntilComplete: bool = False,
+                   fltTimeout: float = 30):
+        '''
+        gets a command of the current run
+
+        arguments
+        ----------
+        strCommandID: str
+            the ID of the command
+
+        boolWaitUntilComplete: bool
+            whether the robot should hold the response until the command has
+            completed or fltTimeout has elapsed
+            default: False
+
+        fltTimeout: float
+            the longest time the robot holds the response, in seconds
+            default: 30
+
+        returns
+        ----------
+        dicCommand: dict
+            the command as returned by the robot
+        '''
+        dicParams = {"waitUntilComplete": boolWaitUntilComplete}
+        if boolWaitUntilComplete:
+            dicParams["timeout"] = int(fltTimeout * 1000)
+
+        response = self.__sendRequest("GET",
+                                      f"{self.commandURL}/{strCommandID}",
+                                      "commandStatus",
+                                      dicParams = dicParams)
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to get command.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        return json.loads(response.text)['data']
+
+    def __postCommand(self,
+                      strCommand: str,
+                      strOrigin: str,
+                      boolWait: bool = None):
+        '''
+        posts a command to the run's command endpoint
+
+        arguments
+        ----------
+        strCommand: str
+            the JSON encoded command
+
+        strOrigin: str
+            the public client method issuing the command, see commandOrigins
+
+        boolWait: bool
+            whether to wait for the command to complete, follows the
+            pipelined setting of the client if None
+            default: None
+
+        returns
+        ----------
+        command: opentronsCommand
+            the handle of the command, None if the robot rejected it
+
+        response: requests.Response
+            the response from the robot
+        '''
+        if boolWait is None:
+            boolWait = not self.pipelined
+
+        response = self.__sendRequest("POST",
+                                      self.commandURL,
+                                      "command",
+                                      strCommand = strCommand,
+                                      dicParams = {"waitUntilComplete": boolWait})
+
+        command = None
+        if response.status_code == 201:
+            dicData = json.loads(response.text)['data']
+            self.state.observe(dicData)
+            command = opentronsCommand(self, dicData)
+            if not command.isComplete:
+                self.pendingCommands.append(command)
+            self.commandOrigins[command.id] = strOrigin
+            if len(self.commandOrigins) > INT_MAX_COMMAND_ORIGINS:
+                del self.commandOrigins[next(iter(self.commandOrigins))]
+
+        return command, response
+
+    def sendCommand(self,
+                    dicCommand: dict,
+                    boolWait: bool = None,
+                    strOrigin: str = "sendCommand") -> opentronsCommand:
+        '''
+        posts a protocol engine command as is, for commands without a
+        dedicated method
+
+        arguments
+        ----------
+        dicCommand: dict
+            the request body, e.g. {"data": {"commandType": ..., "params": ...,
+            "intent": ...}}
+
+        boolWait: bool
+            whether to wait for the command to complete, follows the
+            pipelined setting of the client if None
+            default: None
+
+        strOrigin: str
+            the client method the command is attributed to in commandOrigins
+            default: "sendCommand"
+
+        returns
+        ----------
+        command: opentronsCommand
+            the handle of the command
+        '''
+        strCommand = self.__serialize(dicCommand)
+
+        # LOG - debug
+        LOGGER.debug(f"Command: {strCommand}")
+
+        command, response = self.__postCommand(strCommand, strOrigin, boolWait = boolWait)
+
+        if command is None:
+            raise Exception(f"Failed to send command.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        return command
+
+    def sendRequest(self,
+                    strMethod: str,
+                    strPath: str,
+                    dicBody: dict = None,
+                    dicParams: dict = None,
+                    strRequestKind: str = "request"):
+        '''
+        sends a request to any endpoint of the robot server through the pooled
+        session
+
+        arguments
+        ----------
+        strMethod: str
+            the HTTP method
+
+        strPath: str
+            the path of the endpoint, e.g. f"/runs/{client.runID}/actions"
+
+        dicBody: dict
+            the request body
+            default: None
+
+        dicParams: dict
+            the query parameters
+            default: None
+
+        strRequestKind: str
+            what the request is for, reported to the instrumentation hooks
+            default: "request"
+
+        returns
+        ----------
+        response: requests.Response
+            the response from the robot
+        '''
+        strCommand = None if dicBody is None else self.__serialize(dicBody)
+
+        return self.__sendRequest(strMethod,
+                                  f"{self.baseURL}{strPath}",
+                                  strRequestKind,
+                                  strCommand = strCommand,
+                                  dicParams = dicParams,
+                                  strCommandType = strRequestKind)
+
+    @contextmanager
+    def pipelinedCommands(self):
+        '''
+        context manager that queues commands without waiting and waits for all
+        of them on exit
+
+        usage
+        ----------
+        with client.pipelinedCommands():
+            for strWell in lstWells:
+                client.dispense(...)
+        '''
+        boolPipelined_temp = self.pipelined
+        self.pipelined = True
+        try:
+            yield self
+        finally:
+            self.pipelined = boolPipelined_temp
+        self.waitForCommands()
+
+    def waitForCommands(self,
+                        lstCommands: list = None,
+                        fltTimeout: float = None):
+        '''
+        blocks until every given command has completed on the robot
+
+        arguments
+        ----------
+        lstCommands: list
+            the command handles to wait on, all pending commands if None
+            default: None
+
+        fltTimeout: float
+            the maximum time to wait in seconds, waits forever if None
+            default: None
+
+        returns
+        ----------
+        lstCommands: list
+            the completed commands
+        '''
+        if lstCommands is None:
+            lstCommands = list(self.pendingCommands)
+
+        fltDeadline = None if fltTimeout is None else time.monotonic() + fltTimeout
+
+        try:
+            for command in lstCommands:
+                command.wait(None if fltDeadline is None else max(fltDeadline - time.monotonic(), 0))
+        finally:
+            self.pendingCommands = [command for command in self.pendingCommands if not command.isComplete]
+
+        return lstCommands
+
     def getRunInfo(self):
         '''
         gets the information for the current run
@@ -94,10 +1139,7 @@ class opentronsClient:
         # LOG - info
         LOGGER.info(f"Getting information for run: {self.runID}")
 
-        response = requests.get(
-            url = f"http://{self.robotIP}:31950/runs/{self.runID}",
-            headers = self.headers
-        )
+        response = self.__sendRequest("GET", f"{self.baseURL}/runs/{self.runID}", "getRunInfo")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -113,6 +1155,40 @@ class opentronsClient:
         return jsonRunInfo
         
         
+    def getRunCommands(self,
+                       intCursor: int = 0,
+                       intPageLength: int = 100):
+        '''
+        gets a page of the current run's command summaries
+
+        arguments
+        ----------
+        intCursor: int
+            the index of the first command of the page, the most recent
+            commands if None
+            default: 0
+
+        intPageLength: int
+            the number of commands in the page
+            default: 100
+
+        returns
+        ----------
+        dicCommands: dict
+            the page, with the command summaries under "data" and the total
+            number of commands under "meta"
+        '''
+        response = self.__sendRequest("GET",
+                                      self.commandURL,
+                                      "getRunCommands",
+                                      dicParams = {"pageLength": intPageLength} if intCursor is None else
+                                                  {"cursor": intCursor, "pageLength": intPageLength})
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to get run commands.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        return json.loads(response.text)
+
     def loadLabware(self,
                     strSlot: Union[str, int],
                     strLabwareName: str,
@@ -166,19 +1242,14 @@ class opentronsClient:
             }
         }
 
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Loading labware: {strLabwareName} in slot: {strSlot}")
         # LOG - debug
         LOGGER.debug(f"Command: {strCommand}")
 
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "loadLabware", boolWait = True)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -188,29 +1259,134 @@ class opentronsClient:
             dicResponse = json.loads(response.text)
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to load labware.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to load labware.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to load labware.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to load labware.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 strLabwareID = dicResponse['data']['result']['labwareId']
                 #strLabwareURi = dicResponse['data']['result']['labwareUri']
                 strLabwareIdentifier_temp = strLabwareName + "_" + str(strSlot)
-                self.labware[strLabwareIdentifier_temp] = {"id": strLabwareID, "slot": strSlot}
+                self.__addLoadedLabware(strLabwareIdentifier_temp,
+                                        strLabwareID,
+                                        strLabwareName,
+                                        f"{strNamespace}/{strLabwareName}/{intVersion}",
+                                        strSlot,
+                                        loc.get('labwareId'),
+                                        dicResponse['data']['result'].get('definition'))
+                self.__checkpoint()
                 # LOG - info
                 LOGGER.info(f"Labware loaded with name: {strLabwareName} and ID: {strLabwareID}")
         else:
             raise Exception(f"Failed to load labware.\nError code: {response.status_code}\n Error message: {response.text}")
         
         return strLabwareIdentifier_temp
-        
+
+    def __addLoadedLabware(self,
+                           strIdentifier: str,
+                           strLabwareID: str,
+                           strLoadName: str,
+                           strDefinitionUri: str,
+                           strSlot: Union[str, int],
+                           strParentID: str = None,
+                           dicDefinition: dict = None):
+        '''
+        records labware the robot loaded: on the deck model, its well
+        coordinates for ordering well visits and, for tip racks, its tips
+
+        arguments
+        ----------
+        strIdentifier: str
+            the name the labware is known by, "<loadName>_<slot>"
+
+        strLabwareID: str
+            the ID of the labware on the robot
+
+        strLoadName: str
+            the load name of the labware
+
+        strDefinitionUri: str
+            the "<namespace>/<loadName>/<version>" of its definition
+
+        strSlot: Union[str, int]
+            the slot the labware is in
+
+        strParentID: str
+            the ID of the labware it is stacked on, None if on the deck
+            default: None
+
+        dicDefinition: dict
+            the definition of the labware if known, tip racks are then told
+            apart by the load name
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        dicDefinition = dicDefinition or {}
+        if strDefinitionUri not in self.wellCoordinates:
+            # kept once per definition for ordering well visits
+            dicCoordinates = wellCoordinates(dicDefinition)
+            if dicCoordinates is not None:
+                self.wellCoordinates[strDefinitionUri] = dicCoordinates
+        self.labware.add(strIdentifier,
+                         strLabwareID,
+                         strLoadName,
+                         strDefinitionUri,
+                         slot = strSlot,
+                         strParentID = strParentID)
+        if dicDefinition.get('parameters', {}).get('isTiprack', "tiprack" in strLoadName):
+            self.tips.addRack(strIdentifier, dicDefinition.get('ordering'))
+
+    def recordLoadCommand(self,
+                          dicCommand: dict,
+                          dicResult: dict):
+        '''
+        records the labware or pipette loaded by a command sent through
+        sendCommand, e.g. by replaySession, the way loadLabware and
+        loadPipette do - other command types are ignored
+
+        labware is named "<loadName>_<slot>" as by loadLabware, stacked
+        labware taking the slot of the labware below it
+
+        arguments
+        ----------
+        dicCommand: dict
+            the "data" of the command, with its commandType and params
+
+        dicResult: dict
+            the result of the succeeded command
+
+        returns
+        ----------
+        None
+        '''
+        dicParams = dicCommand.get('params', {})
+        if dicCommand['commandType'] == "loadLabware":
+            dicLocation = dicParams.get('location', {})
+            strParentID = dicLocation.get('labwareId')
+            strSlot = dicLocation.get('slotName', dicLocation.get('addressableAreaName'))
+            if strParentID is not None and self.labware.byID(strParentID) is not None:
+                strSlot = self.labware.byID(strParentID).slot
+            self.__addLoadedLabware(f"{dicParams['loadName']}_{strSlot}",
+                                    dicResult['labwareId'],
+                                    dicParams['loadName'],
+                                    f"{dicParams.get('namespace', 'opentrons')}/{dicParams['loadName']}/{dicParams.get('version', 1)}",
+                                    strSlot,
+                                    strParentID,
+                                    dicResult.get('definition'))
+        elif dicCommand['commandType'] == "loadPipette":
+            self.pipettes[dicParams['pipetteName']] = {"id": dicResult['pipetteId'], "mount": dicParams.get('mount')}
+
     def loadCustomLabwareFromFile(self, strSlot, strFilePath, strLabware=None):
-        with open(strFilePath, 'r', encoding='utf-8') as f:
-            labware = self.loadCustomLabware(
-                dicLabware = json.load(f),
-                strSlot = strSlot,
-                strLabware=strLabware
-            )
-            return labware
+        # the file is only reparsed when it changed since it was last read
+        strHash, dicLabware = self.labwareCache.load(strFilePath)
+        labware = self.loadCustomLabware(
+            dicLabware = dicLabware,
+            strSlot = strSlot,
+            strLabware=strLabware
+        )
+        return labware
     
     def loadCustomLabware(self,
                           dicLabware: dict,
@@ -237,49 +1413,68 @@ class opentronsClient:
         None
         '''
 
+        # LOG - info
+        LOGGER.info(f"Loading custom labware: {dicLabware['parameters']['loadName']} in slot: {strSlot}")
+
+        self.__uploadLabwareDefinition(dicLabware)
+
+        # load the labware
+        strLabwareIdentifier_temp = self.loadLabware(strSlot = strSlot,
+                                                    strLabwareName = dicLabware['parameters']['loadName'],
+                                                    strNamespace = dicLabware['namespace'],
+                                                    intVersion = dicLabware['version'],
+                                                    strIntent = "setup",
+                                                    strLabwareLocation=strLabware
+                                                    )
+        return strLabwareIdentifier_temp
+
+    def __uploadLabwareDefinition(self,
+                                  dicLabware: dict) -> str:
+        '''
+        uploads a custom labware definition to the run unless the run already
+        holds it
+
+        arguments
+        ----------
+        dicLabware: dict
+            the labware definition
+
+        returns
+        ----------
+        strDefinitionUri: str
+            the URI of the definition in the run
+        '''
+        strHash = self.labwareCache.hash(dicLabware)
+        if strHash in self.labwareDefinitions:
+            # LOG - info
+            LOGGER.info(f"Custom labware {dicLabware['parameters']['loadName']} already uploaded to run: {self.runID}")
+            return self.labwareDefinitions[strHash]
+
         dicCommand = {'data' : dicLabware}
 
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
-        # LOG - info
-        LOGGER.info(f"Loading custom labware: {dicLabware['parameters']['loadName']} in slot: {strSlot}")
         # LOG - debug
         LOGGER.debug(f"Command: {strCommand}")
 
-        response = requests.post(
-            url = f"http://{self.robotIP}:31950/runs/{self.runID}/labware_definitions",
-            headers = self.headers,
-            data = strCommand
-        )
+        response = self.__sendRequest("POST",
+                                      f"{self.baseURL}/runs/{self.runID}/labware_definitions",
+                                      "labwareDefinition",
+                                      strCommand = strCommand)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
 
-        if response.status_code == 201:
-            # convert response to dictionary
-            dicResponse = json.loads(response.text)
-            # if the response failed
-            # if dicResponse['data']['status'] == "failed":
-            #     # log the error
-            #     LOGGER.error(f"Failed to load custom labware.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
-            #     # raise exception
-            #     raise Exception(f"Failed to load custom labware.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
-            if False: pass
-            else:
-                # LOG - info
-                LOGGER.info(f"Custome labware {dicLabware['parameters']['loadName']} loaded in slot: {strSlot} successfully.")
-                # load the labware
-                strLabwareIdentifier_temp = self.loadLabware(strSlot = strSlot,
-                                                            strLabwareName = dicLabware['parameters']['loadName'],
-                                                            strNamespace = dicLabware['namespace'],
-                                                            intVersion = dicLabware['version'],
-                                                            strIntent = "setup",
-                                                            strLabwareLocation=strLabware
-                                                            )
-                return strLabwareIdentifier_temp
-        else:
+        if response.status_code != 201:
             raise Exception(f"Failed to load custom labware.\nError code: {response.status_code}\n Error message: {response.text}")
 
+        # convert response to dictionary
+        dicResponse = json.loads(response.text)
+        self.labwareDefinitions[strHash] = dicResponse['data'].get('definitionUri')
+        # LOG - info
+        LOGGER.info(f"Custom labware definition {self.labwareDefinitions[strHash]} uploaded successfully.")
+        return self.labwareDefinitions[strHash]
+
     def loadPipette(self,
                     strPipetteName: str,
                     strMount: str):
@@ -310,19 +1505,14 @@ class opentronsClient:
             }
         }
 
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Loading pipette: {strPipetteName} on mount: {strMount}")
         # LOG - debug
         LOGGER.debug(f"Command: {strCommand}")
 
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "loadPipette", boolWait = True)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -333,12 +1523,13 @@ class opentronsClient:
             # if the response failed
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to load pipette.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to load pipette.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to load pipette.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to load pipette.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 strPipetteID = dicResponse['data']['result']['pipetteId']
                 self.pipettes[strPipetteName] = {"id": strPipetteID, "mount": strMount}
+                self.__checkpoint()
                 # LOG - info
                 LOGGER.info(f"Pipette loaded with name: {strPipetteName} and ID: {strPipetteID}")
         else:
@@ -346,6 +1537,199 @@ class opentronsClient:
                 f"Failed to load pipette.\nError code: {response.status_code}\n Error message: {response.text}"
             )
 
+    def loadDeck(self,
+                 dicLayout: dict,
+                 intConcurrency: int = None):
+        '''
+        sets up a whole deck from a declarative layout with as few blocking
+        round trips as possible: custom definitions and offsets are uploaded
+        in parallel, then every pipette and labware is queued on the robot at
+        once, stacked labware after the labware it sits on, and waited for
+        together
+
+        arguments
+        ----------
+        dicLayout: dict
+            {"labware": [{"slot": 1,
+                          "loadName": "corning_96_wellplate_360ul_flat",
+                          "namespace": "opentrons",        # optional
+                          "version": 1,                    # optional
+                          "definition": {...},             # custom labware, or
+                          "definitionFile": "plate.json",  # custom labware
+                          "on": "adapter_1",               # stacked labware
+                          "offset": {"x": 0.1, "y": 0, "z": -0.2}},
+                         ...],
+             "pipettes": [{"pipetteName": "p300_single_gen2", "mount": "left"},
+                          ...]}
+            labware is named "<loadName>_<slot>" as by loadLabware, and
+            stacked labware refers to the labware below it by that name
+
+        intConcurrency: int
+            the number of definitions and offsets uploaded at once, the
+            connection pool size if None
+            default: None
+
+        returns
+        ----------
+        labware: dict
+            self.labware
+
+        pipettes: dict
+            self.pipettes
+        '''
+        dicEntries = {}
+        for dicEntry in dicLayout.get('labware', []):
+            dicEntry = dict(dicEntry)
+            if 'definitionFile' in dicEntry:
+                strHash_temp, dicEntry['definition'] = self.labwareCache.load(dicEntry['definitionFile'])
+            if 'definition' in dicEntry:
+                dicEntry['loadName'] = dicEntry['definition']['parameters']['loadName']
+                dicEntry['namespace'] = dicEntry['definition']['namespace']
+                dicEntry['version'] = dicEntry['definition']['version']
+            strIdentifier = f"{dicEntry['loadName']}_{dicEntry['slot']}"
+            if strIdentifier in dicEntries or strIdentifier in self.labware:
+                raise Exception(f"Labware {strIdentifier} is placed twice.")
+            dicEntry['definitionUri'] = f"{dicEntry.get('namespace', 'opentrons')}/{dicEntry['loadName']}/{dicEntry.get('version', 1)}"
+            dicEntries[strIdentifier] = dicEntry
+
+        # stacking order: every labware after the labware it sits on
+        lstOrder = []
+        dicState = {}
+        def visit(strIdentifier, lstPath):
+            if dicState.get(strIdentifier) == "done":
+                return
+            if strIdentifier in lstPath:
+                raise Exception(f"Labware stacking cycle: {' -> '.join(lstPath + [strIdentifier])}")
+            strParent = dicEntries[strIdentifier].get('on')
+            if strParent is not None:
+                if strParent in dicEntries:
+                    visit(strParent, lstPath + [strIdentifier])
+                elif strParent not in self.labware:
+                    raise Exception(f"Labware {strIdentifier} is stacked on unknown labware {strParent}.")
+            dicState[strIdentifier] = "done"
+            lstOrder.append(strIdentifier)
+        for strIdentifier in dicEntries:
+            visit(strIdentifier, [])
+
+        # LOG - info
+        LOGGER.info(f"Loading deck of {len(dicEntries)} labware and {len(dicLayout.get('pipettes', []))} pipettes")
+
+        # definitions and offsets do not depend on each other and are
+        # uploaded in parallel, before the labware they apply to is loaded
+        dicDefinitions = {}
+        for dicEntry in dicEntries.values():
+            if 'definition' in dicEntry:
+                dicDefinitions.setdefault(self.labwareCache.hash(dicEntry['definition']), dicEntry['definition'])
+
+        lstOffsets = []
+        for strIdentifier, dicEntry in dicEntries.items():
+            if 'offset' not in dicEntry:
+                continue
+            dicLocation = {"slotName": str(dicEntry['slot'])}
+            strParent = dicEntry.get('on')
+            if strParent in dicEntries:
+                dicLocation["definitionUri"] = dicEntries[strParent]['definitionUri']
+            elif strParent is not None:
+                # stacked on labware loaded before this layout
+                if strParent not in self.labware or self.labware[strParent].definitionUri is None:
+                    raise Exception(f"Offset of labware {strIdentifier} refers to labware {strParent} of unknown definition.")
+                dicLocation["definitionUri"] = self.labware[strParent].definitionUri
+            lstOffsets.append({"data": {"definitionUri": dicEntry['definitionUri'],
+                                        "location": dicLocation,
+                                        "vector": {strAxis: str(dicEntry['offset'].get(strAxis, 0)) for strAxis in ("x", "y", "z")}}})
+
+        def uploadOffset(dicCommand):
+            response = self.__sendRequest("POST",
+                                          f"{self.baseURL}/runs/{self.runID}/labware_offsets",
+                                          "labwareOffset",
+                                          strCommand = self.__serialize(dicCommand))
+            if response.status_code != 201:
+                raise Exception(f"Failed to add offsets to labware.\nError code: {response.status_code}\n Error message: {response.text}")
+            self.labwareOffsets.append(json.loads(response.text)['data'])
+
+        lstUploads = ([(self.__uploadLabwareDefinition, dicLabware) for dicLabware in dicDefinitions.values()] +
+                      [(uploadOffset, dicCommand) for dicCommand in lstOffsets])
+        if len(lstUploads) > 1:
+            with ThreadPoolExecutor(max_workers = intConcurrency or self.__intPoolSize) as executor:
+                for future in [executor.submit(funcUpload, item) for funcUpload, item in lstUploads]:
+                    future.result()
+        else:
+            for funcUpload, item in lstUploads:
+                funcUpload(item)
+
+        # IDs are chosen here so stacked labware can refer to the labware
+        # below it without waiting for it to load
+        lstCommands = []
+        for dicPipette in dicLayout.get('pipettes', []):
+            dicPipette = dict(dicPipette, id = str(uuid.uuid4()))
+            command = self.sendCommand({"data": {"commandType": "loadPipette",
+                                                 "params": {"pipetteName": dicPipette['pipetteName'],
+                                                            "mount": dicPipette['mount'],
+                                                            "pipetteId": dicPipette['id']},
+                                                 "intent": "setup"}},
+                                       boolWait = False,
+                                       strOrigin = "loadDeck")
+            lstCommands.append((command, dicPipette))
+
+        dicIDs = {}
+        dicLocations = {}
+        for strIdentifier in lstOrder:
+            dicEntry = dicEntries[strIdentifier]
+            dicIDs[strIdentifier] = str(uuid.uuid4())
+            strParent = dicEntry.get('on')
+            if strParent is None:
+                dicLocation = {"slotName": str(dicEntry['slot'])}
+            else:
+                dicLocation = {"labwareId": dicIDs[strParent] if strParent in dicIDs else self.labware[strParent]['id']}
+            dicLocations[strIdentifier] = dicLocation
+            command = self.sendCommand({"data": {"commandType": "loadLabware",
+                                                 "params": {"location": dicLocation,
+                                                            "loadName": dicEntry['loadName'],
+                                                            "namespace": dicEntry.get('namespace', "opentrons"),
+                                                            "version": str(dicEntry.get('version', 1)),
+                                                            "labwareId": dicIDs[strIdentifier]},
+                                                 "intent": "setup"}},
+                                       boolWait = False,
+                                       strOrigin = "loadDeck")
+            lstCommands.append((command, strIdentifier))
+
+        # the robot runs the commands in order, so once the last one is done
+        # the outcome of all of them is read from one page of summaries
+        if lstCommands:
+            try:
+                lstCommands[-1][0].wait()
+            finally:
+                dicSummaries = {dicSummary['id']: dicSummary
+                                for dicSummary in self.getRunCommands(intCursor = None, intPageLength = len(lstCommands))['data']}
+                for command, item in lstCommands:
+                    if command.id in dicSummaries:
+                        command.status = dicSummaries[command.id]['status']
+                        command.error = dicSummaries[command.id].get('error')
+                self.pendingCommands = [command for command in self.pendingCommands if not command.isComplete]
+
+        for command, item in lstCommands:
+            # raises if the command failed
+            command.wait()
+            if command.commandType == "loadPipette":
+                self.pipettes[item['pipetteName']] = {"id": item['id'], "mount": item['mount']}
+            else:
+                # summaries carry no result, so standard definitions are only
+                # known for the command that was waited on
+                self.__addLoadedLabware(item,
+                                        dicIDs[item],
+                                        dicEntries[item]['loadName'],
+                                        dicEntries[item]['definitionUri'],
+                                        dicEntries[item]['slot'],
+                                        dicLocations[item].get('labwareId'),
+                                        dicEntries[item].get('definition') or (command.result or {}).get('definition'))
+
+        self.__checkpoint()
+
+        # LOG - info
+        LOGGER.info(f"Deck loaded: {list(self.labware)}")
+
+        return self.labware, self.pipettes
+
     def homeRobot(self):
         '''
         homes the robot - this should be done before doing any other movements of the robot per instance but need to implement this***
@@ -359,21 +1743,22 @@ class opentronsClient:
         None
         '''
 
-        strCommand = json.dumps({"target": "robot"})
+        strCommand = self.__serialize({"target": "robot"})
 
         # LOG - info
         LOGGER.info(f"Homing the robot")
         # LOG - debug
         LOGGER.debug(f"Command: {strCommand}")
 
-        response = requests.post(
-            url = f"http://{self.robotIP}:31950/robot/home",
-            headers = self.headers,
-            data = strCommand
-        )
+        response = self.__sendRequest("POST",
+                                      f"{self.baseURL}/robot/home",
+                                      "homeRobot",
+                                      strCommand = strCommand)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
+        # the gantry moved whether or not homing finished
+        self.state.invalidate()
         if response.status_code == 200:
             # LOG - info
             LOGGER.info(f"Robot homed successfully.")
@@ -389,16 +1774,19 @@ class opentronsClient:
                   fltOffsetX: float = 0,
                   fltOffsetY: float = 0,
                   fltOffsetZ: float = 0,
-                  strWellName: str = "A1",
+                  strWellName: str = None,
                   strIntent: str = "setup"
                   ):
         '''
-        picks up a tip from a labware
+        picks up a tip from a labware, the next available one unless a well is
+        given: a single tip, a full column for 8 channel pipettes or a full
+        rack for 96 channel pipettes
 
         arguments
         ----------
         strLabwareName: str
-            the name of the labware from which the tip is to be picked up
+            the name of the labware from which the tip is to be picked up, the
+            first tip rack with tips left if None and no well is given
 
         strPipetteName: str
             the name of the pipette to be used for picking up the tip
@@ -420,8 +1808,9 @@ class opentronsClient:
             default: 0 
 
         strWellName: str
-            the name of the well from which the tip is to be picked up
-            default: "A1"
+            the name of the well from which the tip is to be picked up, the
+            next available tip if None
+            default: None
 
         strIntent: str
             the intent of the command
@@ -429,11 +1818,15 @@ class opentronsClient:
 
         returns
         ----------
-        None
+        command: opentronsCommand
+            the handle of the command, still queued when the client is pipelined
         '''
 
-        # *** WIP ***
-        # build in some check to see if the tip is already picked up
+        intChannels = pipetteChannels(strPipetteName)
+        if strWellName is None:
+            strLabwareName, strWellName = self.tips.nextTip(strLabwareName, intChannels)
+        elif strLabwareName is None:
+            raise Exception(f"Cannot pick up a tip from well {strWellName} without a tip rack, pass strLabwareName or leave strWellName None.")
 
         dicCommand = {
             "data": {
@@ -453,19 +1846,14 @@ class opentronsClient:
             }
         }
 
-        jsonCommand = json.dumps(dicCommand)
+        jsonCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Picking up tip from labware: {strLabwareName}")
         # LOG - debug
         LOGGER.debug(f"Command: {jsonCommand}")
 
-        jsonResponse = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = jsonCommand
-        )
+        command, jsonResponse = self.__postCommand(jsonCommand, "pickUpTip")
 
         # LOG - debug
         LOGGER.debug(f"Response: {jsonResponse.text}")
@@ -479,8 +1867,12 @@ class opentronsClient:
                 # raise exception
                 raise Exception(f"Failed to pick up tip.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
+                self.tips.pickedUp(strPipetteName, strLabwareName, strWellName, intChannels,
+                                   boolConfirmed = command is not None and command.status == "succeeded")
+                self.__checkpoint()
                 # LOG - info
                 LOGGER.info(f"Tip picked up from labware: {strLabwareName}, well: {strWellName}")
+                return command
         else:
             raise Exception(f"Failed to pick up tip.\nError code: {jsonResponse.status_code}\n Error message: {jsonResponse.text}")
         
@@ -517,19 +1909,14 @@ class opentronsClient:
             }
         }
 
-        jsonCommand = json.dumps(dicCommand)
+        jsonCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Picking up tip from labware: {strLabwareName}")
         # LOG - debug
         LOGGER.debug(f"Command: {jsonCommand}")
 
-        jsonResponse = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = jsonCommand
-        )
+        command, jsonResponse = self.__postCommand(jsonCommand, "liquidProbe")
 
         # LOG - debug
         LOGGER.debug(f"Response: {jsonResponse.text}")
@@ -539,12 +1926,13 @@ class opentronsClient:
             dicResponse = json.loads(jsonResponse.text)
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to pick up tip.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to pick up tip.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to pick up tip.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to pick up tip.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 # LOG - info
                 LOGGER.info(f"Tip picked up from labware: {strLabwareName}, well: {strWellName}")
+                return command
         else:
             raise Exception(f"Failed to pick up tip.\nError code: {jsonResponse.status_code}\n Error message: {jsonResponse.text}")
 
@@ -570,7 +1958,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Disposing of held tip: {strPipetteName}")
@@ -578,12 +1966,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "dropTip")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -591,6 +1974,7 @@ class opentronsClient:
         if response.status_code == 201:
             # LOG - info
             LOGGER.info(f"Tip dropped into disposal: {strPipetteName}")
+            return command
         else:
             raise Exception(f"Failed to drop tip.\nError code: {response.status_code}\n Error message: {response.text}")
 
@@ -620,8 +2004,12 @@ class opentronsClient:
             }
         }
 
+        if self.state.isRedundant(dicCommand['data']):
+            self.state.countElided("moveToAddressableArea")
+            return None
+
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Disposing of held tip: {strPipetteName}")
@@ -629,12 +2017,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "moveToLabware")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -642,6 +2025,7 @@ class opentronsClient:
         if response.status_code == 201:
             # LOG - info
             LOGGER.info(f"Tip dropped into disposal: {strPipetteName}")
+            return command
         else:
             raise Exception(f"Failed to drop tip.\nError code: {response.status_code}\n Error message: {response.text}")
 
@@ -663,7 +2047,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Dropping tip in place: {strPipetteName}")
@@ -671,12 +2055,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "dropTip")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -684,6 +2063,7 @@ class opentronsClient:
         if response.status_code == 201:
             # LOG - info
             LOGGER.info(f"Tip dropped at current location")
+            return command
         else:
             raise Exception(f"Failed to drop tip in place.\nError code: {response.status_code}\n Error message: {response.text}")
 
@@ -751,13 +2131,13 @@ class opentronsClient:
             default: "setup"
         '''
 
-        # *** BUILD IN CHECK TO SEE IF THERE IS A TIP TO DROP ***
-
         # If tip is to be dropped into trash
         if boolDropInDisposal:
             self.__moveTipToDisposal(strPipetteName=strPipetteName, intSpeed=intSpeed, strIntent=strIntent)
-            self.__dropTipInPlace(strPipetteName=strPipetteName, strIntent=strIntent, boolHomeAfter=boolHomeAfter)
-            return
+            command = self.__dropTipInPlace(strPipetteName=strPipetteName, strIntent=strIntent, boolHomeAfter=boolHomeAfter)
+            self.tips.dropped(strPipetteName, boolConfirmed = command is not None and command.status == "succeeded")
+            self.__checkpoint()
+            return command
 
         # Drop the tip in a labware well
         # make command dictionary
@@ -782,7 +2162,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Dropping tip into labware: {strLabwareName}")
@@ -790,12 +2170,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "dropTip")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -805,12 +2180,15 @@ class opentronsClient:
             dicResponse = json.loads(response.text)
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to drop tip.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to drop tip.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to drop tip.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to drop tip.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
+                self.tips.dropped(strPipetteName, boolConfirmed = command is not None and command.status == "succeeded")
+                self.__checkpoint()
                 # LOG - info
                 LOGGER.info(f"Tip dropped into labware: {strLabwareName}, well: {strWellName}")
+                return command
         else:
             raise Exception(f"Failed to drop tip.\nError code: {response.status_code}\n Error message: {response.text}")
 
@@ -871,7 +2249,8 @@ class opentronsClient:
 
         returns
         ----------
-        None
+        command: opentronsCommand
+            the handle of the command, still queued when the client is pipelined
         '''
 
         # make command dictionary
@@ -896,7 +2275,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Aspirating from labware: {strLabwareName}, well: {strWellName}")
@@ -904,12 +2283,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "aspirate")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -919,12 +2293,13 @@ class opentronsClient:
             dicResponse = json.loads(response.text)
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to aspirate.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to aspirate.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to aspirate.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to aspirate.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 # LOG - info
                 LOGGER.info(f"Aspiration successful.")
+                return command
         else:
             raise Exception(
                 f"Failed to aspirate.\nError code: {response.status_code}\n Error message: {response.text}"
@@ -987,7 +2362,8 @@ class opentronsClient:
 
         returns
         ----------
-        None
+        command: opentronsCommand
+            the handle of the command, still queued when the client is pipelined
         '''
 
         # make command dictionary
@@ -1012,7 +2388,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Dispensing into labware: {strLabwareName}, well: {strWellName}")
@@ -1020,12 +2396,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "dispense")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1035,12 +2406,13 @@ class opentronsClient:
             dicResponse = json.loads(response.text)
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to dispense.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to dispense.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to dispense.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to dispense.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 # LOG - info
                 LOGGER.info("Dispense successful.")
+                return command
         else:
             raise Exception(f"Failed to dispense.\nError code: {response.status_code}\n Error message: {response.text}")
         
@@ -1053,7 +2425,7 @@ class opentronsClient:
                 fltOffsetX: float = 0,
                 fltOffsetY: float = 0,
                 fltOffsetZ: float = 0
-                ) -> None:
+                ) -> "opentronsCommand":
         '''
         blows out liquid from a pipette
 
@@ -1091,7 +2463,8 @@ class opentronsClient:
 
         returns
         ----------
-        None
+        command: opentronsCommand
+            the handle of the command, still queued when the client is pipelined
         '''
 
         # make command dictionary
@@ -1115,7 +2488,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Blowing out from labware: {strLabwareName}, well: {strWellName}")
@@ -1123,12 +2496,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "blowout")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1139,12 +2507,13 @@ class opentronsClient:
             # if the response failed
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to blowout.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to blowout.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to blowout.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to blowout.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 # LOG - info
                 LOGGER.info("Blowout successful.")
+                return command
         else:
             raise Exception(f"Failed to blowout.\nError code: {response.status_code}\n Error message: {response.text}")
 
@@ -1195,7 +2564,9 @@ class opentronsClient:
 
         returns
         ----------
-        None
+        command: opentronsCommand
+            the handle of the command, still queued when the client is
+            pipelined, None when the pipette already was at the location
         '''
 
         # make command dictionary
@@ -1218,8 +2589,12 @@ class opentronsClient:
             }
         }
 
+        if self.state.isRedundant(dicCommand['data']):
+            self.state.countElided("moveToWell")
+            return None
+
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Moving pipette to labware: {strLabwareName}, well: {strWellName}")
@@ -1227,12 +2602,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "moveToWell")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1243,28 +2613,195 @@ class opentronsClient:
             # if the response failed
             if dicResponse['data']['status'] == "failed":
                 # log the error
-                LOGGER.error(f"Failed to move pipette.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to move pipette.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to move pipette.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to move pipette.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
                 # LOG - info
                 LOGGER.info("Move successful.")
+                return command
         else:
             raise Exception(
                 f"Failed to move pipette.\nError code: {response.status_code}\n Error message: {response.text}"
             )
 
 
-    def moveLabware(self, strMovingLabware:str=None, strDestinationLabware:str=None, strIntent:str="setup"):
+    def wellCoordinate(self,
+                       strLabwareName: str,
+                       strWellName: str) -> tuple:
+        '''
+        the approximate (x, y) of a well on the deck in mm, from the slot of
+        the labware and the well's position in its definition, or a 9 mm grid
+        when the robot did not return the definition
+
+        arguments
+        ----------
+        strLabwareName: str
+            the name of the labware
+
+        strWellName: str
+            the name of the well
+
+        returns
+        ----------
+        tupleCoordinate: tuple
+            (x, y) of the well
+        '''
+        record = self.labware[strLabwareName]
+        dicCoordinates = self.wellCoordinates.get(record.definitionUri)
+        if dicCoordinates is not None and strWellName in dicCoordinates:
+            fltX, fltY = dicCoordinates[strWellName]
+        else:
+            fltX, fltY = gridCoordinate(strWellName, gridPitch(record.loadName or ""))
+        fltSlotX, fltSlotY = slotOrigin(record.slot)
+        return fltSlotX + fltX, fltSlotY + fltY
+
+    def orderWellVisits(self,
+                        lstVisits: list,
+                        fltTimeBudget: float = 0.1,
+                        tupleStart: tuple = None) -> list:
+        '''
+        reorders independent well operations to shorten the gantry's path
+        through them
+
+        arguments
+        ----------
+        lstVisits: list
+            the operations, each a tuple or list starting with the labware
+            name and the well name, e.g. (strLabwareName, strWellName, intVolume)
+
+        fltTimeBudget: float
+            the time the ordering may take in seconds
+            default: 0.1
+
+        tupleStart: tuple
+            (labware name, well name) the pipette starts from, anywhere if
+            None
+            default: None
+
+        returns
+        ----------
+        lstOrdered: list
+            the operations in the order to run them
+        '''
+        lstPoints = [self.wellCoordinate(visit[0], visit[1]) for visit in lstVisits]
+        lstOrder = optimizeVisitOrder(lstPoints,
+                                      fltTimeBudget = fltTimeBudget,
+                                      tupleStart = None if tupleStart is None else self.wellCoordinate(*tupleStart))
+        return [lstVisits[intIndex] for intIndex in lstOrder]
+
+    def planTransfer(self,
+                     lstSources: list,
+                     lstDestinations: list,
+                     volumes: Union[float, list],
+                     strPipetteName: str,
+                     strTipRack: str,
+                     strTipPolicy: Literal["once", "perSource", "always"] = "perSource",
+                     **dicOptions) -> transferPlan:
+        '''
+        plans a transfer without sending anything, taking tips the client has
+        not used yet from the tip rack, full columns for multichannel
+        pipettes, unless lstTipWells is given. planning does not take the
+        tips: client.tips records them as the plan's pickUpTip calls run, so
+        a plan that is only previewed leaves the rack as it was, and plans
+        made before one of them runs are given the same tips
+
+        arguments
+        ----------
+        see transfer
+
+        returns
+        ----------
+        plan: transferPlan
+            the planned calls, with their command count and estimated time
+        '''
+        dicOptions.setdefault('funcPosition', self.wellCoordinate)
+        if 'lstTipWells' in dicOptions:
+            return planTransfer(lstSources, lstDestinations, volumes, strPipetteName, strTipRack, strTipPolicy, **dicOptions)
+
+        return planTransfer(lstSources, lstDestinations, volumes, strPipetteName, strTipRack, strTipPolicy,
+                            lstTipWells = self.tips.allocationOrder(strTipRack, pipetteChannels(strPipetteName)),
+                            **dicOptions)
+
+    def transfer(self,
+                 lstSources: list,
+                 lstDestinations: list,
+                 volumes: Union[float, list],
+                 strPipetteName: str,
+                 strTipRack: str,
+                 strTipPolicy: Literal["once", "perSource", "always"] = "perSource",
+                 boolExecute: bool = True,
+                 **dicOptions) -> transferPlan:
+        '''
+        moves liquid from sources to destinations: transfers from the same
+        source share an aspirate while the pipette holds them, tips are reused
+        as strTipPolicy allows and destinations are visited column by column
+
+        the planned command count and estimated time are logged before
+        anything is sent
+
+        arguments
+        ----------
+        lstSources: list
+            (labware name, well name) to aspirate from, one per transfer, or
+            a single one for all of them
+
+        lstDestinations: list
+            (labware name, well name) to dispense into, one per transfer
+
+        volumes: float or list
+            the volume of each transfer in uL, or one volume for all of them
+
+        strPipetteName: str
+            the name of the pipette
+
+        strTipRack: str
+            the name of the tip rack labware
+
+        strTipPolicy: str
+            when a new tip is used: "once" for the whole transfer,
+            "perSource" when the source changes, "always" for every aspirate
+            default: "perSource"
+
+        boolExecute: bool
+            whether to run the plan, otherwise it is only returned
+            default: True
+
+        **dicOptions:
+            fltMaxVolume, fltDisposalVolume, boolMultiDispense, boolReorder,
+            lstTipWells, fltFlowRate, dicCommandSeconds, funcPosition and
+            fltTimeBudget, see planTransfer
+
+        returns
+        ----------
+        plan: transferPlan
+            the plan, with the command handles in plan.results once executed
+        '''
+        plan = self.planTransfer(lstSources, lstDestinations, volumes, strPipetteName, strTipRack, strTipPolicy, **dicOptions)
+
+        # LOG - info
+        LOGGER.info(f"Planned transfer: {plan.commandCount} commands, {plan.tips} tips, ~{plan.estimatedSeconds:.0f} s")
+
+        if boolExecute:
+            plan.results = plan.execute(self)
+        return plan
+
+    def moveLabware(self, strMovingLabware:str=None, strDestinationLabware:str=None, strIntent:str="setup", strDestinationSlot:str=None):
+        # onto labware, or onto a slot when no destination labware is given
+        if strDestinationLabware is None and strDestinationSlot is None:
+            raise Exception(f"Cannot move labware {strMovingLabware} without strDestinationLabware or strDestinationSlot.")
+        if strDestinationLabware is not None:
+            dicNewLocation = {"labwareId": self.labware[strDestinationLabware]['id']}
+        else:
+            dicNewLocation = {"slotName": str(strDestinationSlot)}
+
         # make command dictionary
         dicCommand = {
             "data": {
                 "commandType": "moveLabware",
                 "params": {
                     "labwareId": self.labware[strMovingLabware]['id'],
-                    "newLocation": {
-                        "labwareId":self.labware[strDestinationLabware]['id']
-                    },
+                    "newLocation": dicNewLocation,
                     "strategy":"usingGripper",
                     "dropOffset":{
                         "x":0,
@@ -1277,7 +2814,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         #! LOGGER.info(f"Openning the gripper")
@@ -1285,25 +2822,41 @@ class opentronsClient:
         #! LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "moveLabware")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
 
         if response.status_code == 201:
+            dicResponse = json.loads(response.text)
+            if dicResponse['data']['status'] == "failed":
+                # log the error
+                LOGGER.error(f"Failed to move labware.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
+                # raise exception
+                raise Exception(f"Failed to move labware.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
+            # the deck model follows the move once the robot accepted it
+            self.labware.move(strMovingLabware,
+                              slot = strDestinationSlot,
+                              strParentID = dicNewLocation.get('labwareId'))
+            self.__checkpoint()
             # LOG - info
             LOGGER.info(f"Moved labware successfully.")
+            return command
         else:
             raise Exception(
                 f"Failed to mve labware.\nError code: {response.status_code}\n Error message: {response.text}"
             )
 
-    def pipetteHasTip(self, strPipetteName, strIntent: str = "setup"):
+    def pipetteHasTip(self, strPipetteName, strIntent: str = "setup", boolVerify: bool = False):
+        # answered locally once a pick up, drop or check was seen for the
+        # pipette, unless the robot is asked to verify
+        boolHasTip = self.tips.hasTip(strPipetteName)
+        if boolHasTip is not None and not boolVerify:
+            self.state.countElided("verifyTipPresence")
+            # LOG - info
+            LOGGER.info(f"{'A' if boolHasTip else 'No'} tip is present on {strPipetteName} (tracked).")
+            return boolHasTip
+
         # make command dictionary
         dicCommand = {
             "data": {
@@ -1316,7 +2869,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Checking for tip on pipette {strPipetteName}")
@@ -1324,12 +2877,7 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "pipetteHasTip", boolWait = True)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1338,9 +2886,11 @@ class opentronsClient:
             # Check if request succeeded
             if (data:=json.loads(response.text)['data'])["status"] == "succeeded":
                 LOGGER.info(f"No tip is present on {strPipetteName}.")
+                self.tips.setTip(strPipetteName, False)
                 return False
             elif data['error']['errorType'] == 'TipAttachedError':
                 LOGGER.info(f"A tip is present on {strPipetteName}.")
+                self.tips.setTip(strPipetteName, True)
                 return True
         else:
             raise Exception(
@@ -1365,10 +2915,10 @@ class opentronsClient:
             dicCommand['data']['params'].update({'force':fltGripForce})
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
-        LOGGER.info(f"Closing the gripper{f" with {fltGripForce}N of force" if fltGripForce else ""}")
+        LOGGER.info(f"Closing the gripper{f' with {fltGripForce}N of force' if fltGripForce else ''}")
         # LOG - debug
         LOGGER.debug(f"Command: {strCommand}")
 
@@ -1390,12 +2940,7 @@ class opentronsClient:
         
         # response = requests.post(url, headers=HEADERS, data=json.dumps(payload))
 
-        response = requests.post(
-            url = self.commandURL,#self.commandURL,
-            headers = self.headers,
-            params = {"waitUntilComplete": True},
-            data = strCommand
-        )
+        command, response = self.__postCommand(strCommand, "closeGripper")
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1403,11 +2948,24 @@ class opentronsClient:
         if response.status_code == 201:
             # LOG - info
             LOGGER.info(f"Closed grip successfully.")
+            return command
         else:
             raise Exception(
                 f"Failed to close gripper.\nError code: {response.status_code}\n Error message: {response.text}"
             )
 
+    def __offsetLocation(self,
+                         strLabwareName: str) -> dict:
+        '''
+        the location of a loaded labware as labware offsets refer to it: its
+        slot and, when stacked, the definition of the labware below it
+        '''
+        dicLocation = {"slotName": str(self.labware[strLabwareName].slot)}
+        parent = self.labware.parent(strLabwareName)
+        if parent is not None:
+            dicLocation["definitionUri"] = parent.definitionUri
+        return dicLocation
+
     def addLabwareOffsets(self,
                           strLabwareName : str,
                           fltXOffset: float,
@@ -1436,46 +2994,21 @@ class opentronsClient:
         None
         '''
 
-        # from the self.labware dictionary, get the labware ID
-        strLabwareID = self.labware[strLabwareName]["id"]
-
-        print(strLabwareID)
-
-        dicRunInfo = self.getRunInfo()
-        print(dicRunInfo)
-
-        # find the list of labware from the run info
-        lstLabware = dicRunInfo['data']['labware']
-
-        strDefinitionUri = None
-
-        # for every dictionary in the list of labware
-        for dicLabware_temp in lstLabware:
-            # if the labware ID matches the labware ID of the labware we are looking for
-            if dicLabware_temp['id'] == strLabwareID:
-                # get the definitionUri
-                strDefinitionUri = dicLabware_temp['definitionUri']
-                # get the slot
-                strSlot = dicLabware_temp['location']['slotName']
-    
-        print(strDefinitionUri)
-
-        # if the definitionUri is not found
-        if strDefinitionUri == None:
-            raise Exception(f"Labware not found in run information.")
+        # the definition and slot were recorded when the labware was loaded
+        dicLabware = self.labware[strLabwareName]
 
         # make the command dictionary
         dicCommand = {
             "data": {
-                "definitionUri": strDefinitionUri,
-                "location":{"slotName": strSlot},
+                "definitionUri": dicLabware['definitionUri'],
+                "location": self.__offsetLocation(strLabwareName),
                 "vector": {"x": str(fltXOffset),
                            "y": str(fltYOffset),
                            "z": str(fltZOffset)}
             }
         }
 
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Adding offsets to labware: {strLabwareName}")
@@ -1483,11 +3016,10 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = f"http://{self.robotIP}:31950/runs/{self.runID}/labware_offsets",
-            headers = self.headers,
-            data = strCommand
-        )
+        response = self.__sendRequest("POST",
+                                      f"{self.baseURL}/runs/{self.runID}/labware_offsets",
+                                      "labwareOffset",
+                                      strCommand = strCommand)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1496,17 +3028,117 @@ class opentronsClient:
             # convert response to dictionary
             dicResponse = json.loads(response.text)
             # if the response failed
-            if dicResponse['data']['status'] == "failed":
+            if dicResponse['data'].get('status') == "failed":
                 # log the error
-                LOGGER.error(f"Failed to add offsets to labware.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                LOGGER.error(f"Failed to add offsets to labware.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
                 # raise exception
-                raise Exception(f"Failed to add offsets to labware.\nResponse error code: {dicResponse.error.errorCode}\n Error type: {dicResponse.error.errorType}\n Error message: {dicResponse.error.detail}")
+                raise Exception(f"Failed to add offsets to labware.\nResponse error code: {dicResponse['data']['error']['errorCode']}\n Error type: {dicResponse['data']['error']['errorType']}\n Error message: {dicResponse['data']['error']['detail']}")
             else:
+                self.labwareOffsets.append(dicResponse['data'])
+                self.__checkpoint()
                 # LOG - info
                 LOGGER.info(f"Offsets added to labware: {strLabwareName}")
         else:
             raise Exception(f"Failed to add offsets to labware.\nError code: {response.status_code}\n Error message: {response.text}")
 
+    def applyLabwareOffsets(self,
+                            dicOffsets: dict,
+                            intConcurrency: int = None):
+        '''
+        adds offsets to many labware at once, uploading them in parallel
+
+        arguments
+        ----------
+        dicOffsets: dict
+            labware name -> {"x": ..., "y": ..., "z": ...}, missing axes are 0
+
+        intConcurrency: int
+            the number of offsets uploaded at once, the connection pool size
+            if None
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        def addOffset(strLabwareName):
+            dicVector = dicOffsets[strLabwareName]
+            self.addLabwareOffsets(strLabwareName,
+                                   dicVector.get('x', 0),
+                                   dicVector.get('y', 0),
+                                   dicVector.get('z', 0))
+
+        if len(dicOffsets) > 1:
+            with ThreadPoolExecutor(max_workers = intConcurrency or self.__intPoolSize) as executor:
+                for future in [executor.submit(addOffset, strLabwareName) for strLabwareName in dicOffsets]:
+                    future.result()
+        else:
+            for strLabwareName in dicOffsets:
+                addOffset(strLabwareName)
+
+    def loadLabwareOffsetsFromFile(self,
+                                   strFilePath: str,
+                                   intConcurrency: int = None) -> dict:
+        '''
+        applies the offsets of a calibration file to every loaded labware
+        they match, see saveLabwareOffsets
+
+        arguments
+        ----------
+        strFilePath: str
+            the calibration file, {definitionUri: {slot: {"x": ..., "y": ...,
+            "z": ...}}}
+
+        intConcurrency: int
+            the number of offsets uploaded at once, the connection pool size
+            if None
+            default: None
+
+        returns
+        ----------
+        dicOffsets: dict
+            labware name -> offset applied
+        '''
+        with open(strFilePath, "r") as file:
+            dicCalibration = json.load(file)
+
+        dicOffsets = {}
+        for strLabwareName, dicLabware in self.labware.items():
+            dicVector = dicCalibration.get(dicLabware['definitionUri'], {}).get(str(dicLabware['slot']))
+            if dicVector is not None:
+                dicOffsets[strLabwareName] = dicVector
+
+        # LOG - info
+        LOGGER.info(f"Applying calibration from {strFilePath} to labware: {list(dicOffsets)}")
+
+        self.applyLabwareOffsets(dicOffsets, intConcurrency = intConcurrency)
+        return dicOffsets
+
+    def saveLabwareOffsets(self,
+                           strFilePath: str):
+        '''
+        writes the offsets added to the run to a calibration file keyed by
+        definitionUri and slot, that loadLabwareOffsetsFromFile applies to
+        later runs
+
+        arguments
+        ----------
+        strFilePath: str
+            the calibration file
+
+        returns
+        ----------
+        None
+        '''
+        dicCalibration = {}
+        for dicOffset in self.labwareOffsets:
+            dicCalibration.setdefault(dicOffset['definitionUri'], {})[dicOffset['location']['slotName']] = {
+                strAxis: float(fltValue) for strAxis, fltValue in dicOffset['vector'].items()
+            }
+
+        with open(strFilePath, "w") as file:
+            json.dump(dicCalibration, file, indent = 2)
+
     def lights(self,
                strState: str = 'true'
                )-> None:
@@ -1541,7 +3173,7 @@ class opentronsClient:
         }
 
         # dump to string
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
 
         # LOG - info
@@ -1550,11 +3182,10 @@ class opentronsClient:
         LOGGER.debug(f"Command: {strCommand}")
 
         # make request
-        response = requests.post(
-            url = f"http://{self.robotIP}:31950/robot/lights",
-            headers = self.headers,
-            data = strCommand
-        )
+        response = self.__sendControl("POST",
+                                      f"{self.baseURL}/robot/lights",
+                                      "lights",
+                                      strCommand)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1571,7 +3202,10 @@ class opentronsClient:
     def controlAction(self,
                       strAction: str):
         '''
-        performs a control action
+        performs a control action over the control connection, so it reaches
+        the robot right away even while commands are outstanding; it is safe
+        to call from another thread, e.g. a runMonitor callback, while the
+        thread issuing commands is blocked waiting for one
 
         arguments
         ----------
@@ -1596,18 +3230,17 @@ class opentronsClient:
                 "actionType": strAction,
         }}
 
-        strCommand = json.dumps(dicCommand)
+        strCommand = self.__serialize(dicCommand)
 
         # LOG - info
         LOGGER.info(f"Performing action: {strAction}")
         # LOG - debug
         LOGGER.debug(f"Command: {strCommand}")
 
-        response = requests.post(
-            url = f"http://{self.robotIP}:31950/runs/{self.runID}/actions",
-            headers = self.headers,
-            data = strCommand
-        )
+        response = self.__sendControl("POST",
+                                      f"{self.baseURL}/runs/{self.runID}/actions",
+                                      "controlAction",
+                                      strCommand)
 
         # LOG - debug
         LOGGER.debug(f"Response: {response.text}")
@@ -1618,3 +3251,58 @@ class opentronsClient:
         else:
             raise Exception(f"Failed to perform action.\nError code: {response.status_code}\n Error message: {response.text}")
         
+
+    def __sendControl(self,
+                      strMethod: str,
+                      strURL: str,
+                      strRequestKind: str,
+                      strCommand: str):
+        '''
+        sends a request over the control connection, raising TimeoutError if
+        the robot does not answer within the control timeout
+        '''
+        try:
+            with self.__controlLock:
+                return self.__sendRequest(strMethod,
+                                          strURL,
+                                          strRequestKind,
+                                          strCommand = strCommand,
+                                          strCommandType = strRequestKind,
+                                          session = self.controlSession,
+                                          fltTimeout = self.controlTimeout)
+        except requests.Timeout:
+            raise TimeoutError(f"The robot did not answer {strRequestKind} within {self.controlTimeout} s.")
+
+    def warmControlChannel(self):
+        '''
+        opens the control connection ahead of the first control action, so
+        that a stop does not wait for a new connection to the robot
+        '''
+        with self.__controlLock:
+            self.controlSession.get(url = f"{self.baseURL}/health", headers = self.headers,
+                                    timeout = self.controlTimeout)
+
+    @contextmanager
+    def stopOnInterrupt(self):
+        '''
+        context manager that stops the run when the script is interrupted
+        (Ctrl+C), even while it is blocked waiting for a command; the stop is
+        sent over the control connection from a separate thread and the
+        KeyboardInterrupt is raised as usual
+
+        usage
+        ----------
+        with client.stopOnInterrupt():
+            client.aspirate(...)
+        '''
+        def handler(intSignal, frame):
+            # LOG - warning
+            LOGGER.warning(f"Interrupted, stopping run: {self.runID}")
+            threading.Thread(target = self.controlAction, args = ("stop",)).start()
+            raise KeyboardInterrupt
+
+        funcHandler_temp = signal.signal(signal.SIGINT, handler)
+        try:
+            yield self
+        finally:
+            signal.signal(signal.SIGINT, funcHandler_temp)
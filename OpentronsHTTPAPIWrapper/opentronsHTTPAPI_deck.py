@@ -0,0 +1,320 @@
+import sys
+from collections.abc import MutableMapping
+
+class labwareRecord:
+    '''
+    a labware loaded into a run
+
+    records are kept small for sessions with hundreds of labware: they hold
+    no definitions, and definition URIs and load names are interned so that
+    labware of the same type share them. record["id"], record["slot"],
+    record["definitionUri"] and record["location"] read like the dicts
+    opentronsClient.labware used to hold
+    '''
+
+    __slots__ = ("name", "id", "loadName", "definitionUri", "slot", "parentID")
+
+    def __init__(self, name, id, loadName, definitionUri, slot, parentID):
+        self.name = name
+        self.id = id
+        self.loadName = sys.intern(loadName) if loadName is not None else None
+        self.definitionUri = sys.intern(definitionUri) if definitionUri is not None else None
+        # the slot of the stack the labware is in, None when off deck
+        self.slot = slot
+        # the labware it sits on, None when on a slot
+        self.parentID = parentID
+
+    @property
+    def location(self) -> dict:
+        '''
+        the location as the robot reports it
+        '''
+        if self.parentID is not None:
+            return {"labwareId": self.parentID}
+        if self.slot is not None:
+            return {"slotName": str(self.slot)}
+        return {}
+
+    def __getitem__(self, strKey):
+        if strKey not in ("id", "slot", "definitionUri", "location", "loadName"):
+            raise KeyError(strKey)
+        return getattr(self, strKey)
+
+    def get(self, strKey, default = None):
+        try:
+            return self[strKey]
+        except KeyError:
+            return default
+
+    def toDict(self) -> dict:
+        return {"id": self.id,
+                "loadName": self.loadName,
+                "definitionUri": self.definitionUri,
+                "slot": self.slot,
+                "location": self.location}
+
+    def __repr__(self):
+        return f"labwareRecord(name={self.name}, id={self.id}, slot={self.slot}, parentID={self.parentID})"
+
+class deckModel(MutableMapping):
+    '''
+    the labware of a run, indexed by name, labware ID, slot, load name and
+    the labware each one sits on
+
+    a mutable mapping of name -> labwareRecord, so client.labware[strName]["id"]
+    keeps working and client.labware[strName] = {"id": ..., "slot": ...}
+    records labware, and answers questions about the deck without asking the
+    robot. it is not a dict: json.dumps(client.labware.toDict()) serializes
+    it
+
+    usage
+    ----------
+    client.labware.byID(strLabwareID)
+    client.labware.onSlot(1)           # the stack in slot 1, bottom first
+    client.labware.byLoadName("corning_96_wellplate_360ul_flat")
+    client.labware.children("adapter_1")
+    '''
+
+    def __init__(self):
+        self.__byName = {}
+        self.__byID = {}
+        # str(slot) -> IDs of the labware in the slot's stack
+        self.__bySlot = {}
+        # load name -> IDs
+        self.__byLoadName = {}
+        # labware ID -> IDs of the labware sitting on it
+        self.__children = {}
+
+    # *** mapping of name -> record ***
+
+    def __getitem__(self, strName) -> labwareRecord:
+        return self.__byName[strName]
+
+    def __contains__(self, strName) -> bool:
+        return strName in self.__byName
+
+    def __iter__(self):
+        return iter(self.__byName)
+
+    def __len__(self) -> int:
+        return len(self.__byName)
+
+    def __setitem__(self, strName, record):
+        # a record or a dict like the ones opentronsClient.labware used to hold
+        dicLocation = record.get('location') or {}
+        self.add(strName,
+                 record['id'],
+                 record.get('loadName'),
+                 record.get('definitionUri'),
+                 slot = record.get('slot', dicLocation.get('slotName')),
+                 strParentID = record.parentID if isinstance(record, labwareRecord) else dicLocation.get('labwareId'))
+
+    def __delitem__(self, strName):
+        self.remove(strName)
+
+    def keys(self):
+        return self.__byName.keys()
+
+    def values(self):
+        return self.__byName.values()
+
+    def items(self):
+        return self.__byName.items()
+
+    def get(self, strName, default = None):
+        return self.__byName.get(strName, default)
+
+    def __repr__(self):
+        return f"deckModel({list(self.__byName)})"
+
+    # *** changes ***
+
+    def add(self,
+            strName: str,
+            strLabwareID: str,
+            strLoadName: str,
+            strDefinitionUri: str,
+            slot = None,
+            strParentID: str = None) -> labwareRecord:
+        '''
+        records a loaded labware, replacing a labware of the same name
+
+        arguments
+        ----------
+        strName: str
+            the name the client refers to the labware by
+
+        strLabwareID: str
+            the ID of the labware in the run
+
+        strLoadName: str
+            the load name of the labware
+
+        strDefinitionUri: str
+            the URI of the labware's definition
+
+        slot: str or int
+            the slot the labware is in, taken from the labware below it
+            when stacked
+            default: None
+
+        strParentID: str
+            the ID of the labware it sits on
+            default: None
+
+        returns
+        ----------
+        record: labwareRecord
+            the record
+        '''
+        if strName in self.__byName:
+            self.remove(strName)
+        if strParentID is not None and strParentID in self.__byID:
+            slot = self.__byID[strParentID].slot
+
+        record = labwareRecord(strName, strLabwareID, strLoadName, strDefinitionUri, slot, strParentID)
+        self.__byName[strName] = record
+        self.__byID[strLabwareID] = record
+        self.__byLoadName.setdefault(record.loadName, []).append(strLabwareID)
+        self.__place(record)
+        return record
+
+    def remove(self,
+               strName: str) -> labwareRecord:
+        '''
+        forgets a labware, the labware on it keep their places
+        '''
+        record = self.__byName.pop(strName)
+        self.__unplace(record)
+        if self.__byID.get(record.id) is record:
+            del self.__byID[record.id]
+        self.__byLoadName[record.loadName].remove(record.id)
+        if not self.__byLoadName[record.loadName]:
+            del self.__byLoadName[record.loadName]
+        return record
+
+    def rename(self,
+               strName: str,
+               strNewName: str):
+        '''
+        changes the name a labware is referred to by
+        '''
+        record = self.__byName.pop(strName)
+        record.name = strNewName
+        self.__byName[strNewName] = record
+
+    def move(self,
+             strName: str,
+             slot = None,
+             strParentID: str = None):
+        '''
+        moves a labware, and the labware stacked on it, onto a slot or onto
+        another labware
+
+        arguments
+        ----------
+        strName: str
+            the name of the labware
+
+        slot: str or int
+            the new slot, None when moved onto labware or off deck
+            default: None
+
+        strParentID: str
+            the ID of the labware it is moved onto
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        record = self.__byName[strName]
+        self.__unplace(record)
+        record.parentID = strParentID
+        record.slot = self.__byID[strParentID].slot if strParentID in self.__byID else slot
+        self.__place(record)
+
+        # the labware stacked on it moves along
+        lstStack = list(self.__children.get(record.id, []))
+        while lstStack:
+            child = self.__byID[lstStack.pop()]
+            self.__removeFromSlot(child)
+            child.slot = record.slot
+            self.__addToSlot(child)
+            lstStack.extend(self.__children.get(child.id, []))
+
+    def __place(self, record):
+        if record.parentID is not None:
+            self.__children.setdefault(record.parentID, []).append(record.id)
+        self.__addToSlot(record)
+
+    def __unplace(self, record):
+        if record.parentID is not None:
+            lstSiblings = self.__children.get(record.parentID, [])
+            if record.id in lstSiblings:
+                lstSiblings.remove(record.id)
+            if not lstSiblings:
+                self.__children.pop(record.parentID, None)
+        self.__removeFromSlot(record)
+
+    def __addToSlot(self, record):
+        if record.slot is not None:
+            self.__bySlot.setdefault(str(record.slot), []).append(record.id)
+
+    def __removeFromSlot(self, record):
+        if record.slot is None:
+            return
+        lstStack = self.__bySlot[str(record.slot)]
+        lstStack.remove(record.id)
+        if not lstStack:
+            del self.__bySlot[str(record.slot)]
+
+    # *** lookups ***
+
+    def byID(self,
+             strLabwareID: str) -> labwareRecord:
+        '''
+        the labware with an ID, None if it is not loaded
+        '''
+        return self.__byID.get(strLabwareID)
+
+    def onSlot(self,
+               slot) -> list:
+        '''
+        the labware in a slot, bottom of the stack first
+        '''
+        lstRecords = [self.__byID[strLabwareID] for strLabwareID in self.__bySlot.get(str(slot), [])]
+        lstOrdered = []
+        lstStack = [record for record in lstRecords if record.parentID is None or record.parentID not in self.__byID]
+        while lstStack:
+            record = lstStack.pop(0)
+            lstOrdered.append(record)
+            lstStack.extend(self.__byID[strLabwareID] for strLabwareID in self.__children.get(record.id, []))
+        return lstOrdered
+
+    def byLoadName(self,
+                   strLoadName: str) -> list:
+        '''
+        the labware of a load name, in load order
+        '''
+        return [self.__byID[strLabwareID] for strLabwareID in self.__byLoadName.get(strLoadName, [])]
+
+    def parent(self,
+               strName: str) -> labwareRecord:
+        '''
+        the labware a labware sits on, None when it is on a slot
+        '''
+        return self.__byID.get(self.__byName[strName].parentID)
+
+    def children(self,
+                 strName: str) -> list:
+        '''
+        the labware sitting directly on a labware
+        '''
+        return [self.__byID[strLabwareID] for strLabwareID in self.__children.get(self.__byName[strName].id, [])]
+
+    def toDict(self) -> dict:
+        '''
+        name -> record as plain dicts, e.g. for a checkpoint
+        '''
+        return {strName: record.toDict() for strName, record in self.__byName.items()}
@@ -0,0 +1,314 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Literal
+
+from .opentronsHTTPAPI_clientBuilder import opentronsClient
+
+LOGGER = logging.getLogger(__name__)
+
+class fleetResult:
+    '''
+    outcome of a single experiment run by a Fleet
+    '''
+
+    __slots__ = ("robot", "index", "result", "error", "runID", "seconds")
+
+    def __init__(self, robot, index, result, error, runID, seconds):
+        self.robot = robot
+        self.index = index
+        self.result = result
+        self.error = error
+        self.runID = runID
+        self.seconds = seconds
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        strOutcome = "succeeded" if self.succeeded else f"failed: {self.error!r}"
+        return f"fleetResult(robot={self.robot}, index={self.index}, {strOutcome}, seconds={self.seconds:.3f})"
+
+class fleetRobot:
+    '''
+    a robot registered with a Fleet
+    '''
+
+    def __init__(self, strName, strRobotIP, strRobot, intPort):
+        self.name = strName
+        self.robotIP = strRobotIP
+        self.robotType = strRobot
+        self.port = intPort
+        # the client holding a run that is ready for the next experiment
+        self.client = None
+        self.busy = False
+        self.results = []
+        self.errors = []
+
+class Fleet:
+    '''
+    drives experiments on many robots in parallel - every experiment gets a new
+    opentronsClient (and so a new run) on whichever robot is idle next
+
+    usage
+    ----------
+    fleet = Fleet()
+    fleet.addRobot("10.0.0.2")
+    fleet.addRobot("10.0.0.3", strRobot = "flex")
+    fleet.createRuns()
+    lstResults = fleet.dispatch([experiment] * 10)
+    '''
+
+    def __init__(self,
+                 dicHeaders: dict = {"opentrons-version": "*"},
+                 **dicClientOptions):
+        '''
+        initializes an empty fleet
+
+        arguments
+        ----------
+        dicHeaders: dict
+            the headers to be used in the requests to every robot
+
+        dicClientOptions:
+            further keyword arguments passed on to every opentronsClient,
+            e.g. intPoolSize or boolPipelined
+
+        returns
+        ----------
+        None
+        '''
+        self.headers = dicHeaders
+        self.clientOptions = dicClientOptions
+        self.robots = {}
+        self.__lock = threading.Lock()
+
+    def addRobot(self,
+                 strRobotIP: str,
+                 strRobot: Literal["flex","ot2"] = "ot2",
+                 intPort: int = 31950,
+                 strName: str = None) -> str:
+        '''
+        registers a robot with the fleet
+
+        arguments
+        ----------
+        strRobotIP: str
+            the IP address of the robot
+
+        strRobot: str
+            the type of robot, either "flex" or "ot2"
+            default: "ot2"
+
+        intPort: int
+            the port the robot server listens on
+            default: 31950
+
+        strName: str
+            the name the robot is reported under, "<IP>:<port>" if None
+            default: None
+
+        returns
+        ----------
+        strName: str
+            the name of the registered robot
+        '''
+        if strName is None:
+            strName = f"{strRobotIP}:{intPort}"
+        if strName in self.robots:
+            raise Exception(f"Robot {strName} is already registered.")
+
+        self.robots[strName] = fleetRobot(strName, strRobotIP, strRobot, intPort)
+        # LOG - info
+        LOGGER.info(f"Robot {strName} added to fleet")
+        return strName
+
+    def removeRobot(self,
+                    strName: str):
+        '''
+        unregisters an idle robot and closes its connections
+        '''
+        robot = self.robots[strName]
+        if robot.busy:
+            raise Exception(f"Robot {strName} is running an experiment.")
+        if robot.client is not None:
+            robot.client.close()
+        del self.robots[strName]
+
+    def close(self):
+        '''
+        closes the connections to every robot
+        '''
+        for robot in self.robots.values():
+            if robot.client is not None:
+                robot.client.close()
+                robot.client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __newClient(self, robot) -> opentronsClient:
+        return opentronsClient(strRobotIP = robot.robotIP,
+                               dicHeaders = self.headers,
+                               strRobot = robot.robotType,
+                               intPort = robot.port,
+                               **self.clientOptions)
+
+    def createRuns(self) -> dict:
+        '''
+        creates a run on every robot without one, in parallel
+
+        arguments
+        ----------
+        None
+
+        returns
+        ----------
+        dicErrors: dict
+            the exception raised for each robot whose run could not be created
+        '''
+        lstRobots = [robot for robot in self.robots.values() if robot.client is None]
+        dicErrors = {}
+        if not lstRobots:
+            return dicErrors
+
+        def createRun(robot):
+            try:
+                robot.client = self.__newClient(robot)
+            except Exception as error:
+                # LOG - error
+                LOGGER.error(f"Failed to create run on robot {robot.name}: {error}")
+                robot.errors.append(error)
+                dicErrors[robot.name] = error
+
+        with ThreadPoolExecutor(max_workers = len(lstRobots)) as executor:
+            list(executor.map(createRun, lstRobots))
+
+        return dicErrors
+
+    def dispatch(self,
+                 lstExperiments: list,
+                 intRetries: int = 0) -> list:
+        '''
+        runs every experiment on the next idle robot and blocks until all
+        of them have finished
+
+        arguments
+        ----------
+        lstExperiments: list
+            callables taking the opentronsClient of the run they were given,
+            their return value is collected as the result
+            e.g. def experiment(client): client.loadPipette(...)
+
+        intRetries: int
+            how many times an experiment that raised is handed to another run
+            default: 0
+
+        returns
+        ----------
+        lstResults: list
+            one fleetResult per experiment, in the order of lstExperiments
+        '''
+        if not self.robots:
+            raise Exception("No robots registered with the fleet.")
+
+        queueExperiments = queue.Queue()
+        for intIndex, experiment in enumerate(lstExperiments):
+            queueExperiments.put((intIndex, experiment, intRetries))
+
+        lstResults = [None] * len(lstExperiments)
+        dicState = {"remaining": len(lstExperiments), "robots": len(self.robots)}
+
+        def finish(robot, intIndex, result, error, strRunID, fltSeconds):
+            fleetResult_temp = fleetResult(robot.name, intIndex, result, error, strRunID, fltSeconds)
+            if error is None:
+                robot.results.append(fleetResult_temp)
+            else:
+                # LOG - error
+                LOGGER.error(f"Experiment {intIndex} failed on robot {robot.name}: {error}")
+                robot.errors.append(error)
+            lstResults[intIndex] = fleetResult_temp
+            with self.__lock:
+                dicState["remaining"] -= 1
+
+        def runRobot(robot):
+            # each robot pulls the next experiment as soon as it is idle
+            while True:
+                with self.__lock:
+                    if dicState["remaining"] == 0:
+                        return
+                try:
+                    intIndex, experiment, intRetriesLeft = queueExperiments.get(timeout = 0.05)
+                except queue.Empty:
+                    continue
+
+                try:
+                    client = robot.client or self.__newClient(robot)
+                    robot.client = None
+                except Exception as error:
+                    # a robot that cannot create a run leaves the fleet for this
+                    # dispatch, its experiment goes back to the others
+                    # LOG - error
+                    LOGGER.error(f"Failed to create run on robot {robot.name}: {error}")
+                    robot.errors.append(error)
+                    with self.__lock:
+                        dicState["robots"] -= 1
+                        boolLastRobot = dicState["robots"] == 0
+                    if not boolLastRobot:
+                        queueExperiments.put((intIndex, experiment, intRetriesLeft))
+                        return
+                    finish(robot, intIndex, None, error, None, 0.0)
+                    while not queueExperiments.empty():
+                        finish(robot, queueExperiments.get()[0], None, error, None, 0.0)
+                    return
+
+                robot.busy = True
+                fltStart = time.perf_counter()
+                result, error = None, None
+                try:
+                    result = experiment(client)
+                except Exception as exception:
+                    error = exception
+                finally:
+                    client.close()
+                    robot.busy = False
+                fltSeconds = time.perf_counter() - fltStart
+
+                if error is not None and intRetriesLeft > 0:
+                    # LOG - warning
+                    LOGGER.warning(f"Experiment {intIndex} failed on robot {robot.name}, retrying: {error}")
+                    robot.errors.append(error)
+                    queueExperiments.put((intIndex, experiment, intRetriesLeft - 1))
+                    continue
+
+                # a lazy client that never sent a command has no run, and
+                # runID would create one after close
+                finish(robot, intIndex, result, error, client.createdRunID, fltSeconds)
+
+        lstRobots = list(self.robots.values())
+        with ThreadPoolExecutor(max_workers = len(lstRobots)) as executor:
+            list(executor.map(runRobot, lstRobots))
+
+        return lstResults
+
+    def map(self,
+            funcExperiment: Callable,
+            lstArguments: list,
+            intRetries: int = 0) -> list:
+        '''
+        runs funcExperiment(client, argument) for every argument across the fleet
+
+        returns
+        ----------
+        lstResults: list
+            one fleetResult per argument, in the order of lstArguments
+        '''
+        return self.dispatch([(lambda client, argument = argument: funcExperiment(client, argument))
+                              for argument in lstArguments],
+                             intRetries = intRetries)
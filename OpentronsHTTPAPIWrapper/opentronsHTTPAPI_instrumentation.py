@@ -0,0 +1,218 @@
+import bisect
+import logging
+import threading
+from datetime import datetime
+
+LOGGER = logging.getLogger(__name__)
+
+def parseTimestamp(strTimestamp: str) -> float:
+    '''
+    converts a robot ISO 8601 timestamp into seconds since the epoch, None if
+    the timestamp is missing
+    '''
+    if not strTimestamp:
+        return None
+    # datetime.fromisoformat only accepts a "Z" suffix from python 3.11
+    return datetime.fromisoformat(strTimestamp.replace("Z", "+00:00")).timestamp()
+
+class commandTiming:
+    '''
+    timing of a single request sent by opentronsClient, passed to every
+    instrumentation hook
+
+    attributes
+    ----------
+    requestKind: str
+        what the request was for: "command", "commandStatus", "createRun",
+        "getRunInfo", "getRunCommands", "labwareDefinition", "labwareOffset",
+        "uploadProtocol", "homeRobot", "lights" or "controlAction"
+
+    commandType: str
+        the protocol engine command type for command requests, otherwise the
+        request kind
+
+    method, url, params, payload: str, str, dict, str
+        the HTTP method, URL, query parameters and JSON body of the request
+
+    payloadBytes: int
+        the size of the request body
+
+    serializationSeconds: float
+        the time spent encoding the request body
+
+    requestStart, requestEnd: float
+        wall-clock time (seconds since the epoch) the HTTP request was sent
+        and its response received
+
+    createdAt, startedAt, completedAt: str
+        the robot-reported timestamps of the command, None if not reported
+
+    statusCode, responseText: int, str
+        the HTTP status and body of the response
+    '''
+
+    __slots__ = ("requestKind", "commandType", "method", "url", "params", "payload",
+                 "payloadBytes", "serializationSeconds", "requestStart",
+                 "requestEnd", "statusCode", "responseText", "commandID",
+                 "status", "createdAt", "startedAt", "completedAt")
+
+    def __init__(self, requestKind, commandType, method, url, payload,
+                 serializationSeconds, requestStart, requestEnd, statusCode,
+                 responseText, dicData, params = None):
+        self.requestKind = requestKind
+        self.commandType = commandType
+        self.method = method
+        self.url = url
+        self.params = params
+        self.payload = payload
+        self.payloadBytes = len(payload) if payload else 0
+        self.serializationSeconds = serializationSeconds
+        self.requestStart = requestStart
+        self.requestEnd = requestEnd
+        self.statusCode = statusCode
+        self.responseText = responseText
+
+        dicData = dicData or {}
+        self.commandID = dicData.get('id')
+        self.status = dicData.get('status')
+        self.createdAt = dicData.get('createdAt')
+        self.startedAt = dicData.get('startedAt')
+        self.completedAt = dicData.get('completedAt')
+
+    def __repr__(self):
+        return f"commandTiming({self.commandType}, roundTrip={self.roundTripSeconds * 1000:.1f} ms, status={self.status})"
+
+    @property
+    def roundTripSeconds(self) -> float:
+        return self.requestEnd - self.requestStart
+
+    @property
+    def queueSeconds(self) -> float:
+        '''
+        time the command waited in the robot's queue, None if not yet started
+        '''
+        if self.createdAt is None or self.startedAt is None:
+            return None
+        return parseTimestamp(self.startedAt) - parseTimestamp(self.createdAt)
+
+    @property
+    def executionSeconds(self) -> float:
+        '''
+        time the robot spent executing the command, None if not yet completed
+        '''
+        if self.startedAt is None or self.completedAt is None:
+            return None
+        return parseTimestamp(self.completedAt) - parseTimestamp(self.startedAt)
+
+class timingHistogram:
+    '''
+    fixed, logarithmically spaced histogram of durations in seconds
+    '''
+
+    # bucket upper bounds from 10 us to 100 s, three per decade
+    BOUNDS = [fltMantissa * 10 ** intExponent
+              for intExponent in range(-5, 3)
+              for fltMantissa in (1, 2, 5)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self,
+            fltSeconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, fltSeconds)] += 1
+        self.count += 1
+        self.total += fltSeconds
+        self.maximum = max(self.maximum, fltSeconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self,
+                   fltPercentile: float) -> float:
+        '''
+        upper bound of the bucket holding the given percentile
+        '''
+        intRank = fltPercentile / 100 * self.count
+        intSeen = 0
+        for intIndex, intCount in enumerate(self.counts):
+            intSeen += intCount
+            if intCount and intSeen >= intRank:
+                return self.BOUNDS[intIndex] if intIndex < len(self.BOUNDS) else self.maximum
+        return 0.0
+
+    def toDict(self) -> dict:
+        return {"count": self.count,
+                "mean": self.mean,
+                "max": self.maximum,
+                "p50": self.percentile(50),
+                "p95": self.percentile(95),
+                "buckets": {f"<={fltBound:g}": intCount
+                            for fltBound, intCount in zip(self.BOUNDS, self.counts) if intCount}}
+
+class commandTimingAggregator:
+    '''
+    instrumentation hook that collects per command type histograms of
+    serialization, round trip, queue and execution time
+
+    usage
+    ----------
+    aggregator = commandTimingAggregator()
+    client.addInstrumentationHook(aggregator)
+    ...
+    print(aggregator.formatReport())
+    '''
+
+    STAGES = ("serialization", "roundTrip", "queue", "execution")
+
+    def __init__(self):
+        self.commandTypes = {}
+        self.__lock = threading.Lock()
+
+    def __call__(self,
+                 timing: commandTiming):
+        with self.__lock:
+            dicStages = self.commandTypes.get(timing.commandType)
+            if dicStages is None:
+                dicStages = {strStage: timingHistogram() for strStage in self.STAGES}
+                dicStages["payloadBytes"] = 0
+                self.commandTypes[timing.commandType] = dicStages
+
+            # status polls of pipelined commands only add the robot timestamps
+            if timing.requestKind != "commandStatus":
+                dicStages["serialization"].add(timing.serializationSeconds)
+                dicStages["roundTrip"].add(timing.roundTripSeconds)
+                dicStages["payloadBytes"] += timing.payloadBytes
+
+            if timing.startedAt is not None and timing.completedAt is not None:
+                dicStages["queue"].add(timing.queueSeconds)
+                dicStages["execution"].add(timing.executionSeconds)
+
+    def reset(self):
+        with self.__lock:
+            self.commandTypes = {}
+
+    def report(self) -> dict:
+        '''
+        returns the histograms of every command type as a dictionary
+        '''
+        with self.__lock:
+            return {strType: {strStage: (dicStages[strStage].toDict() if strStage in self.STAGES else dicStages[strStage])
+                              for strStage in dicStages}
+                    for strType, dicStages in self.commandTypes.items()}
+
+    def formatReport(self) -> str:
+        '''
+        returns a table of count, mean and p95 per stage for every command type
+        '''
+        lstLines = [f"{'command type':<34}{'count':>7}" + "".join(f"{strStage + ' mean/p95 (ms)':>30}" for strStage in self.STAGES)]
+        for strType, dicStages in sorted(self.report().items()):
+            strLine = f"{strType:<34}{dicStages['roundTrip']['count']:>7}"
+            for strStage in self.STAGES:
+                dicStage = dicStages[strStage]
+                strLine += f"{dicStage['mean'] * 1000:>21.2f} / {dicStage['p95'] * 1000:>6.2f}"
+            lstLines.append(strLine)
+        return "\n".join(lstLines)
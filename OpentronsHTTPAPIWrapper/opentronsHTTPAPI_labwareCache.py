@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+def hashLabwareDefinition(dicLabware: dict) -> str:
+    '''
+    returns the content hash of a labware definition, independent of key
+    order and whitespace of the file it came from
+    '''
+    strCanonical = json.dumps(dicLabware, sort_keys = True, separators = (",", ":"))
+    return hashlib.sha256(strCanonical.encode("utf-8")).hexdigest()
+
+class labwareDefinitionCache:
+    '''
+    content addressed cache of parsed custom labware definitions
+
+    definitions are kept in memory by content hash, and files are only
+    reread when their modification time or size changes. with a directory
+    the cache is shared across processes: every definition is stored once as
+    <hash>.json next to an index of the files it was read from
+
+    the returned definitions are shared and must not be modified
+
+    usage
+    ----------
+    cache = labwareDefinitionCache("~/.cache/opentronsHTTPAPIWrapper/labware")
+    client = opentronsClient(strRobotIP, labwareCache = cache)
+    '''
+
+    def __init__(self,
+                 strDirectory: str = None):
+        '''
+        arguments
+        ----------
+        strDirectory: str
+            the directory holding the on-disk cache, memory only if None
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        self.directory = None if strDirectory is None else os.path.expanduser(strDirectory)
+        self.hits = 0
+        self.misses = 0
+
+        # hash -> definition
+        self.__definitions = {}
+        # "path|mtime|size" -> hash
+        self.__files = {}
+        # id of a definition handed out -> (definition, hash)
+        self.__hashes = {}
+        self.__lock = threading.Lock()
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok = True)
+            self.__files.update(self.__readIndex())
+
+    def __indexPath(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def __readIndex(self) -> dict:
+        try:
+            with open(self.__indexPath(), "r", encoding = "utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __writeFile(self, strPath, strText):
+        # write then rename so concurrent processes never read partial files
+        strTemporary = f"{strPath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(strTemporary, "w", encoding = "utf-8") as f:
+            f.write(strText)
+        os.replace(strTemporary, strPath)
+
+    def __remember(self, strHash, dicLabware):
+        # called with the lock held
+        dicLabware = self.__definitions.setdefault(strHash, dicLabware)
+        self.__hashes[id(dicLabware)] = (dicLabware, strHash)
+        return dicLabware
+
+    def hash(self,
+             dicLabware: dict) -> str:
+        '''
+        returns the content hash of a definition, without rehashing the
+        definitions handed out by this cache
+        '''
+        tupleKnown = self.__hashes.get(id(dicLabware))
+        if tupleKnown is not None and tupleKnown[0] is dicLabware:
+            return tupleKnown[1]
+
+        return hashLabwareDefinition(dicLabware)
+
+    def get(self,
+            strHash: str) -> dict:
+        '''
+        returns the definition with the given content hash, None if unknown
+        '''
+        with self.__lock:
+            dicLabware = self.__definitions.get(strHash)
+            if dicLabware is not None or self.directory is None:
+                return dicLabware
+
+            try:
+                with open(os.path.join(self.directory, f"{strHash}.json"), "r", encoding = "utf-8") as f:
+                    return self.__remember(strHash, json.load(f))
+            except (OSError, ValueError):
+                return None
+
+    def load(self,
+             strFilePath: str) -> tuple:
+        '''
+        reads a labware definition file through the cache
+
+        arguments
+        ----------
+        strFilePath: str
+            the labware definition file
+
+        returns
+        ----------
+        strHash: str
+            the content hash of the definition
+
+        dicLabware: dict
+            the parsed definition
+        '''
+        strPath = os.path.realpath(strFilePath)
+        stat = os.stat(strPath)
+        strKey = f"{strPath}|{stat.st_mtime_ns}|{stat.st_size}"
+
+        strHash = self.__files.get(strKey)
+        if strHash is None and self.directory is not None:
+            # another process may have cached the file since the index was read
+            with self.__lock:
+                self.__files.update(self.__readIndex())
+            strHash = self.__files.get(strKey)
+
+        if strHash is not None:
+            dicLabware = self.get(strHash)
+            if dicLabware is not None:
+                self.hits += 1
+                return strHash, dicLabware
+
+        self.misses += 1
+        with open(strPath, "r", encoding = "utf-8") as f:
+            dicLabware = json.load(f)
+        strHash = hashLabwareDefinition(dicLabware)
+
+        with self.__lock:
+            dicLabware = self.__remember(strHash, dicLabware)
+            self.__files[strKey] = strHash
+            if self.directory is not None:
+                strDefinitionPath = os.path.join(self.directory, f"{strHash}.json")
+                if not os.path.exists(strDefinitionPath):
+                    self.__writeFile(strDefinitionPath, json.dumps(dicLabware, separators = (",", ":")))
+                dicIndex = self.__readIndex()
+                dicIndex[strKey] = strHash
+                self.__writeFile(self.__indexPath(), json.dumps(dicIndex))
+
+        # LOG - debug
+        LOGGER.debug(f"Cached labware definition {strFilePath} as {strHash}")
+        return strHash, dicLabware
+
+    def clear(self):
+        '''
+        empties the in-memory cache, the on-disk cache is kept
+        '''
+        with self.__lock:
+            self.__definitions = {}
+            self.__files = {}
+            self.__hashes = {}
+
+# cache shared by the clients of this process unless they are given their own
+defaultLabwareCache = labwareDefinitionCache()
@@ -0,0 +1,262 @@
+import logging
+import math
+import re
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+# distance between well centres assumed when a labware's definition is not
+# known, in mm. the scale does not change the order within a labware
+FLT_DEFAULT_WELL_PITCH = 9.0
+
+# centre of well A1 from the front left corner of an SBS plate in mm
+SBS_A1_POSITION = (14.38, 74.24)
+
+# footprint of a deck slot in mm
+OT2_SLOT_SIZE = (132.5, 90.5)
+FLEX_SLOT_SIZE = (164.0, 107.0)
+
+# candidate neighbours per well tried by the 2-opt moves
+INT_NEIGHBOURS = 8
+
+def wellPosition(strWellName: str) -> tuple:
+    '''
+    the (row, column) of a well name, both counted from 0, e.g. "B3" -> (1, 2)
+    and "AB1" -> (27, 0) for 1536 well plates
+    '''
+    strRow, strColumn = re.fullmatch(r"([A-Z]+)(\d+)", strWellName).groups()
+    intRow = 0
+    for strLetter in strRow:
+        intRow = intRow * 26 + ord(strLetter) - ord("A") + 1
+    return intRow - 1, int(strColumn) - 1
+
+def wellCoordinates(dicDefinition: dict) -> dict:
+    '''
+    the (x, y) of the wells of a labware definition relative to the
+    labware's front left corner, None if no well has coordinates. wells
+    without x or y are left out and placed on the grid by the caller
+    '''
+    dicWells = dicDefinition.get('wells') if dicDefinition else None
+    if not dicWells:
+        return None
+    dicCoordinates = {strWell: (float(dicWell['x']), float(dicWell['y']))
+                      for strWell, dicWell in dicWells.items()
+                      if isinstance(dicWell, dict) and dicWell.get('x') is not None and dicWell.get('y') is not None}
+    return dicCoordinates or None
+
+def gridPitch(strLoadName: str) -> float:
+    '''
+    the well pitch of a labware guessed from its load name, for labware whose
+    definition is not known
+    '''
+    if "1536" in strLoadName:
+        return FLT_DEFAULT_WELL_PITCH / 4
+    if "384" in strLoadName:
+        return FLT_DEFAULT_WELL_PITCH / 2
+    return FLT_DEFAULT_WELL_PITCH
+
+def gridCoordinate(strWellName: str,
+                   fltPitch: float = FLT_DEFAULT_WELL_PITCH) -> tuple:
+    '''
+    the (x, y) of a well from its name on a regular grid, measured like
+    definition coordinates from the front left corner of an SBS plate with
+    A1 at the back left
+    '''
+    intRow, intColumn = wellPosition(strWellName)
+    return SBS_A1_POSITION[0] + intColumn * fltPitch, SBS_A1_POSITION[1] - intRow * fltPitch
+
+def slotOrigin(slot) -> tuple:
+    '''
+    the approximate (x, y) of the front left corner of a deck slot, "1" to
+    "12" on an OT-2 and "A1" to "D4" on a Flex
+    '''
+    strSlot = str(slot)
+    if strSlot.isdigit():
+        intSlot = int(strSlot) - 1
+        return (intSlot % 3) * OT2_SLOT_SIZE[0], (intSlot // 3) * OT2_SLOT_SIZE[1]
+    match = re.fullmatch(r"([A-D])([1-4])", strSlot)
+    if match is None:
+        # staging areas, off deck and the like
+        return 0.0, 0.0
+    return (int(match.group(2)) - 1) * FLEX_SLOT_SIZE[0], (ord("D") - ord(match.group(1))) * FLEX_SLOT_SIZE[1]
+
+def travelDistance(pointA: tuple,
+                   pointB: tuple) -> float:
+    '''
+    the distance the gantry travels between two points: x and y move at the
+    same time, so the longer of the two moves sets the time it takes
+    '''
+    return max(abs(pointA[0] - pointB[0]), abs(pointA[1] - pointB[1]))
+
+def pathLength(lstPoints: list,
+               lstOrder: list = None,
+               tupleStart: tuple = None) -> float:
+    '''
+    the travel distance of visiting lstPoints in lstOrder, from tupleStart
+    if given
+    '''
+    lstOrder = range(len(lstPoints)) if lstOrder is None else lstOrder
+    lstPath = ([tupleStart] if tupleStart is not None else []) + [lstPoints[intIndex] for intIndex in lstOrder]
+    return sum(travelDistance(lstPath[intIndex], lstPath[intIndex + 1]) for intIndex in range(len(lstPath) - 1))
+
+def serpentineOrder(lstPoints: list,
+                    boolByColumn: bool = True) -> list:
+    '''
+    the order that sweeps down the first column, up the second and so on,
+    or along the rows when boolByColumn is false
+    '''
+    intAxis, intOther = (0, 1) if boolByColumn else (1, 0)
+    dicLines = {}
+    for intIndex, point in enumerate(lstPoints):
+        # wells of one column share x up to rounding in their definitions
+        dicLines.setdefault(round(point[intAxis], 1), []).append(intIndex)
+    lstOrder = []
+    for intLine, fltLine in enumerate(sorted(dicLines)):
+        lstLine = sorted(dicLines[fltLine], key = lambda intIndex: lstPoints[intIndex][intOther], reverse = intLine % 2 == 0)
+        lstOrder.extend(lstLine)
+    return lstOrder
+
+def nearestNeighbours(lstPoints: list,
+                      intCount: int = INT_NEIGHBOURS) -> list:
+    '''
+    the indices of the intCount closest points to every point, found through
+    a grid of buckets instead of comparing all pairs
+    '''
+    intPoints = len(lstPoints)
+    if intPoints <= 1:
+        return [[] for _ in lstPoints]
+    fltMinX = min(point[0] for point in lstPoints)
+    fltMinY = min(point[1] for point in lstPoints)
+    fltWidth = max(point[0] for point in lstPoints) - fltMinX
+    fltHeight = max(point[1] for point in lstPoints) - fltMinY
+    # about two points per bucket
+    fltCell = max(math.sqrt(max(fltWidth * fltHeight, 1e-9) * 2 / intPoints), max(fltWidth, fltHeight) / intPoints, 1e-6)
+
+    dicBuckets = {}
+    lstCells = []
+    for intIndex, point in enumerate(lstPoints):
+        tupleCell = (int((point[0] - fltMinX) // fltCell), int((point[1] - fltMinY) // fltCell))
+        lstCells.append(tupleCell)
+        dicBuckets.setdefault(tupleCell, []).append(intIndex)
+
+    intCount = min(intCount, intPoints - 1)
+    intMaxRing = int(max(fltWidth, fltHeight) // fltCell) + 1
+    lstNeighbours = []
+    for intIndex, point in enumerate(lstPoints):
+        intCellX, intCellY = lstCells[intIndex]
+        lstCandidates = []
+        intRing = 0
+        while intRing <= intMaxRing:
+            for intX in range(intCellX - intRing, intCellX + intRing + 1):
+                for intY in range(intCellY - intRing, intCellY + intRing + 1):
+                    if max(abs(intX - intCellX), abs(intY - intCellY)) == intRing:
+                        lstCandidates.extend(dicBuckets.get((intX, intY), ()))
+            # points in the next ring are at least intRing cells away
+            if len(lstCandidates) > intCount and intRing >= 1:
+                lstDistances = sorted(travelDistance(point, lstPoints[intOther]) for intOther in lstCandidates if intOther != intIndex)
+                if lstDistances[intCount - 1] <= intRing * fltCell:
+                    break
+            intRing += 1
+        lstCandidates = [intOther for intOther in lstCandidates if intOther != intIndex]
+        lstCandidates.sort(key = lambda intOther: travelDistance(point, lstPoints[intOther]))
+        lstNeighbours.append(lstCandidates[:intCount])
+    return lstNeighbours
+
+def optimizeVisitOrder(lstPoints: list,
+                       fltTimeBudget: float = 0.1,
+                       tupleStart: tuple = None) -> list:
+    '''
+    orders points to shorten the gantry's path through them
+
+    the shorter of the column and row serpentines is improved by 2-opt moves
+    between near neighbours until no move helps or the time budget is spent,
+    so the result is never longer than either serpentine
+
+    arguments
+    ----------
+    lstPoints: list
+        the (x, y) of every visit
+
+    fltTimeBudget: float
+        the time the improvement may take in seconds
+        default: 0.1
+
+    tupleStart: tuple
+        the (x, y) the path starts from, e.g. the source of a multi-dispense,
+        the path may start anywhere if None
+        default: None
+
+    returns
+    ----------
+    lstOrder: list
+        the indices of lstPoints in the order to visit them
+    '''
+    fltDeadline = time.perf_counter() + fltTimeBudget
+    intPoints = len(lstPoints)
+    if intPoints <= 2:
+        if intPoints == 2 and tupleStart is not None and \
+                travelDistance(tupleStart, lstPoints[1]) < travelDistance(tupleStart, lstPoints[0]):
+            return [1, 0]
+        return list(range(intPoints))
+
+    # the start is a fixed extra point at the front of the path
+    lstNodes = ([tupleStart] if tupleStart is not None else []) + list(lstPoints)
+    intFixed = 1 if tupleStart is not None else 0
+    lstInitial = [min((serpentineOrder(lstPoints, boolByColumn), serpentineOrder(lstPoints, boolByColumn)[::-1]),
+                      key = lambda lstOrder: pathLength(lstPoints, lstOrder, tupleStart))
+                  for boolByColumn in (True, False)]
+    lstTour = [0] * intFixed + [intIndex + intFixed for intIndex in
+                                min(lstInitial, key = lambda lstOrder: pathLength(lstPoints, lstOrder, tupleStart))]
+    intNodes = len(lstTour)
+    lstPosition = [0] * intNodes
+    for intPosition, intNode in enumerate(lstTour):
+        lstPosition[intNode] = intPosition
+    lstNeighbours = nearestNeighbours(lstNodes)
+
+    def distance(intA, intB):
+        if intA is None or intB is None:
+            return 0.0
+        return travelDistance(lstNodes[intA], lstNodes[intB])
+
+    def gain(intP, intQ):
+        # reversing lstTour[intP + 1 .. intQ] replaces edges (P, P+1) and
+        # (Q, Q+1) by (P, Q) and (P+1, Q+1), a missing end costs nothing
+        intA = lstTour[intP] if intP >= 0 else None
+        intD = lstTour[intQ + 1] if intQ + 1 < intNodes else None
+        intB = lstTour[intP + 1]
+        intC = lstTour[intQ]
+        return distance(intA, intB) + distance(intC, intD) - distance(intA, intC) - distance(intB, intD)
+
+    def reverse(intP, intQ):
+        lstTour[intP + 1:intQ + 1] = lstTour[intP + 1:intQ + 1][::-1]
+        for intPosition in range(intP + 1, intQ + 1):
+            lstPosition[lstTour[intPosition]] = intPosition
+
+    intMoves = 0
+    boolImproved = True
+    while boolImproved and time.perf_counter() < fltDeadline:
+        boolImproved = False
+        for intNode in range(intFixed, intNodes):
+            if time.perf_counter() >= fltDeadline:
+                break
+            for intOther in lstNeighbours[intNode]:
+                intI = lstPosition[intNode]
+                intJ = lstPosition[intOther]
+                if abs(intI - intJ) <= 1:
+                    continue
+                intLow, intHigh = min(intI, intJ), max(intI, intJ)
+                # the two moves that make the nodes neighbours
+                for intP, intQ in ((intLow, intHigh), (intLow - 1, intHigh - 1)):
+                    # the fixed start is never moved
+                    if intP < intFixed - 1:
+                        continue
+                    if gain(intP, intQ) > 1e-9:
+                        reverse(intP, intQ)
+                        intMoves += 1
+                        boolImproved = True
+                        break
+
+    # LOG - debug
+    LOGGER.debug(f"Ordered {intPoints} visits with {intMoves} 2-opt moves")
+
+    return [intNode - intFixed for intNode in lstTour[intFixed:]]
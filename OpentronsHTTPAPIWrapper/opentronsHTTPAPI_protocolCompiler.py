@@ -0,0 +1,354 @@
+import json
+import logging
+import pprint
+import uuid
+from urllib.parse import urlparse
+
+LOGGER = logging.getLogger(__name__)
+
+# python protocol API level the compiled protocols are written against
+API_LEVEL = "2.20"
+
+# commands that only ask the robot about its state and that a compiled
+# protocol cannot branch on
+QUERY_COMMAND_TYPES = ("verifyTipPresence",)
+
+# deck slots moveToAddressableArea can move to, staging slots included
+OT2_SLOTS = tuple(str(intSlot) for intSlot in range(1, 13))
+FLEX_SLOTS = tuple(f"{strRow}{intColumn}" for strRow in "ABCD" for intColumn in range(1, 5))
+
+class compiledResponse:
+    '''
+    the answer of a protocolCompiler to a request, read by opentronsClient
+    like a requests.Response
+    '''
+
+    __slots__ = ("status_code", "text")
+
+    def __init__(self, intStatus, dicBody):
+        self.status_code = intStatus
+        self.text = json.dumps(dicBody)
+
+class protocolCompiler:
+    '''
+    stands in for the robot while an opentronsClient is in compile mode: it
+    accepts the client's requests as if they succeeded and captures them, and
+    writes them out as a python protocol that runs on the robot without a
+    network round trip per step
+
+    compile mode suits fixed workflows - commands are not executed while the
+    script runs, so their results (e.g. pipetteHasTip) are not known to it
+
+    usage
+    ----------
+    client = opentronsClient(strRobotIP, boolCompile = True)
+    ...  # the unchanged script
+    client.compileProtocol("protocol.py")   # or client.runCompiledProtocol()
+    '''
+
+    def __init__(self,
+                 strRobot: str = "ot2",
+                 strProtocolName: str = "compiled opentronsClient session"):
+        '''
+        arguments
+        ----------
+        strRobot: str
+            the type of robot, either "flex" or "ot2"
+            default: "ot2"
+
+        strProtocolName: str
+            the name in the protocol's metadata
+            default: "compiled opentronsClient session"
+
+        returns
+        ----------
+        None
+        '''
+        self.robotType = strRobot
+        self.protocolName = strProtocolName
+        self.runID = None
+
+        # captured in the order the client sent them
+        self.commands = []
+        self.commandsById = {}
+        # (kind, dicBody) of requests other than commands, with the index of
+        # the command they follow
+        self.requests = []
+        self.labwareDefinitions = {}
+        self.labwareOffsets = []
+
+        # captured IDs -> variable names in the protocol
+        self.__labwareNames = {}
+        self.__pipetteNames = {}
+        # trash bin and waste chute areas -> variable names in the protocol
+        self.__disposalNames = {}
+
+    # *** the robot, as seen by the client ***
+
+    def handle(self,
+               strMethod: str,
+               strURL: str,
+               strRequestKind: str,
+               strCommand: str = None) -> compiledResponse:
+        '''
+        answers a request of the client and captures it
+        '''
+        dicBody = json.loads(strCommand) if strCommand else {}
+
+        if strRequestKind == "createRun":
+            self.runID = f"compiled-{uuid.uuid4()}"
+            return compiledResponse(201, {"data": {"id": self.runID, "status": "idle"}})
+
+        if strRequestKind == "command":
+            dicCommand = self.__capture(dicBody['data'])
+            return compiledResponse(201, {"data": dicCommand})
+
+        if strRequestKind == "commandStatus":
+            strCommandID = urlparse(strURL).path.rsplit("/", 1)[1]
+            return compiledResponse(200, {"data": self.commandsById[strCommandID]})
+
+        if strRequestKind == "getRunCommands":
+            return compiledResponse(200, {"data": self.commands,
+                                          "meta": {"cursor": 0, "totalLength": len(self.commands)}})
+
+        if strRequestKind == "getRunInfo":
+            return compiledResponse(200, {"data": {"id": self.runID,
+                                                   "status": "idle",
+                                                   "labwareOffsets": self.labwareOffsets}})
+
+        if strRequestKind == "labwareDefinition":
+            dicDefinition = dicBody['data']
+            strURI = f"{dicDefinition['namespace']}/{dicDefinition['parameters']['loadName']}/{dicDefinition['version']}"
+            self.labwareDefinitions[strURI] = dicDefinition
+            return compiledResponse(201, {"data": {"definitionUri": strURI}})
+
+        if strRequestKind == "labwareOffset":
+            dicOffset = dict(dicBody['data'], id = str(uuid.uuid4()))
+            self.labwareOffsets.append(dicOffset)
+            return compiledResponse(201, {"data": dicOffset})
+
+        if strRequestKind in ("controlAction", "lights", "homeRobot"):
+            self.requests.append((len(self.commands), strRequestKind, dicBody))
+            return compiledResponse(201 if strRequestKind == "controlAction" else 200, {"data": dicBody.get('data', dicBody)})
+
+        raise Exception(f"Request {strMethod} {strURL} ({strRequestKind}) cannot be compiled into a protocol.")
+
+    def __capture(self, dicRequest):
+        dicParams = dict(dicRequest.get('params', {}))
+        strType = dicRequest['commandType']
+
+        # IDs the robot would choose are chosen here, so later commands can
+        # refer to them
+        dicResult = {}
+        if strType == "moveToAddressableArea":
+            # raises for areas the protocol API cannot move to
+            self.__addressableArea(dicParams['addressableAreaName'])
+        elif strType == "loadLabware":
+            dicParams.setdefault('labwareId', str(uuid.uuid4()))
+            dicResult = {"labwareId": dicParams['labwareId']}
+        elif strType == "loadPipette":
+            dicParams.setdefault('pipetteId', str(uuid.uuid4()))
+            dicResult = {"pipetteId": dicParams['pipetteId']}
+
+        dicCommand = {"id": str(uuid.uuid4()),
+                      "commandType": strType,
+                      "params": dicParams,
+                      "intent": dicRequest.get('intent', "setup"),
+                      "status": "succeeded",
+                      "result": dicResult,
+                      "error": None}
+        self.commands.append(dicCommand)
+        self.commandsById[dicCommand['id']] = dicCommand
+        return dicCommand
+
+    # *** the protocol ***
+
+    def toPython(self) -> str:
+        '''
+        writes the captured session as a python protocol
+
+        arguments
+        ----------
+        None
+
+        returns
+        ----------
+        strProtocol: str
+            the source of the protocol
+        '''
+        lstLines = ["from opentrons import types",
+                    "",
+                    f"metadata = {{\"protocolName\": {json.dumps(self.protocolName)}}}",
+                    f"requirements = {{\"robotType\": \"{'Flex' if self.robotType == 'flex' else 'OT-2'}\", \"apiLevel\": \"{API_LEVEL}\"}}",
+                    ""]
+
+        if self.labwareDefinitions:
+            lstLines.append("LABWARE_DEFINITIONS = " + pprint.pformat(self.labwareDefinitions, indent = 1, width = 100))
+            lstLines.append("")
+
+        lstLines.extend(["def _location(labware, strWell, strOrigin, dicOffset):",
+                         "    well = labware[strWell]",
+                         "    if strOrigin == \"top\":",
+                         "        location = well.top(dicOffset['z'])",
+                         "    elif strOrigin == \"bottom\":",
+                         "        location = well.bottom(dicOffset['z'])",
+                         "    else:",
+                         "        location = well.center().move(types.Point(z = dicOffset['z']))",
+                         "    return location.move(types.Point(x = dicOffset['x'], y = dicOffset['y']))",
+                         "",
+                         "def run(protocol):"])
+
+        self.__labwareNames = {}
+        self.__pipetteNames = {}
+        self.__disposalNames = {}
+        if self.robotType == "flex":
+            lstLines.append("    trash = protocol.load_trash_bin(\"A3\")")
+            self.__disposalNames["movableTrashA3"] = "trash"
+        lstRequests = list(self.requests)
+        for intIndex, dicCommand in enumerate(self.commands):
+            while lstRequests and lstRequests[0][0] == intIndex:
+                lstLines.extend("    " + strLine for strLine in self.__request(*lstRequests.pop(0)[1:]))
+            lstLines.extend("    " + strLine for strLine in self.__command(dicCommand))
+        for intIndex, strKind, dicBody in lstRequests:
+            lstLines.extend("    " + strLine for strLine in self.__request(strKind, dicBody))
+
+        if lstLines[-1] == "def run(protocol):":
+            lstLines.append("    pass")
+
+        return "\n".join(lstLines) + "\n"
+
+    def __request(self, strKind, dicBody):
+        if strKind == "homeRobot":
+            return ["protocol.home()"]
+        if strKind == "lights":
+            return [f"protocol.set_rail_lights({str(dicBody.get('on')).lower() == 'true'})"]
+        strAction = dicBody.get('data', {}).get('actionType')
+        if strAction == "pause":
+            return ["protocol.pause()"]
+        # play starts the run and stop ends it, neither is a protocol step
+        return []
+
+    def __location(self, dicParams):
+        dicWellLocation = dicParams.get('wellLocation', {})
+        dicOffset = {strAxis: float(dicWellLocation.get('offset', {}).get(strAxis, 0)) for strAxis in ("x", "y", "z")}
+        return (f"_location({self.__labwareNames[dicParams['labwareId']]}, {dicParams['wellName']!r}, "
+                f"{dicWellLocation.get('origin', 'top')!r}, {dicOffset!r})")
+
+    def __addressableArea(self, strArea) -> tuple:
+        '''
+        what an addressable area is in the protocol API: ("slot", slot name),
+        ("trashBin", slot name or None for the OT-2 fixed trash) or
+        ("wasteChute", None), raising for anything else
+        '''
+        strArea = str(strArea)
+        if self.robotType == "flex":
+            if strArea in FLEX_SLOTS:
+                return "slot", strArea
+            if strArea.startswith("movableTrash") and strArea[len("movableTrash"):] in FLEX_SLOTS:
+                return "trashBin", strArea[len("movableTrash"):]
+            if "WasteChute" in strArea:
+                return "wasteChute", None
+        else:
+            if strArea in OT2_SLOTS:
+                return "slot", strArea
+            if strArea == "fixedTrash":
+                return "trashBin", None
+        raise Exception(f"Addressable area {strArea} of the {self.robotType} cannot be compiled into a protocol.")
+
+    def __moveToAddressableArea(self, strPipette, dicParams) -> list:
+        strKind, strSlot = self.__addressableArea(dicParams['addressableAreaName'])
+        dicOffset = {strAxis: float(dicParams.get('offset', {}).get(strAxis, 0)) for strAxis in ("x", "y", "z")}
+        strOffset = f"x = {dicOffset['x']}, y = {dicOffset['y']}, z = {dicOffset['z']}"
+
+        lstLines = []
+        if strKind == "slot":
+            strLocation = f"protocol.deck.position_for({strSlot!r}).move(types.Point({strOffset}))"
+        else:
+            strArea = str(dicParams['addressableAreaName'])
+            if strArea not in self.__disposalNames:
+                # loaded once, where the session first moves to it
+                if strKind == "wasteChute":
+                    self.__disposalNames[strArea] = "waste_chute"
+                    lstLines.append("waste_chute = protocol.load_waste_chute()")
+                elif strSlot is None:
+                    self.__disposalNames[strArea] = "protocol.fixed_trash"
+                else:
+                    self.__disposalNames[strArea] = f"trash_{strSlot}"
+                    lstLines.append(f"trash_{strSlot} = protocol.load_trash_bin({strSlot!r})")
+            strLocation = f"{self.__disposalNames[strArea]}.top({strOffset})"
+
+        # the minimum height of the travel move, stayAtHighestPossibleZ has
+        # no protocol API counterpart
+        lstArguments = [strLocation, f"force_direct = {bool(dicParams.get('forceDirect'))}"]
+        if dicParams.get('minimumZHeight') is not None:
+            lstArguments.append(f"minimum_z_height = {float(dicParams['minimumZHeight'])}")
+        if dicParams.get('speed') is not None:
+            lstArguments.append(f"speed = {float(dicParams['speed'])}")
+        lstLines.append(f"{strPipette}.move_to({', '.join(lstArguments)})")
+        return lstLines
+
+    def __command(self, dicCommand) -> list:
+        strType = dicCommand['commandType']
+        dicParams = dicCommand['params']
+        strPipette = self.__pipetteNames.get(dicParams.get('pipetteId'))
+
+        if strType == "loadLabware":
+            strName = f"labware_{len(self.__labwareNames) + 1}"
+            self.__labwareNames[dicParams['labwareId']] = strName
+            strURI = f"{dicParams['namespace']}/{dicParams['loadName']}/{dicParams['version']}"
+            dicLocation = dicParams['location']
+            if 'labwareId' in dicLocation:
+                strParent = self.__labwareNames[dicLocation['labwareId']]
+                if strURI in self.labwareDefinitions:
+                    return [f"{strName} = {strParent}.load_labware_from_definition(LABWARE_DEFINITIONS[{strURI!r}])"]
+                return [f"{strName} = {strParent}.load_labware({dicParams['loadName']!r}, namespace = {dicParams['namespace']!r}, version = {int(dicParams['version'])})"]
+            if strURI in self.labwareDefinitions:
+                return [f"{strName} = protocol.load_labware_from_definition(LABWARE_DEFINITIONS[{strURI!r}], {dicLocation['slotName']!r})"]
+            return [f"{strName} = protocol.load_labware({dicParams['loadName']!r}, {dicLocation['slotName']!r}, namespace = {dicParams['namespace']!r}, version = {int(dicParams['version'])})"]
+
+        if strType == "loadPipette":
+            strName = f"pipette_{dicParams['mount']}"
+            self.__pipetteNames[dicParams['pipetteId']] = strName
+            return [f"{strName} = protocol.load_instrument({dicParams['pipetteName']!r}, {dicParams['mount']!r})"]
+
+        if strType == "pickUpTip":
+            return [f"{strPipette}.pick_up_tip({self.__location(dicParams)})"]
+
+        if strType in ("aspirate", "dispense"):
+            return [f"{strPipette}.flow_rate.{strType} = {float(dicParams['flowRate'])}",
+                    f"{strPipette}.{strType}({float(dicParams['volume'])}, {self.__location(dicParams)})"]
+
+        if strType == "blowout":
+            return [f"{strPipette}.flow_rate.blow_out = {float(dicParams['flowRate'])}",
+                    f"{strPipette}.blow_out({self.__location(dicParams)})"]
+
+        if strType == "moveToWell":
+            return [f"{strPipette}.move_to({self.__location(dicParams)}, speed = {float(dicParams['speed'])})"]
+
+        if strType == "moveToAddressableArea":
+            return self.__moveToAddressableArea(strPipette, dicParams)
+
+        if strType == "dropTip":
+            return [f"{strPipette}.drop_tip({self.__location(dicParams)}, home_after = {bool(dicParams.get('homeAfter'))})"]
+
+        if strType == "moveToAddressableAreaForDropTip":
+            # the tip is dropped by the dropTipInPlace that follows
+            return []
+
+        if strType == "dropTipInPlace":
+            return [f"{strPipette}.drop_tip(home_after = {bool(dicParams.get('homeAfter'))})"]
+
+        if strType == "liquidProbe":
+            return [f"{strPipette}.require_liquid_presence({self.__labwareNames[dicParams['labwareId']]}[{dicParams['wellName']!r}])"]
+
+        if strType == "moveLabware":
+            dicNewLocation = dicParams['newLocation']
+            strDestination = (self.__labwareNames[dicNewLocation['labwareId']] if 'labwareId' in dicNewLocation
+                              else repr(dicNewLocation['slotName']))
+            return [f"protocol.move_labware({self.__labwareNames[dicParams['labwareId']]}, {strDestination}, "
+                    f"use_gripper = {dicParams.get('strategy') == 'usingGripper'}, drop_offset = {dicParams.get('dropOffset')!r})"]
+
+        if strType in QUERY_COMMAND_TYPES:
+            return [f"# {strType} is only answered in live mode"]
+
+        raise Exception(f"Command {strType} cannot be compiled into a protocol.")
@@ -0,0 +1,318 @@
+import logging
+import time
+
+from .opentronsHTTPAPI_sessionRecorder import readSession
+
+LOGGER = logging.getLogger(__name__)
+
+# requests that only read state and are not re-sent
+_READ_ONLY_KINDS = ("getRunInfo", "getRunCommands", "commandStatus")
+
+# requests re-sent as is, with run IDs in their path remapped
+_REPLAYED_KINDS = ("labwareDefinition", "labwareOffset", "controlAction",
+                   "homeRobot", "lights")
+
+# commands whose labware or pipette is recorded on the client
+_LOAD_TYPES = ("loadLabware", "loadPipette")
+
+class replayDivergence:
+    '''
+    a difference between a recorded response and its replayed counterpart
+    '''
+
+    __slots__ = ("index", "requestKind", "commandType", "field", "recorded", "replayed")
+
+    def __init__(self, index, requestKind, commandType, field, recorded, replayed):
+        self.index = index
+        self.requestKind = requestKind
+        self.commandType = commandType
+        self.field = field
+        self.recorded = recorded
+        self.replayed = replayed
+
+    def __repr__(self):
+        return f"replayDivergence(#{self.index} {self.commandType} {self.field}: {self.recorded!r} -> {self.replayed!r})"
+
+    def toDict(self) -> dict:
+        return {strSlot: getattr(self, strSlot) for strSlot in self.__slots__}
+
+class replayReport:
+    '''
+    outcome of replaying a recorded session
+    '''
+
+    def __init__(self, strRunID, intRequests, intCommands, intSkipped, lstDivergences,
+                 fltSubmitSeconds, fltTotalSeconds, dicIDs):
+        self.runID = strRunID
+        self.requests = intRequests
+        self.commands = intCommands
+        self.skipped = intSkipped
+        self.divergences = lstDivergences
+        self.submitSeconds = fltSubmitSeconds
+        self.totalSeconds = fltTotalSeconds
+        # recorded ID -> replayed ID for runs, labware, pipettes and commands
+        self.ids = dicIDs
+
+    @property
+    def diverged(self) -> bool:
+        return bool(self.divergences)
+
+    @property
+    def commandsPerSecond(self) -> float:
+        return self.commands / self.totalSeconds if self.totalSeconds else 0.0
+
+    def toDict(self) -> dict:
+        return {"runId": self.runID,
+                "requests": self.requests,
+                "commands": self.commands,
+                "skipped": self.skipped,
+                "submitSeconds": self.submitSeconds,
+                "totalSeconds": self.totalSeconds,
+                "commandsPerSecond": self.commandsPerSecond,
+                "divergences": [divergence.toDict() for divergence in self.divergences]}
+
+    def formatReport(self,
+                     intMaxDivergences: int = 20) -> str:
+        lstLines = [f"replayed {self.requests} requests ({self.commands} commands, {self.skipped} read-only skipped) into run {self.runID}",
+                    f"submitted in {self.submitSeconds:.2f} s, completed in {self.totalSeconds:.2f} s ({self.commandsPerSecond:.1f} commands/s)",
+                    f"{len(self.divergences)} divergences"]
+        for divergence in self.divergences[:intMaxDivergences]:
+            lstLines.append(f"  #{divergence.index} {divergence.commandType} {divergence.field}: "
+                            f"recorded {divergence.recorded!r}, replayed {divergence.replayed!r}")
+        return "\n".join(lstLines)
+
+def _remap(value, dicIDs: dict):
+    '''
+    returns a copy of a request or response body with every recorded ID
+    replaced by its replayed counterpart
+    '''
+    if isinstance(value, str):
+        return dicIDs.get(value, value)
+    if isinstance(value, dict):
+        return {strKey: _remap(item, dicIDs) for strKey, item in value.items()}
+    if isinstance(value, list):
+        return [_remap(item, dicIDs) for item in value]
+    return value
+
+def _createdIDs(dicResult, dicParams: dict) -> list:
+    '''
+    returns the IDs a command result introduced, e.g. the labwareId of a
+    loadLabware that did not request a specific ID
+    '''
+    lstIDs = []
+    if isinstance(dicResult, dict):
+        for strKey, value in dicResult.items():
+            if strKey.endswith("Id") and isinstance(value, str) and value != dicParams.get(strKey):
+                lstIDs.append((strKey, value))
+    return lstIDs
+
+def _remapPath(strPath: str, dicIDs: dict, strRunID: str) -> str:
+    '''
+    rewrites the run ID of a recorded /runs/{id}/... path, every recorded run
+    being replayed into the client's run
+    '''
+    lstPath = strPath.split("/")
+    if len(lstPath) > 2 and lstPath[1] == "runs":
+        dicIDs.setdefault(lstPath[2], strRunID)
+        lstPath[2] = strRunID
+    return "/".join(lstPath)
+
+def _settle(command, fltTimeout: float):
+    '''
+    waits for a replayed command, a failure being reported as a divergence
+    rather than raised
+    '''
+    try:
+        command.wait(fltTimeout)
+    except TimeoutError:
+        raise
+    except Exception:
+        pass
+
+def _recordedCommandStates(strFilePath: str) -> dict:
+    '''
+    returns the last recorded state of every command, status polls of
+    pipelined commands included
+    '''
+    dicStates = {}
+    for dicLine in readSession(strFilePath):
+        if dicLine.get('k') in ("command", "commandStatus") and dicLine.get('s') in (200, 201):
+            dicData = dicLine['r']['data']
+            dicStates[dicData['id']] = dicData
+    return dicStates
+
+def replaySession(client,
+                  strFilePath: str,
+                  boolCompareResults: bool = True,
+                  fltTimeout: float = None) -> replayReport:
+    '''
+    re-executes a session recorded by sessionRecorder into the client's run
+    as fast as the robot allows and reports where the robot's responses
+    differ from the recorded ones
+
+    commands are posted without waiting for them to complete, except those
+    whose result introduces an ID (e.g. loadLabware) that later commands
+    refer to, and the commands preceding a control action. recorded run,
+    labware, pipette and command IDs are remapped to the replayed ones and the
+    loaded labware and pipettes are added to client.labware / client.pipettes
+
+    arguments
+    ----------
+    client: opentronsClient
+        the client whose run the session is replayed into
+
+    strFilePath: str
+        the recording
+
+    boolCompareResults: bool
+        whether command results are compared in addition to their status and
+        error type, which costs one request per command once the replay has
+        completed
+        default: True
+
+    fltTimeout: float
+        the maximum time to wait for a command in seconds, waits forever if
+        None
+        default: None
+
+    returns
+    ----------
+    report: replayReport
+        the replayed counts, timings, ID mapping and divergences
+    '''
+    dicRecorded = _recordedCommandStates(strFilePath)
+
+    dicIDs = {}
+    # (index, recorded command, handle) of every replayed command
+    lstReplayed = []
+    lstDivergences = []
+    # handles posted since the last barrier, with their intent
+    lstOutstanding = []
+    intRequests, intCommands, intSkipped = 0, 0, 0
+
+    # LOG - info
+    LOGGER.info(f"Replaying session {strFilePath} into run: {client.runID}")
+
+    fltStart = time.perf_counter()
+
+    for intIndex, dicLine in enumerate(readSession(strFilePath)):
+        if "session" in dicLine:
+            continue
+
+        strKind = dicLine['k']
+        if strKind == "createRun":
+            if dicLine['s'] == 201:
+                dicIDs[dicLine['r']['data']['id']] = client.runID
+            intSkipped += 1
+            continue
+        if strKind in _READ_ONLY_KINDS:
+            intSkipped += 1
+            continue
+
+        intRequests += 1
+
+        if strKind == "command":
+            dicBody = _remap(dicLine['b'], dicIDs)
+            try:
+                command = client.sendCommand(dicBody, boolWait = False)
+            except Exception as error:
+                if dicLine['s'] == 201:
+                    lstDivergences.append(replayDivergence(intIndex, strKind, dicLine['c'], "statusCode", 201, str(error)))
+                continue
+
+            intCommands += 1
+            if dicLine['s'] != 201:
+                lstDivergences.append(replayDivergence(intIndex, strKind, dicLine['c'], "statusCode", dicLine['s'], 201))
+                continue
+
+            strRecordedID = dicLine['r']['data']['id']
+            dicIDs[strRecordedID] = command.id
+            dicState = dicRecorded.get(strRecordedID, dicLine['r']['data'])
+            lstReplayed.append((intIndex, dicState, command))
+            lstOutstanding.append((command, dicBody['data'].get('intent')))
+
+            # later commands refer to the IDs this one creates
+            lstCreated = _createdIDs(dicState.get('result'), dicBody['data'].get('params', {}))
+            # loaded labware and pipettes are recorded on the client whether
+            # or not the recording preset their IDs
+            if lstCreated or dicBody['data']['commandType'] in _LOAD_TYPES:
+                _settle(command, fltTimeout)
+                for strKey, strID in lstCreated:
+                    if isinstance(command.result, dict) and strKey in command.result:
+                        dicIDs[strID] = command.result[strKey]
+                if command.status == "succeeded":
+                    client.recordLoadCommand(dicBody['data'], command.result)
+
+        elif strKind in _REPLAYED_KINDS:
+            strPath = _remapPath(dicLine['u'], dicIDs, client.runID)
+            dicBody = _remap(dicLine['b'], dicIDs)
+
+            if strKind == "controlAction":
+                # the recorded client saw every earlier command through before
+                # the action, except protocol commands that wait for a play
+                strAction = (dicBody or {}).get('data', {}).get('actionType')
+                lstWait = [command for command, strIntent in lstOutstanding
+                           if strAction != "play" or strIntent != "protocol"]
+                if lstWait:
+                    _settle(lstWait[-1], fltTimeout)
+                lstOutstanding = []
+
+            response = client.sendRequest("POST", strPath, dicBody = dicBody, strRequestKind = strKind)
+            if response.status_code != dicLine['s']:
+                lstDivergences.append(replayDivergence(intIndex, strKind, dicLine['c'], "statusCode", dicLine['s'], response.status_code))
+
+        else:
+            intSkipped += 1
+            # LOG - debug
+            LOGGER.debug(f"Skipping recorded request of kind: {strKind}")
+
+    fltSubmitSeconds = time.perf_counter() - fltStart
+
+    # the robot executes commands in order, so once the last one is done the
+    # states of every command can be collected in pages
+    if lstReplayed:
+        _settle(lstReplayed[-1][2], fltTimeout)
+
+    dicSummaries = {}
+    intCursor = 0
+    while lstReplayed:
+        dicPage = client.getRunCommands(intCursor = intCursor, intPageLength = 200)
+        for dicSummary in dicPage['data']:
+            dicSummaries[dicSummary['id']] = dicSummary
+        intCursor += len(dicPage['data'])
+        if not dicPage['data'] or intCursor >= dicPage['meta']['totalLength']:
+            break
+
+    for intIndex, dicState, command in lstReplayed:
+        dicSummary = dicSummaries.get(command.id)
+        if dicSummary is not None:
+            command.status = dicSummary.get('status')
+            command.error = dicSummary.get('error')
+
+        if boolCompareResults and dicState.get('result') is not None and command.result is None:
+            command.update(client.getCommand(command.id))
+
+        strType = dicState.get('commandType')
+        if dicState.get('status') in ("succeeded", "failed") and command.status != dicState['status']:
+            lstDivergences.append(replayDivergence(intIndex, "command", strType, "status", dicState['status'], command.status))
+            continue
+
+        strRecordedError = (dicState.get('error') or {}).get('errorType')
+        strReplayedError = (command.error or {}).get('errorType')
+        if strRecordedError != strReplayedError:
+            lstDivergences.append(replayDivergence(intIndex, "command", strType, "errorType", strRecordedError, strReplayedError))
+
+        if boolCompareResults and dicState.get('result') is not None:
+            dicExpected = _remap(dicState['result'], dicIDs)
+            if command.result != dicExpected:
+                lstDivergences.append(replayDivergence(intIndex, "command", strType, "result", dicExpected, command.result))
+
+    client.pendingCommands = [command for command in client.pendingCommands if not command.isComplete]
+
+    lstDivergences.sort(key = lambda divergence: divergence.index)
+    report = replayReport(client.runID, intRequests, intCommands, intSkipped, lstDivergences,
+                          fltSubmitSeconds, time.perf_counter() - fltStart, dicIDs)
+
+    # LOG - info
+    LOGGER.info(f"Replayed {intCommands} commands in {report.totalSeconds:.2f} s with {len(lstDivergences)} divergences")
+    return report
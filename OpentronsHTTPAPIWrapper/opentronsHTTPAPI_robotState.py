@@ -0,0 +1,162 @@
+import logging
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+# commands that leave the pipette over a well location
+WELL_COMMAND_TYPES = ("moveToWell", "aspirate", "dispense", "blowout", "pickUpTip", "dropTip", "liquidProbe")
+
+# commands that leave the pipette over an addressable area
+AREA_COMMAND_TYPES = ("moveToAddressableArea", "moveToAddressableAreaForDropTip")
+
+# movements that are elided when they would not move the gantry
+MOVE_COMMAND_TYPES = ("moveToWell", "moveToAddressableArea")
+
+# commands that do not move the gantry
+STATIC_COMMAND_TYPES = ("loadLabware", "loadPipette", "loadModule", "loadLiquid", "verifyTipPresence",
+                        "dropTipInPlace", "aspirateInPlace", "dispenseInPlace", "blowOutInPlace",
+                        "waitForDuration", "waitForResume", "comment", "configureForVolume")
+
+# commands after which the pipette holds no liquid
+EMPTYING_COMMAND_TYPES = ("blowout", "blowOutInPlace", "pickUpTip", "dropTip", "dropTipInPlace")
+
+def commandLocation(dicCommand: dict) -> tuple:
+    '''
+    the location a command leaves its pipette at as a hashable key, None if
+    it is not a movement this mirror models
+    '''
+    strType = dicCommand['commandType']
+    dicParams = dicCommand.get('params', {})
+    if strType in WELL_COMMAND_TYPES:
+        dicWellLocation = dicParams.get('wellLocation', {})
+        dicOffset = dicWellLocation.get('offset', {})
+        return ("well", dicParams.get('labwareId'), dicParams.get('wellName'), dicWellLocation.get('origin', "top"),
+                float(dicOffset.get('x', 0)), float(dicOffset.get('y', 0)), float(dicOffset.get('z', 0)))
+    if strType in AREA_COMMAND_TYPES:
+        dicOffset = dicParams.get('offset', {})
+        return ("area", strType, dicParams['addressableAreaName'], dicParams.get('minimumZHeight'),
+                bool(dicParams.get('stayAtHighestPossibleZ')),
+                float(dicOffset.get('x', 0)), float(dicOffset.get('y', 0)), float(dicOffset.get('z', 0)))
+    return None
+
+class robotStateMirror:
+    '''
+    what the client knows about the robot from the commands it sent: where
+    the gantry left the pipettes and how much liquid each pipette holds
+
+    the mirror is updated from every command that completed on the robot and
+    forgets the position after a failed command, a command still queued (when
+    pipelined) or one it does not model, so a move is only called redundant
+    when the last command provably left the same pipette at the same
+    location. with elision enabled such moves are skipped and counted
+
+    usage
+    ----------
+    client = opentronsClient(strRobotIP, boolElideRedundant = True)
+    client.moveToWell(strLabware, "A1", strPipette)
+    client.moveToWell(strLabware, "A1", strPipette)   # elided
+    client.state.volume(client.pipettes[strPipette]['id'])
+    client.state.report()
+    '''
+
+    def __init__(self,
+                 boolElide: bool = False):
+        '''
+        arguments
+        ----------
+        boolElide: bool
+            whether redundant commands are reported as such, otherwise the
+            state is only tracked
+            default: False
+
+        returns
+        ----------
+        None
+        '''
+        self.elide = boolElide
+        # (pipette ID, location key) of the last movement, None if unknown
+        self.position = None
+        # pipette ID -> uL held, missing if unknown
+        self.volumes = {}
+        # command type -> number of commands not sent
+        self.elided = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def elidedCount(self) -> int:
+        return sum(self.elided.values())
+
+    def volume(self,
+               strPipetteID: str) -> float:
+        '''
+        the volume a pipette holds in uL, None if unknown
+        '''
+        return self.volumes.get(strPipetteID)
+
+    def isRedundant(self,
+                    dicCommand: dict) -> bool:
+        '''
+        whether a movement command would leave the gantry where it is
+        '''
+        if not self.elide or dicCommand['commandType'] not in MOVE_COMMAND_TYPES:
+            return False
+        tupleLocation = commandLocation(dicCommand)
+        return tupleLocation is not None and self.position == (dicCommand['params'].get('pipetteId'), tupleLocation)
+
+    def countElided(self,
+                    strCommandType: str):
+        '''
+        counts a command that was answered or skipped without the robot
+        '''
+        with self.__lock:
+            self.elided[strCommandType] = self.elided.get(strCommandType, 0) + 1
+
+        # LOG - info
+        LOGGER.info(f"Elided redundant {strCommandType} ({self.elidedCount} elided so far)")
+
+    def observe(self,
+                dicCommand: dict):
+        '''
+        updates the mirror from a command as returned by the robot
+        '''
+        strType = dicCommand['commandType']
+        dicParams = dicCommand.get('params', {})
+        strPipetteID = dicParams.get('pipetteId')
+
+        with self.__lock:
+            if dicCommand.get('status') != "succeeded":
+                # where a failed command stopped is not known, nor whether a
+                # queued one will get there
+                if dicCommand.get('status') == "failed" or strType not in STATIC_COMMAND_TYPES:
+                    self.position = None
+                self.volumes.pop(strPipetteID, None)
+                return
+
+            tupleLocation = commandLocation(dicCommand)
+            if tupleLocation is not None:
+                self.position = (strPipetteID, tupleLocation)
+            elif strType not in STATIC_COMMAND_TYPES:
+                self.position = None
+
+            if strType in ("aspirate", "aspirateInPlace") and strPipetteID in self.volumes:
+                self.volumes[strPipetteID] += float(dicParams['volume'])
+            elif strType in ("dispense", "dispenseInPlace") and strPipetteID in self.volumes:
+                self.volumes[strPipetteID] = max(self.volumes[strPipetteID] - float(dicParams['volume']), 0.0)
+            elif strType in EMPTYING_COMMAND_TYPES:
+                self.volumes[strPipetteID] = 0.0
+            elif strType == "loadPipette":
+                self.volumes.pop((dicCommand.get('result') or {}).get('pipetteId', strPipetteID), None)
+
+    def invalidate(self):
+        '''
+        forgets the position, e.g. after the robot homed
+        '''
+        with self.__lock:
+            self.position = None
+
+    def report(self) -> dict:
+        '''
+        the commands elided by type and in total
+        '''
+        with self.__lock:
+            return {"elided": dict(self.elided), "total": sum(self.elided.values())}
@@ -0,0 +1,137 @@
+import logging
+
+from .opentronsHTTPAPI_instrumentation import parseTimestamp
+
+LOGGER = logging.getLogger(__name__)
+
+class commandGap:
+    '''
+    robot idle time between one command completing and the next one starting
+    '''
+
+    __slots__ = ("previousCommandID", "previousCommandType", "commandID",
+                 "commandType", "method", "seconds")
+
+    def __init__(self, previousCommandID, previousCommandType, commandID,
+                 commandType, method, seconds):
+        self.previousCommandID = previousCommandID
+        self.previousCommandType = previousCommandType
+        self.commandID = commandID
+        self.commandType = commandType
+        self.method = method
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"commandGap({self.previousCommandType} -> {self.commandType} via {self.method}, {self.seconds * 1000:.1f} ms)"
+
+class runIdleReport:
+    '''
+    idle time versus motion time of a run, with every gap attributed to the
+    client method that issued the command the robot was waiting for
+    '''
+
+    def __init__(self, strRunID, lstGaps, intCommands, fltMotionSeconds, fltWallSeconds):
+        self.runID = strRunID
+        self.gaps = lstGaps
+        self.commands = intCommands
+        self.motionSeconds = fltMotionSeconds
+        self.idleSeconds = sum(gap.seconds for gap in lstGaps)
+        self.wallSeconds = fltWallSeconds
+
+        # method -> {"gaps", "idleSeconds", "maxGapSeconds"}
+        self.byMethod = {}
+        for gap in lstGaps:
+            dicMethod = self.byMethod.setdefault(gap.method, {"gaps": 0, "idleSeconds": 0.0, "maxGapSeconds": 0.0})
+            dicMethod["gaps"] += 1
+            dicMethod["idleSeconds"] += gap.seconds
+            dicMethod["maxGapSeconds"] = max(dicMethod["maxGapSeconds"], gap.seconds)
+
+    @property
+    def idleFraction(self) -> float:
+        fltTotal = self.idleSeconds + self.motionSeconds
+        return self.idleSeconds / fltTotal if fltTotal else 0.0
+
+    def largestGaps(self,
+                    intCount: int = 10) -> list:
+        return sorted(self.gaps, key = lambda gap: gap.seconds, reverse = True)[:intCount]
+
+    def toDict(self) -> dict:
+        return {"runId": self.runID,
+                "commands": self.commands,
+                "motionSeconds": self.motionSeconds,
+                "idleSeconds": self.idleSeconds,
+                "wallSeconds": self.wallSeconds,
+                "idleFraction": self.idleFraction,
+                "byMethod": self.byMethod}
+
+    def formatReport(self) -> str:
+        lstLines = [f"run {self.runID}: {self.commands} commands over {self.wallSeconds:.2f} s",
+                    f"motion {self.motionSeconds:.2f} s, idle {self.idleSeconds:.2f} s ({self.idleFraction:.1%} idle)",
+                    f"{'method':<24}{'gaps':>7}{'idle (s)':>12}{'max gap (ms)':>15}"]
+        for strMethod, dicMethod in sorted(self.byMethod.items(), key = lambda item: -item[1]["idleSeconds"]):
+            lstLines.append(f"{str(strMethod):<24}{dicMethod['gaps']:>7}{dicMethod['idleSeconds']:>12.3f}"
+                            f"{dicMethod['maxGapSeconds'] * 1000:>15.1f}")
+        return "\n".join(lstLines)
+
+def analyzeRunIdleGaps(client,
+                       intPageLength: int = 200) -> runIdleReport:
+    '''
+    pulls the command history of the client's run and measures the robot's
+    idle time between consecutive commands
+
+    arguments
+    ----------
+    client: opentronsClient
+        the client whose run is analyzed, commands it issued are attributed to
+        the method that issued them (client.commandOrigins), others to None
+
+    intPageLength: int
+        the number of commands fetched per request
+        default: 200
+
+    returns
+    ----------
+    report: runIdleReport
+        the gaps, their per-method totals and the run's idle and motion time
+    '''
+    lstCommands = []
+    intCursor = 0
+    while True:
+        dicPage = client.getRunCommands(intCursor = intCursor, intPageLength = intPageLength)
+        lstCommands.extend(dicPage['data'])
+        intCursor += len(dicPage['data'])
+        if not dicPage['data'] or intCursor >= dicPage['meta']['totalLength']:
+            break
+
+    # LOG - info
+    LOGGER.info(f"Analyzing {len(lstCommands)} commands of run: {client.runID}")
+
+    lstGaps = []
+    fltMotionSeconds = 0.0
+    fltFirstStart, fltLastCompletion = None, None
+    dicPrevious, fltPreviousCompletion = None, None
+
+    for dicCommand in lstCommands:
+        # commands that never ran (e.g. failed while queued) did not use the robot
+        fltStart = parseTimestamp(dicCommand.get('startedAt'))
+        fltCompletion = parseTimestamp(dicCommand.get('completedAt'))
+        if fltStart is None or fltCompletion is None:
+            continue
+
+        fltMotionSeconds += fltCompletion - fltStart
+        if fltFirstStart is None:
+            fltFirstStart = fltStart
+        fltLastCompletion = fltCompletion
+
+        if dicPrevious is not None:
+            lstGaps.append(commandGap(dicPrevious['id'],
+                                      dicPrevious['commandType'],
+                                      dicCommand['id'],
+                                      dicCommand['commandType'],
+                                      client.commandOrigins.get(dicCommand['id']),
+                                      max(fltStart - fltPreviousCompletion, 0.0)))
+
+        dicPrevious, fltPreviousCompletion = dicCommand, fltCompletion
+
+    fltWallSeconds = 0.0 if fltFirstStart is None else fltLastCompletion - fltFirstStart
+    return runIdleReport(client.runID, lstGaps, len(lstCommands), fltMotionSeconds, fltWallSeconds)
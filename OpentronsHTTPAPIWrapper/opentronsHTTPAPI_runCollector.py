@@ -0,0 +1,240 @@
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+import requests
+
+from .opentronsHTTPAPI_instrumentation import parseTimestamp
+
+LOGGER = logging.getLogger(__name__)
+
+# run statuses in which the robot refuses to delete the run
+ACTIVE_RUN_STATUSES = ("running", "paused", "finishing", "stop-requested")
+
+class runCollector:
+    '''
+    deletes the runs that experiments leave behind on a robot, which
+    otherwise accumulate and slow the robot server down
+
+    clients given the collector track the runs they create and retire them
+    on close; the newest intKeepRuns retired runs are kept for inspection
+    (e.g. analyzeRunIdleGaps) and the older ones are finalized and deleted
+    in batches of intBatchSize. sweep removes runs left by processes that
+    crashed before retiring them
+
+    usage
+    ----------
+    collector = runCollector(strRobotIP, intKeepRuns = 5)
+    collector.sweep(fltMaxAge = 3600)
+    for experiment in lstExperiments:
+        with opentronsClient(strRobotIP, runCollector = collector) as client:
+            experiment(client)
+    collector.collect(boolAll = True)
+    '''
+
+    def __init__(self,
+                 strRobotIP: str,
+                 dicHeaders: dict = {"opentrons-version": "*"},
+                 intPort: int = 31950,
+                 intKeepRuns: int = 5,
+                 intBatchSize: int = 10):
+        '''
+        arguments
+        ----------
+        strRobotIP: str
+            the IP address of the robot
+
+        dicHeaders: dict
+            the headers to be used in the requests
+
+        intPort: int
+            the port the robot server listens on
+            default: 31950
+
+        intKeepRuns: int
+            the number of most recently retired runs that are not deleted
+            default: 5
+
+        intBatchSize: int
+            the number of runs beyond intKeepRuns that are collected at
+            once, so that deletion does not follow every experiment
+            default: 10
+
+        returns
+        ----------
+        None
+        '''
+        self.robotIP = strRobotIP
+        self.baseURL = f"http://{strRobotIP}:{intPort}"
+        self.headers = dicHeaders
+        self.keepRuns = intKeepRuns
+        self.batchSize = intBatchSize
+        self.session = requests.Session()
+
+        # run IDs in order of creation: in use and retired
+        self.activeRuns = []
+        self.retiredRuns = []
+        self.deletedRuns = []
+
+        self.__lock = threading.Lock()
+
+    def track(self,
+              strRunID: str):
+        '''
+        registers a run created by a client
+        '''
+        with self.__lock:
+            if strRunID not in self.activeRuns:
+                self.activeRuns.append(strRunID)
+
+    def retire(self,
+               strRunID: str):
+        '''
+        marks a tracked run as no longer used, collecting a batch of runs
+        once enough have been retired
+        '''
+        with self.__lock:
+            if strRunID in self.activeRuns:
+                self.activeRuns.remove(strRunID)
+            if strRunID not in self.retiredRuns:
+                self.retiredRuns.append(strRunID)
+            boolCollect = len(self.retiredRuns) >= self.keepRuns + self.batchSize
+
+        if boolCollect:
+            self.collect()
+
+    def collect(self,
+                boolAll: bool = False) -> list:
+        '''
+        finalizes and deletes the retired runs beyond the retention policy
+
+        arguments
+        ----------
+        boolAll: bool
+            whether to delete every retired run, e.g. at the end of the day
+            default: False
+
+        returns
+        ----------
+        lstDeleted: list
+            the IDs of the deleted runs
+        '''
+        with self.__lock:
+            intKeep = 0 if boolAll else self.keepRuns
+            lstRunIDs = self.retiredRuns[:max(len(self.retiredRuns) - intKeep, 0)]
+            self.retiredRuns = self.retiredRuns[len(lstRunIDs):]
+
+        lstDeleted = [strRunID for strRunID in lstRunIDs if self.deleteRun(strRunID)]
+        with self.__lock:
+            self.deletedRuns.extend(lstDeleted)
+            # runs the robot refused to delete are tried again next time
+            self.retiredRuns[:0] = [strRunID for strRunID in lstRunIDs if strRunID not in lstDeleted]
+
+        # LOG - info
+        LOGGER.info(f"Collected {len(lstDeleted)} of {len(lstRunIDs)} runs on {self.robotIP}")
+
+        return lstDeleted
+
+    def sweep(self,
+              fltMaxAge: float = 3600,
+              boolIncludeCurrent: bool = False) -> list:
+        '''
+        deletes untracked runs older than fltMaxAge, e.g. those left by a
+        process that crashed
+
+        arguments
+        ----------
+        fltMaxAge: float
+            the minimum age of a run to be deleted in seconds
+            default: 3600
+
+        boolIncludeCurrent: bool
+            whether the robot's current run is deleted too when it is not
+            running, finalizing it first
+            default: False
+
+        returns
+        ----------
+        lstDeleted: list
+            the IDs of the deleted runs
+        '''
+        response = self.session.get(url = f"{self.baseURL}/runs", headers = self.headers)
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to list runs.\nError code: {response.status_code}\n Error message: {response.text}")
+
+        fltNow = datetime.now(timezone.utc).timestamp()
+        with self.__lock:
+            setTracked = set(self.activeRuns) | set(self.retiredRuns)
+
+        lstDeleted = []
+        for dicRun in json.loads(response.text)['data']:
+            if dicRun['id'] in setTracked:
+                continue
+            if dicRun.get('current') and (not boolIncludeCurrent or dicRun.get('status') in ACTIVE_RUN_STATUSES):
+                continue
+            if fltNow - parseTimestamp(dicRun['createdAt']) < fltMaxAge:
+                continue
+            if self.deleteRun(dicRun['id'], boolCurrent = dicRun.get('current', False)):
+                lstDeleted.append(dicRun['id'])
+
+        with self.__lock:
+            self.deletedRuns.extend(lstDeleted)
+
+        # LOG - info
+        LOGGER.info(f"Swept {len(lstDeleted)} stale runs on {self.robotIP}")
+
+        return lstDeleted
+
+    def deleteRun(self,
+                  strRunID: str,
+                  boolCurrent: bool = True) -> bool:
+        '''
+        finalizes a run, stopping it if needed, and deletes it
+
+        arguments
+        ----------
+        strRunID: str
+            the ID of the run
+
+        boolCurrent: bool
+            whether the run may still be the robot's current run and has to
+            be finalized before it can be deleted
+            default: True
+
+        returns
+        ----------
+        boolDeleted: bool
+            whether the run is gone from the robot
+        '''
+        try:
+            if boolCurrent:
+                # archiving the run stops it and makes it deletable
+                self.session.patch(url = f"{self.baseURL}/runs/{strRunID}",
+                                   headers = self.headers,
+                                   data = json.dumps({"data": {"current": False}}))
+            response = self.session.delete(url = f"{self.baseURL}/runs/{strRunID}", headers = self.headers)
+        except requests.RequestException as error:
+            # LOG - warning
+            LOGGER.warning(f"Failed to delete run {strRunID}: {error}")
+            return False
+
+        if response.status_code in (200, 404):
+            return True
+
+        # LOG - warning
+        LOGGER.warning(f"Failed to delete run {strRunID}.\nError code: {response.status_code}\n Error message: {response.text}")
+        return False
+
+    def close(self):
+        '''
+        closes the connections to the robot
+        '''
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,264 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from .opentronsHTTPAPI_instrumentation import parseTimestamp
+from .opentronsHTTPAPI_runSync import runStateMirror
+
+LOGGER = logging.getLogger(__name__)
+
+# run statuses in which the robot has finished with the run
+TERMINAL_RUN_STATUSES = ("stopped", "failed", "succeeded")
+
+class runMonitor:
+    '''
+    follows a client's run on a background thread and reports progress and
+    errors through callbacks, without blocking the thread issuing commands
+
+    commands are followed incrementally with a runStateMirror. the polling
+    interval starts at fltMinInterval, doubles while nothing changes up to
+    fltMaxInterval and drops back as soon as something does
+
+    rates are measured on the robot's clock from the completedAt of every
+    command, so commands seen together after a long poll interval are not
+    lumped together; the local clock only tells where "now" is on the
+    robot's clock
+
+    usage
+    ----------
+    def onFailure(dicCommand):
+        print("failed:", dicCommand['commandType'], dicCommand['error'])
+
+    with runMonitor(client, funcOnFailure = onFailure) as monitor:
+        ...  # issue commands
+        print(monitor.commandsPerMinute, monitor.idleSeconds)
+    '''
+
+    def __init__(self,
+                 client,
+                 funcOnComplete = None,
+                 funcOnFailure = None,
+                 funcOnPause = None,
+                 funcOnStop = None,
+                 funcOnProgress = None,
+                 fltMinInterval: float = 0.1,
+                 fltMaxInterval: float = 2.0,
+                 fltWindow: float = 60.0,
+                 boolSkipHistory: bool = True):
+        '''
+        arguments
+        ----------
+        client: opentronsClient
+            the client whose run is followed
+
+        funcOnComplete: callable
+            called as funcOnComplete(dicCommand) when a command succeeds
+            default: None
+
+        funcOnFailure: callable
+            called as funcOnFailure(dicCommand) when a command fails
+            default: None
+
+        funcOnPause: callable
+            called as funcOnPause(dicRun) when the run is paused
+            default: None
+
+        funcOnStop: callable
+            called as funcOnStop(dicRun) when the run is stopped, fails or
+            succeeds, after which the monitor stops
+            default: None
+
+        funcOnProgress: callable
+            called as funcOnProgress(monitor) after every poll that saw a
+            change
+            default: None
+
+        fltMinInterval: float
+            the shortest time between polls in seconds
+            default: 0.1
+
+        fltMaxInterval: float
+            the longest time between polls in seconds
+            default: 2.0
+
+        fltWindow: float
+            the time over which commandsPerMinute is measured in seconds
+            default: 60.0
+
+        boolSkipHistory: bool
+            whether commands that finished before the monitor started are
+            left out of the callbacks and counts
+            default: True
+
+        returns
+        ----------
+        None
+        '''
+        self.client = client
+        self.onComplete = funcOnComplete
+        self.onFailure = funcOnFailure
+        self.onPause = funcOnPause
+        self.onStop = funcOnStop
+        self.onProgress = funcOnProgress
+        self.minInterval = fltMinInterval
+        self.maxInterval = fltMaxInterval
+        self.window = fltWindow
+        self.skipHistory = boolSkipHistory
+
+        self.mirror = runStateMirror(client, boolKeepCommands = False)
+        self.runStatus = None
+        self.completed = 0
+        self.failed = 0
+        self.interval = fltMinInterval
+
+        # robot times the commands within the window completed at
+        self.__completions = deque()
+        self.__lastCompletion = None
+        # local minus robot clock: the smallest difference between the time
+        # a completion was seen and its completedAt, None until one is seen
+        self.__clockOffset = None
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @property
+    def commandsPerMinute(self) -> float:
+        '''
+        the commands finished per minute over the last fltWindow seconds
+        '''
+        fltNow = self.__robotNow()
+        intRecent = sum(1 for fltCompletion in self.__completions if fltNow - fltCompletion <= self.window)
+        return intRecent * 60.0 / self.window
+
+    @property
+    def idleSeconds(self) -> float:
+        '''
+        the time the robot has been waiting for a command, 0 while one is
+        queued or running
+        '''
+        if not self.mirror.settled or self.__lastCompletion is None:
+            return 0.0
+        return max(self.__robotNow() - self.__lastCompletion, 0.0)
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self):
+        '''
+        starts following the run on a background thread
+        '''
+        if self.running:
+            return
+        if self.skipHistory:
+            self.mirror.sync()
+        self.__stop.clear()
+        self.__thread = threading.Thread(target = self.__follow, daemon = True)
+        self.__thread.start()
+
+        # LOG - info
+        LOGGER.info(f"Monitoring run: {self.client.runID}")
+
+    def stop(self):
+        '''
+        stops following the run after the current poll
+        '''
+        self.__stop.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def poll(self) -> bool:
+        '''
+        syncs the run once and raises the callbacks
+
+        arguments
+        ----------
+        None
+
+        returns
+        ----------
+        boolChanged: bool
+            whether anything changed since the last poll
+        '''
+        boolChanged = False
+
+        for dicCommand in self.mirror.sync():
+            boolChanged = True
+            if dicCommand['status'] == "succeeded":
+                self.completed += 1
+                self.__recordCompletion(dicCommand)
+                self.__call(self.onComplete, dicCommand)
+            elif dicCommand['status'] == "failed":
+                self.failed += 1
+                self.__recordCompletion(dicCommand)
+                self.__call(self.onFailure, dicCommand)
+
+        response = self.client.sendRequest("GET", f"/runs/{self.client.runID}", strRequestKind = "getRunInfo")
+        if response.status_code != 200:
+            raise Exception(f"Failed to get run information.\nError code: {response.status_code}\n Error message: {response.text}")
+        dicRun = json.loads(response.text)['data']
+        if dicRun['status'] != self.runStatus:
+            boolChanged = True
+            self.runStatus = dicRun['status']
+            if self.runStatus == "paused":
+                self.__call(self.onPause, dicRun)
+            elif self.runStatus in TERMINAL_RUN_STATUSES:
+                self.__call(self.onStop, dicRun)
+
+        if boolChanged:
+            self.__call(self.onProgress, self)
+        return boolChanged
+
+    def __follow(self):
+        # background thread
+        while not self.__stop.is_set():
+            try:
+                boolChanged = self.poll()
+            except Exception as error:
+                # LOG - warning
+                LOGGER.warning(f"Failed to poll run {self.client.runID}: {error}")
+                boolChanged = False
+
+            if self.runStatus in TERMINAL_RUN_STATUSES and self.mirror.settled:
+                break
+
+            # adaptive backoff while the run is quiet
+            self.interval = self.minInterval if boolChanged else min(self.interval * 2, self.maxInterval)
+            self.__stop.wait(self.interval)
+
+        # LOG - info
+        LOGGER.info(f"Stopped monitoring run: {self.client.runID}")
+
+    def __robotNow(self) -> float:
+        # the current time on the robot's clock
+        return time.time() - (self.__clockOffset or 0.0)
+
+    def __recordCompletion(self, dicCommand):
+        fltSeen = time.time()
+        fltCompletion = parseTimestamp(dicCommand.get('completedAt'))
+        if fltCompletion is None:
+            fltCompletion = self.__robotNow()
+        elif self.__clockOffset is None or fltSeen - fltCompletion < self.__clockOffset:
+            self.__clockOffset = fltSeen - fltCompletion
+
+        self.__completions.append(fltCompletion)
+        self.__lastCompletion = max(fltCompletion, self.__lastCompletion or fltCompletion)
+        while self.__completions and self.__lastCompletion - self.__completions[0] > self.window:
+            self.__completions.popleft()
+
+    def __call(self, funcCallback, argument):
+        if funcCallback is None:
+            return
+        try:
+            funcCallback(argument)
+        except Exception as error:
+            # LOG - error
+            LOGGER.error(f"Run monitor callback {funcCallback!r} failed: {error}")
@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+import time
+
+import requests
+
+LOGGER = logging.getLogger(__name__)
+
+class runPool:
+    '''
+    keeps a run pre-created on a robot so that a new opentronsClient gets a
+    ready run instead of waiting for POST /runs
+
+    the robot server has a single current run and creating a run retires the
+    previous one, so a robot holds one warm run at a time: it is created when
+    the pool starts and again in the background as soon as the client using
+    the last one releases it (opentronsClient.close does)
+
+    usage
+    ----------
+    pool = runPool(strRobotIP)
+    for experiment in lstExperiments:
+        with opentronsClient(strRobotIP, runPool = pool) as client:
+            experiment(client)
+    pool.close()
+    '''
+
+    def __init__(self,
+                 strRobotIP: str,
+                 dicHeaders: dict = {"opentrons-version": "*"},
+                 intPort: int = 31950,
+                 boolWarm: bool = True,
+                 fltRetryInterval: float = 0.5):
+        '''
+        arguments
+        ----------
+        strRobotIP: str
+            the IP address of the robot
+
+        dicHeaders: dict
+            the headers to be used in the requests
+
+        intPort: int
+            the port the robot server listens on
+            default: 31950
+
+        boolWarm: bool
+            whether to start creating the first run right away
+            default: True
+
+        fltRetryInterval: float
+            the time between attempts while the robot refuses a new run
+            because the previous one is still active, in seconds
+            default: 0.5
+
+        returns
+        ----------
+        None
+        '''
+        self.robotIP = strRobotIP
+        self.baseURL = f"http://{strRobotIP}:{intPort}"
+        self.headers = dicHeaders
+        self.retryInterval = fltRetryInterval
+        self.session = requests.Session()
+
+        # runs handed out ready (hits) and created on demand (misses)
+        self.hits = 0
+        self.misses = 0
+
+        self.__condition = threading.Condition()
+        self.__strWarmRunID = None
+        self.__strActiveRunID = None
+        self.__thread = None
+        self.__closed = False
+
+        if boolWarm:
+            self.warm()
+
+    def __createRun(self) -> str:
+        response = self.session.post(url = f"{self.baseURL}/runs", headers = self.headers)
+        if response.status_code != 201:
+            raise Exception(f"Failed to create a new run.\nError code: {response.status_code}\n Error message: {response.text}")
+        return json.loads(response.text)['data']['id']
+
+    def __warmRun(self):
+        # background thread: creates the next run once the robot accepts it
+        strRunID = None
+        while not self.__closed:
+            try:
+                response = self.session.post(url = f"{self.baseURL}/runs", headers = self.headers)
+            except requests.RequestException as error:
+                # LOG - warning
+                LOGGER.warning(f"Failed to warm a run on {self.robotIP}: {error}")
+                break
+            if response.status_code == 201:
+                strRunID = json.loads(response.text)['data']['id']
+                break
+            if response.status_code != 409:
+                # LOG - warning
+                LOGGER.warning(f"Failed to warm a run on {self.robotIP}.\nError code: {response.status_code}\n Error message: {response.text}")
+                break
+            # the released run is still active on the robot
+            time.sleep(self.retryInterval)
+
+        with self.__condition:
+            self.__thread = None
+            if strRunID is not None and not self.__closed:
+                self.__strWarmRunID = strRunID
+                # LOG - info
+                LOGGER.info(f"Warm run created on {self.robotIP} with ID: {strRunID}")
+            self.__condition.notify_all()
+
+        if strRunID is not None and self.__closed:
+            self.__deleteRun(strRunID)
+
+    def __deleteRun(self, strRunID):
+        try:
+            self.session.delete(url = f"{self.baseURL}/runs/{strRunID}", headers = self.headers)
+        except requests.RequestException as error:
+            # LOG - warning
+            LOGGER.warning(f"Failed to delete unused run {strRunID}: {error}")
+
+    def warm(self):
+        '''
+        starts creating a run in the background unless one is ready, being
+        created or in use
+        '''
+        with self.__condition:
+            if (self.__closed or self.__thread is not None or
+                    self.__strWarmRunID is not None or self.__strActiveRunID is not None):
+                return
+            self.__thread = threading.Thread(target = self.__warmRun, daemon = True)
+            self.__thread.start()
+
+    def acquire(self,
+                fltTimeout: float = None) -> str:
+        '''
+        hands out the warm run, waiting for it if it is being created, or
+        creates a run if none is warm
+
+        arguments
+        ----------
+        fltTimeout: float
+            the longest time to wait for a run being created in seconds,
+            waits forever if None
+            default: None
+
+        returns
+        ----------
+        strRunID: str
+            the ID of a new run that is current on the robot
+        '''
+        with self.__condition:
+            if self.__closed:
+                raise Exception("The run pool is closed.")
+            if self.__thread is not None:
+                if not self.__condition.wait_for(lambda: self.__thread is None, fltTimeout):
+                    raise TimeoutError(f"No run was created on {self.robotIP} within {fltTimeout} s.")
+
+            strRunID, self.__strWarmRunID = self.__strWarmRunID, None
+            if strRunID is not None:
+                self.hits += 1
+                self.__strActiveRunID = strRunID
+                return strRunID
+
+        self.misses += 1
+        strRunID = self.__createRun()
+        with self.__condition:
+            self.__strActiveRunID = strRunID
+        return strRunID
+
+    def release(self,
+                strRunID: str):
+        '''
+        marks a run handed out by acquire as done and warms the next one
+        '''
+        with self.__condition:
+            if strRunID != self.__strActiveRunID:
+                return
+            self.__strActiveRunID = None
+        self.warm()
+
+    def close(self):
+        '''
+        deletes the warm run, if any, and closes the connections to the robot
+        '''
+        with self.__condition:
+            self.__closed = True
+            strRunID, self.__strWarmRunID = self.__strWarmRunID, None
+            thread = self.__thread
+        if thread is not None:
+            thread.join()
+        if strRunID is not None:
+            self.__deleteRun(strRunID)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
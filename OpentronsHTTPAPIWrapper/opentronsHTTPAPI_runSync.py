@@ -0,0 +1,153 @@
+import logging
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+# command statuses that do not change anymore
+TERMINAL_COMMAND_STATUSES = ("succeeded", "failed")
+
+class runStateMirror:
+    '''
+    a local mirror of a run's commands, kept in sync incrementally
+
+    the robot runs commands in order and a finished command does not change
+    anymore, so the mirror keeps a cursor at the first unfinished command and
+    every sync only fetches the commands from there on: those still queued or
+    running and any added since. a sync of an idle run costs one small
+    request however long the run is
+
+    usage
+    ----------
+    mirror = runStateMirror(client)
+    for dicCommand in mirror.stream():
+        print(dicCommand['commandType'], dicCommand['status'])
+    '''
+
+    def __init__(self,
+                 client,
+                 intPageLength: int = 100,
+                 boolKeepCommands: bool = True):
+        '''
+        arguments
+        ----------
+        client: opentronsClient
+            the client whose run is mirrored
+
+        intPageLength: int
+            the number of commands fetched per request
+            default: 100
+
+        boolKeepCommands: bool
+            whether finished commands are kept in the mirror, when false only
+            the unfinished ones and the status counts are kept, so memory
+            does not grow with the run
+            default: True
+
+        returns
+        ----------
+        None
+        '''
+        self.client = client
+        self.pageLength = intPageLength
+        self.keepCommands = boolKeepCommands
+
+        # index of the first command that has not finished
+        self.cursor = 0
+        self.totalLength = 0
+        # status -> number of commands
+        self.counts = {}
+        # index -> command summary, from the cursor on unless kept
+        self.commands = {}
+
+    @property
+    def settled(self) -> bool:
+        '''
+        whether every command of the run known so far has finished
+        '''
+        return self.cursor >= self.totalLength
+
+    @property
+    def failed(self) -> list:
+        '''
+        the failed commands still held by the mirror
+        '''
+        return [dicCommand for dicCommand in self.commands.values() if dicCommand['status'] == "failed"]
+
+    def sync(self) -> list:
+        '''
+        fetches the commands from the cursor on and merges them into the
+        mirror
+
+        arguments
+        ----------
+        None
+
+        returns
+        ----------
+        lstChanged: list
+            the command summaries that are new or changed since the last sync,
+            in run order
+        '''
+        lstChanged = []
+        intIndex = self.cursor
+        while True:
+            dicPage = self.client.getRunCommands(intCursor = intIndex, intPageLength = self.pageLength)
+            self.totalLength = dicPage['meta']['totalLength']
+            for dicCommand in dicPage['data']:
+                dicPrevious = self.commands.get(intIndex)
+                if dicPrevious != dicCommand:
+                    if dicPrevious is not None:
+                        self.counts[dicPrevious['status']] -= 1
+                    self.counts[dicCommand['status']] = self.counts.get(dicCommand['status'], 0) + 1
+                    self.commands[intIndex] = dicCommand
+                    lstChanged.append(dicCommand)
+                intIndex += 1
+            if not dicPage['data'] or intIndex >= self.totalLength:
+                break
+
+        # advance past the commands that finished
+        while self.cursor in self.commands and self.commands[self.cursor]['status'] in TERMINAL_COMMAND_STATUSES:
+            if not self.keepCommands:
+                del self.commands[self.cursor]
+            self.cursor += 1
+
+        # LOG - debug
+        LOGGER.debug(f"Synced run {self.client.runID}: {len(lstChanged)} changed, cursor {self.cursor} of {self.totalLength}")
+
+        return lstChanged
+
+    def stream(self,
+               fltInterval: float = 0.5,
+               boolUntilSettled: bool = True,
+               fltTimeout: float = None):
+        '''
+        syncs repeatedly and yields every new or changed command summary
+
+        arguments
+        ----------
+        fltInterval: float
+            the time between syncs in seconds
+            default: 0.5
+
+        boolUntilSettled: bool
+            whether to stop once every command has finished, otherwise
+            streams until fltTimeout or the consumer stops
+            default: True
+
+        fltTimeout: float
+            the longest time to stream in seconds, forever if None
+            default: None
+
+        yields
+        ----------
+        dicCommand: dict
+            a command summary as returned by the robot
+        '''
+        fltDeadline = None if fltTimeout is None else time.monotonic() + fltTimeout
+        while True:
+            yield from self.sync()
+            if boolUntilSettled and self.settled:
+                return
+            if fltDeadline is not None and time.monotonic() >= fltDeadline:
+                return
+            time.sleep(fltInterval)
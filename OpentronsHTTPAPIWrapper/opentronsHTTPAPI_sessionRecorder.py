@@ -0,0 +1,196 @@
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .opentronsHTTPAPI_instrumentation import commandTiming
+
+LOGGER = logging.getLogger(__name__)
+
+# version of the line format written by sessionRecorder
+INT_RECORDING_FORMAT = 1
+
+# closing bracket of the JSON bodies embedded verbatim
+_BRACKETS = {"{": "}", "[": "]"}
+
+def _rawJson(strText: str) -> str:
+    '''
+    returns text that can be embedded in a JSON line as is - compact JSON
+    bodies are embedded verbatim without parsing them, judged by their
+    brackets only, readSession skips the line of a body that was not JSON
+    after all. anything else is embedded as a string
+    '''
+    if strText is None or strText == "":
+        return "null"
+    if _BRACKETS.get(strText[0]) == strText[-1] and "\n" not in strText:
+        return strText
+    try:
+        return json.dumps(json.loads(strText), separators = (",", ":"))
+    except ValueError:
+        return json.dumps(strText)
+
+class sessionRecorder:
+    '''
+    instrumentation hook streaming every request and response of a client to
+    an append-only, gzip compressed JSON lines file
+
+    every line is one request:
+        {"t": start, "dt": round trip, "k": request kind, "c": command type,
+         "m": method, "u": path, "q": query, "s": status code,
+         "b": request body, "r": response body}
+    and each recording starts with a header line {"session": {...}}
+
+    usage
+    ----------
+    client = opentronsClient(strRobotIP, strRecordingPath = "session.jsonl.gz")
+    or
+    client.startRecording("session.jsonl.gz")
+    '''
+
+    def __init__(self,
+                 strFilePath: str,
+                 intBufferSize: int = 1000,
+                 intCompressLevel: int = 6,
+                 dicSession: dict = None):
+        '''
+        opens the recording for appending
+
+        arguments
+        ----------
+        strFilePath: str
+            the file to append to
+
+        intBufferSize: int
+            the number of lines held in memory before they are compressed and
+            written out
+            default: 1000
+
+        intCompressLevel: int
+            the gzip compression level
+            default: 6
+
+        dicSession: dict
+            metadata written in the header line, e.g. robot and run
+            default: None
+
+        returns
+        ----------
+        None
+        '''
+        self.filePath = strFilePath
+        self.bufferSize = intBufferSize
+        self.recorded = 0
+
+        self.__buffer = []
+        self.__lock = threading.Lock()
+        # gzip files can hold several members, so appending keeps earlier
+        # recordings readable
+        self.__file = gzip.open(strFilePath, "ab", compresslevel = intCompressLevel)
+
+        # full buffers are compressed and written by a background thread, so
+        # the request that fills a buffer does not wait for the disk
+        self.__batches = queue.Queue()
+        self.__writer = threading.Thread(target = self.__write, name = "sessionRecorder", daemon = True)
+        self.__writer.start()
+
+        dicHeader = {"format": INT_RECORDING_FORMAT, "startedAt": time.time()}
+        dicHeader.update(dicSession or {})
+        self.__buffer.append(json.dumps({"session": dicHeader}))
+
+    def __call__(self,
+                 timing: commandTiming):
+        strLine = (f'{{"t":{timing.requestStart!r},"dt":{timing.roundTripSeconds!r},'
+                   f'"k":"{timing.requestKind}","c":{json.dumps(timing.commandType)},'
+                   f'"m":"{timing.method}","u":{json.dumps(urlsplit(timing.url).path)},'
+                   f'"q":{json.dumps(timing.params)},"s":{timing.statusCode},'
+                   f'"b":{_rawJson(timing.payload)},"r":{_rawJson(timing.responseText)}}}')
+
+        with self.__lock:
+            self.__buffer.append(strLine)
+            self.recorded += 1
+            if len(self.__buffer) >= self.bufferSize:
+                self.__flush()
+
+    def __flush(self):
+        # called with the lock held, hands the buffer to the writer
+        if self.__buffer and self.__file is not None:
+            self.__batches.put(self.__buffer)
+            self.__buffer = []
+
+    def __write(self):
+        # the only thread touching the file until close
+        while True:
+            lstBatch = self.__batches.get()
+            try:
+                if lstBatch is None:
+                    return
+                if lstBatch:
+                    self.__file.write(("\n".join(lstBatch) + "\n").encode("utf-8"))
+                else:
+                    # an empty batch asks for the file to be flushed
+                    self.__file.flush()
+            except Exception as error:
+                # LOG - error
+                LOGGER.error(f"Failed to write recording {self.filePath}: {error}")
+            finally:
+                self.__batches.task_done()
+
+    def flush(self):
+        '''
+        writes out the buffered lines and waits until they are on disk
+        '''
+        with self.__lock:
+            if self.__file is None:
+                return
+            self.__flush()
+            self.__batches.put([])
+        self.__batches.join()
+
+    def close(self):
+        '''
+        writes out the buffered lines and closes the file
+        '''
+        with self.__lock:
+            if self.__file is None:
+                return
+            self.__flush()
+            self.__batches.put(None)
+            self.__writer.join()
+            self.__file.close()
+            self.__file = None
+
+        # LOG - info
+        LOGGER.info(f"Recorded {self.recorded} requests to: {self.filePath}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def readSession(strFilePath: str):
+    '''
+    yields the lines of a recording as dictionaries, header lines included
+
+    arguments
+    ----------
+    strFilePath: str
+        the recording written by sessionRecorder
+
+    returns
+    ----------
+    generator of dict
+    '''
+    with gzip.open(strFilePath, "rt", encoding = "utf-8") as f:
+        for strLine in f:
+            if not strLine.strip():
+                continue
+            try:
+                yield json.loads(strLine)
+            except ValueError:
+                # a body that looked like JSON to the recorder but was not
+                # LOG - warning
+                LOGGER.warning(f"Skipping unreadable line of recording {strFilePath}: {strLine[:80]}")
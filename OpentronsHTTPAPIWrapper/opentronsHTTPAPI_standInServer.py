@@ -0,0 +1,675 @@
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LOGGER = logging.getLogger(__name__)
+
+# run statuses in which the robot has finished with the run
+TERMINAL_RUN_STATUSES = ("stopped", "failed", "succeeded")
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class _standInRun:
+    '''
+    state of a single run on the stand-in robot
+    '''
+
+    def __init__(self,
+                 strProtocolID: str = None):
+        self.id = str(uuid.uuid4())
+        # the uploaded protocol the run was created from, which the stand-in
+        # does not execute
+        self.protocolId = strProtocolID
+        self.createdAt = _timestamp()
+        self.startedAt = None
+        self.completedAt = None
+        self.status = "idle"
+        self.current = True
+        self.actions = []
+        self.errors = []
+        self.labware = []
+        self.pipettes = []
+        self.labwareOffsets = []
+        self.labwareDefinitions = {}
+        self.commands = []
+        self.commandsById = {}
+        self.queue = deque()
+        # pipette ID -> whether a tip is attached, used by verifyTipPresence
+        self.tips = {}
+
+    def toDict(self) -> dict:
+        return {
+            "id": self.id,
+            "ok": True,
+            "protocolId": self.protocolId,
+            "createdAt": self.createdAt,
+            "startedAt": self.startedAt,
+            "completedAt": self.completedAt,
+            "status": self.status,
+            "current": self.current,
+            "actions": self.actions,
+            "errors": self.errors,
+            "pipettes": self.pipettes,
+            "modules": [],
+            "labware": self.labware,
+            "labwareOffsets": self.labwareOffsets,
+            "liquids": [],
+            "hasEverEnteredErrorRecovery": False
+        }
+
+class standInRobotServer:
+    '''
+    in-process HTTP stand-in for the robot server endpoints used by
+    opentronsClient, for offline testing and benchmarking
+
+    usage
+    ----------
+    with standInRobotServer(fltCommandLatency = 0.01) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+    '''
+
+    def __init__(self,
+                 strHost: str = "127.0.0.1",
+                 intPort: int = 0,
+                 fltCommandLatency: float = 0.0,
+                 dicCommandLatency: dict = None,
+                 fltFailureRate: float = 0.0,
+                 lstFailingCommandTypes: list = None,
+                 intSeed: int = None,
+                 fltRequestLatency: float = 0.0):
+        '''
+        initializes the stand-in, the server starts listening on start()
+
+        arguments
+        ----------
+        strHost: str
+            the address to listen on
+            default: "127.0.0.1"
+
+        intPort: int
+            the port to listen on, 0 picks a free port
+            default: 0
+
+        fltCommandLatency: float
+            the simulated execution time of every command in seconds
+            default: 0.0
+
+        dicCommandLatency: dict
+            per command type execution times in seconds, overriding
+            fltCommandLatency, e.g. {"aspirate": 0.5}
+            default: None
+
+        fltFailureRate: float
+            the probability that any command fails
+            default: 0.0
+
+        lstFailingCommandTypes: list
+            command types that always fail
+            default: None
+
+        intSeed: int
+            the seed for failure injection
+            default: None
+
+        fltRequestLatency: float
+            the simulated network round trip added to every request in
+            seconds, without blocking other requests
+            default: 0.0
+
+        returns
+        ----------
+        None
+        '''
+        self.host = strHost
+        self.port = intPort
+        self.commandLatency = fltCommandLatency
+        self.commandLatencies = dict(dicCommandLatency or {})
+        self.failureRate = fltFailureRate
+        self.failingCommandTypes = set(lstFailingCommandTypes or [])
+        self.requestLatency = fltRequestLatency
+        self.lightsOn = False
+        self.runs = {}
+        # protocol ID -> uploaded protocol, with its files' contents
+        self.protocols = {}
+
+        self.__random = random.Random(intSeed)
+        self.__condition = threading.Condition()
+        self.__server = None
+        self.__threads = []
+        self.__running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        '''
+        starts serving requests on a background thread
+        '''
+        server = self
+
+        class handler(_standInRequestHandler):
+            standIn = server
+
+        self.__server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.__server.daemon_threads = True
+        self.port = self.__server.server_address[1]
+        self.__running = True
+
+        for target in (self.__server.serve_forever, self.__executeCommands):
+            thread = threading.Thread(target = target, daemon = True)
+            thread.start()
+            self.__threads.append(thread)
+
+        # LOG - info
+        LOGGER.info(f"Stand-in robot server listening on {self.host}:{self.port}")
+
+    def stop(self):
+        '''
+        stops serving requests
+        '''
+        with self.__condition:
+            self.__running = False
+            self.__condition.notify_all()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+
+    # *** run and command state ***
+
+    def createRun(self, dicBody = None):
+        with self.__condition:
+            strProtocolID = ((dicBody or {}).get('data') or {}).get('protocolId')
+            if strProtocolID is not None and strProtocolID not in self.protocols:
+                return 404, _errorBody("ProtocolNotFound", f"Protocol {strProtocolID} was not found.")
+            for run in self.runs.values():
+                if run.current and run.status in ("running", "paused", "finishing", "stop-requested"):
+                    return 409, _errorBody("RunAlreadyActive", f"Run {run.id} is currently active and must be stopped first.")
+            for run in self.runs.values():
+                run.current = False
+            run = _standInRun(strProtocolID)
+            self.runs[run.id] = run
+            return 201, {"data": run.toDict()}
+
+    def addProtocol(self, dicFiles):
+        with self.__condition:
+            if not dicFiles:
+                return 422, _errorBody("InvalidRequest", "No protocol files were uploaded.")
+            dicProtocol = {"id": str(uuid.uuid4()),
+                           "createdAt": _timestamp(),
+                           "protocolType": "python",
+                           "files": [{"name": strName, "role": "main" if intIndex == 0 else "labware"}
+                                     for intIndex, strName in enumerate(dicFiles)],
+                           "metadata": {}}
+            self.protocols[dicProtocol['id']] = dict(dicProtocol, source = dicFiles)
+            return 201, {"data": dicProtocol}
+
+    def getRun(self, strRunID):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            return 200, {"data": run.toDict(), "links": {}}
+
+    def listRuns(self):
+        with self.__condition:
+            lstRuns = [run.toDict() for run in self.runs.values()]
+            strCurrent = next((run.id for run in self.runs.values() if run.current), None)
+            dicLinks = {"current": {"href": f"/runs/{strCurrent}"}} if strCurrent else {}
+            return 200, {"data": lstRuns, "links": dicLinks}
+
+    def deleteRun(self, strRunID):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            if run.current and run.status in ("running", "paused", "finishing", "stop-requested"):
+                return 409, _errorBody("RunNotIdle", f"Run {strRunID} is active and cannot be deleted.")
+            del self.runs[strRunID]
+            return 200, {}
+
+    def patchRun(self, strRunID, dicBody):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            if dicBody.get('data', {}).get('current') is False:
+                run.current = False
+                if run.status not in TERMINAL_RUN_STATUSES:
+                    run.status = "stopped"
+                    run.completedAt = _timestamp()
+                    self.__failQueued(run, "RunStoppedError", "Run was archived.")
+            return 200, {"data": run.toDict()}
+
+    def addAction(self, strRunID, dicBody):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            strAction = dicBody.get('data', {}).get('actionType')
+            if not run.current or run.status in TERMINAL_RUN_STATUSES:
+                return 409, _errorBody("RunActionNotAllowed", f"Cannot {strAction} run {strRunID} with status {run.status}.")
+            if strAction == "play":
+                run.status = "running"
+                run.startedAt = run.startedAt or _timestamp()
+            elif strAction == "pause":
+                run.status = "paused"
+            elif strAction == "stop":
+                run.status = "stopped"
+                run.completedAt = _timestamp()
+                self.__failQueued(run, "RunStoppedError", "Run was stopped.")
+            else:
+                return 422, _errorBody("InvalidRequest", f"Unknown action: {strAction}")
+            dicAction = {"id": str(uuid.uuid4()), "createdAt": _timestamp(), "actionType": strAction}
+            run.actions.append(dicAction)
+            self.__condition.notify_all()
+            return 201, {"data": dicAction}
+
+    def addLabwareDefinition(self, strRunID, dicBody):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            dicDefinition = dicBody['data']
+            strURI = f"{dicDefinition['namespace']}/{dicDefinition['parameters']['loadName']}/{dicDefinition['version']}"
+            run.labwareDefinitions[strURI] = dicDefinition
+            return 201, {"data": {"definitionUri": strURI}}
+
+    def addLabwareOffset(self, strRunID, dicBody):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            dicOffset = {"id": str(uuid.uuid4()), "createdAt": _timestamp()}
+            dicOffset.update(dicBody['data'])
+            dicOffset['vector'] = {strAxis: float(fltValue) for strAxis, fltValue in dicOffset['vector'].items()}
+            run.labwareOffsets.append(dicOffset)
+            return 201, {"data": dicOffset}
+
+    def addCommand(self, strRunID, dicBody, boolWait, fltTimeout):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            if not run.current:
+                return 409, _errorBody("RunStopped", f"Run {strRunID} is not the current run.")
+            if run.status in TERMINAL_RUN_STATUSES:
+                return 409, _errorBody("RunStopped", f"Run {strRunID} has status {run.status}.")
+
+            dicRequest = dicBody['data']
+            dicCommand = {
+                "id": str(uuid.uuid4()),
+                "key": str(uuid.uuid4()),
+                "commandType": dicRequest['commandType'],
+                "createdAt": _timestamp(),
+                "startedAt": None,
+                "completedAt": None,
+                "status": "queued",
+                "params": dicRequest.get('params', {}),
+                "intent": dicRequest.get('intent', "setup"),
+                "result": None,
+                "error": None,
+                "notes": []
+            }
+            run.commands.append(dicCommand)
+            run.commandsById[dicCommand['id']] = dicCommand
+            run.queue.append(dicCommand)
+            self.__condition.notify_all()
+
+            if boolWait:
+                self.__waitForCommand(dicCommand, fltTimeout)
+            return 201, {"data": dict(dicCommand)}
+
+    def getCommand(self, strRunID, strCommandID, boolWait, fltTimeout):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            dicCommand = run.commandsById.get(strCommandID)
+            if dicCommand is None:
+                return 404, _errorBody("CommandNotFound", f"Command {strCommandID} was not found.")
+            if boolWait:
+                self.__waitForCommand(dicCommand, fltTimeout)
+            return 200, {"data": dict(dicCommand)}
+
+    def listCommands(self, strRunID, intCursor, intPageLength):
+        with self.__condition:
+            run = self.runs.get(strRunID)
+            if run is None:
+                return 404, _errorBody("RunNotFound", f"Run {strRunID} was not found.")
+            intTotal = len(run.commands)
+            if intCursor is None:
+                intCursor = max(intTotal - intPageLength, 0)
+            lstSummaries = [{strKey: dicCommand[strKey] for strKey in _COMMAND_SUMMARY_KEYS}
+                            for dicCommand in run.commands[intCursor:intCursor + intPageLength]]
+            dicLinks = {}
+            if run.commands:
+                dicLast = run.commands[-1]
+                dicLinks["current"] = {"href": f"/runs/{strRunID}/commands/{dicLast['id']}",
+                                       "meta": {"runId": strRunID,
+                                                "commandId": dicLast['id'],
+                                                "key": dicLast['key'],
+                                                "createdAt": dicLast['createdAt'],
+                                                "index": intTotal - 1}}
+            return 200, {"data": lstSummaries,
+                         "meta": {"cursor": intCursor, "totalLength": intTotal},
+                         "links": dicLinks}
+
+    def setLights(self, dicBody):
+        self.lightsOn = str(dicBody.get('on')).lower() == "true"
+        return 200, {"on": self.lightsOn}
+
+    def home(self, dicBody):
+        time.sleep(self.commandLatency)
+        return 200, {"message": "Homing robot.", "links": {}}
+
+    def __waitForCommand(self, dicCommand, fltTimeout):
+        # called with the condition held
+        fltDeadline = time.monotonic() + fltTimeout
+        while dicCommand['status'] in ("queued", "running"):
+            fltRemaining = fltDeadline - time.monotonic()
+            if fltRemaining <= 0:
+                return
+            self.__condition.wait(fltRemaining)
+
+    def __failQueued(self, run, strErrorType, strDetail):
+        # called with the condition held
+        while run.queue:
+            dicCommand = run.queue.popleft()
+            dicCommand['status'] = "failed"
+            dicCommand['completedAt'] = _timestamp()
+            dicCommand['error'] = _commandError(strErrorType, strDetail)
+        self.__condition.notify_all()
+
+    def __nextCommand(self):
+        # called with the condition held, setup commands run while the run is
+        # idle, protocol commands only once the run has been played
+        for run in self.runs.values():
+            if run.queue and run.status != "paused":
+                dicCommand = run.queue[0]
+                if dicCommand['intent'] == "setup" or run.status == "running":
+                    run.queue.popleft()
+                    return run, dicCommand
+        return None, None
+
+    def __executeCommands(self):
+        while True:
+            with self.__condition:
+                run, dicCommand = self.__nextCommand()
+                while self.__running and dicCommand is None:
+                    self.__condition.wait()
+                    run, dicCommand = self.__nextCommand()
+                if not self.__running:
+                    return
+                dicCommand['status'] = "running"
+                dicCommand['startedAt'] = _timestamp()
+
+            time.sleep(self.commandLatencies.get(dicCommand['commandType'], self.commandLatency))
+
+            with self.__condition:
+                if dicCommand['status'] == "running":
+                    self.__completeCommand(run, dicCommand)
+                self.__condition.notify_all()
+
+    def __completeCommand(self, run, dicCommand):
+        # called with the condition held
+        dicCommand['completedAt'] = _timestamp()
+        strType = dicCommand['commandType']
+        dicParams = dicCommand['params']
+
+        if strType in self.failingCommandTypes or self.__random.random() < self.failureRate:
+            dicCommand['status'] = "failed"
+            dicCommand['error'] = _commandError("InjectedFailure", f"Injected failure of {strType}.")
+            return
+
+        if strType == "verifyTipPresence":
+            boolHasTip = run.tips.get(dicParams.get('pipetteId'), False)
+            if boolHasTip != (dicParams.get('expectedState') == "present"):
+                dicCommand['status'] = "failed"
+                dicCommand['error'] = _commandError("TipAttachedError" if boolHasTip else "TipNotAttachedError",
+                                                    "Tip presence did not match the expected state.")
+                return
+
+        dicCommand['status'] = "succeeded"
+        dicCommand['result'] = self.__commandResult(run, strType, dicParams)
+
+    def __commandResult(self, run, strType, dicParams) -> dict:
+        # called with the condition held
+        dicPosition = _wellPosition(run, dicParams)
+
+        if strType == "loadLabware":
+            strURI = f"{dicParams['namespace']}/{dicParams['loadName']}/{dicParams['version']}"
+            dicLabware = {"id": dicParams.get('labwareId') or str(uuid.uuid4()),
+                          "loadName": dicParams['loadName'],
+                          "definitionUri": strURI,
+                          "location": dicParams['location']}
+            run.labware.append(dicLabware)
+            dicDefinition = run.labwareDefinitions.get(strURI) or {
+                "namespace": dicParams['namespace'],
+                "version": int(dicParams['version']),
+                "parameters": {"loadName": dicParams['loadName']}
+            }
+            return {"labwareId": dicLabware['id'], "definition": dicDefinition, "offsetId": None}
+
+        if strType == "loadPipette":
+            dicPipette = {"id": dicParams.get('pipetteId') or str(uuid.uuid4()),
+                          "pipetteName": dicParams['pipetteName'],
+                          "mount": dicParams['mount']}
+            run.pipettes = [dicPipette_temp for dicPipette_temp in run.pipettes
+                            if dicPipette_temp['mount'] != dicParams['mount']] + [dicPipette]
+            return {"pipetteId": dicPipette['id']}
+
+        if strType == "moveLabware":
+            for dicLabware in run.labware:
+                if dicLabware['id'] == dicParams['labwareId']:
+                    dicLabware['location'] = dicParams['newLocation']
+            return {"offsetId": None}
+
+        if strType == "pickUpTip":
+            run.tips[dicParams['pipetteId']] = True
+            return {"tipVolume": 300.0, "tipLength": 51.0, "tipDiameter": 5.2, "position": dicPosition}
+
+        if strType in ("dropTip", "dropTipInPlace"):
+            run.tips[dicParams['pipetteId']] = False
+            return {"position": dicPosition} if strType == "dropTip" else {}
+
+        if strType in ("aspirate", "dispense"):
+            return {"volume": float(dicParams['volume']), "position": dicPosition}
+
+        if strType == "liquidProbe":
+            return {"z_position": dicPosition['z'], "position": dicPosition}
+
+        if strType in ("blowout", "moveToWell", "moveToAddressableArea", "moveToAddressableAreaForDropTip"):
+            return {"position": dicPosition}
+
+        return {}
+
+def _slotOrigin(strSlot: str) -> tuple:
+    '''
+    front left corner of an OT-2 ("1" - "12") or Flex ("A1" - "D4") slot
+    '''
+    strSlot = str(strSlot)
+    if strSlot.isdigit():
+        intIndex = int(strSlot) - 1
+        return 132.5 * (intIndex % 3), 90.5 * (intIndex // 3)
+    if len(strSlot) == 2 and strSlot[0] in "ABCD" and strSlot[1].isdigit():
+        return 164.0 * (int(strSlot[1]) - 1), 107.0 * ("DCBA".index(strSlot[0]))
+    return 0.0, 0.0
+
+def _wellPosition(run, dicParams: dict) -> dict:
+    '''
+    deterministic position of the well a command targets, derived from the
+    slot its labware sits in and a 9 mm well pitch, so replayed commands
+    report the same positions as recorded ones
+    '''
+    strLabwareID = dicParams.get('labwareId')
+    strSlot, intDepth = None, 0
+    # follow stacked labware down to the slot
+    while strLabwareID is not None and intDepth < 8:
+        dicLabware = next((dicLabware for dicLabware in run.labware if dicLabware['id'] == strLabwareID), None)
+        if dicLabware is None:
+            break
+        dicLocation = dicLabware['location'] if isinstance(dicLabware['location'], dict) else {}
+        strSlot = dicLocation.get('slotName')
+        strLabwareID = dicLocation.get('labwareId')
+        intDepth += 1
+
+    fltX, fltY = _slotOrigin(strSlot) if strSlot is not None else (0.0, 0.0)
+    strWell = dicParams.get('wellName') or "A1"
+    intRow = ord(strWell[0].upper()) - ord("A")
+    intColumn = int(strWell[1:]) - 1 if strWell[1:].isdigit() else 0
+    dicOffset = (dicParams.get('wellLocation') or {}).get('offset') or {}
+    return {"x": fltX + 14.38 + 9.0 * intColumn + float(dicOffset.get('x', 0)),
+            "y": fltY + 74.24 - 9.0 * intRow + float(dicOffset.get('y', 0)),
+            "z": 10.0 * (intDepth or 1) + float(dicOffset.get('z', 0))}
+
+_COMMAND_SUMMARY_KEYS = ("id", "key", "commandType", "createdAt", "startedAt",
+                         "completedAt", "status", "params", "intent", "error", "notes")
+
+def _commandError(strErrorType: str, strDetail: str) -> dict:
+    return {"id": str(uuid.uuid4()),
+            "createdAt": _timestamp(),
+            "errorType": strErrorType,
+            "errorCode": "4000",
+            "detail": strDetail,
+            "errorInfo": {},
+            "wrappedErrors": []}
+
+def _multipartFiles(strContentType: str, bytBody: bytes) -> dict:
+    '''
+    the files of a multipart/form-data body as file name -> text
+    '''
+    message = BytesParser().parsebytes(f"Content-Type: {strContentType}\r\n\r\n".encode() + bytBody)
+    if not message.is_multipart():
+        raise ValueError("Request body is not multipart.")
+    return {part.get_filename(): part.get_payload(decode = True).decode()
+            for part in message.get_payload() if part.get_filename() is not None}
+
+def _errorBody(strErrorID: str, strDetail: str) -> dict:
+    return {"errors": [{"id": strErrorID, "title": strErrorID, "detail": strDetail, "errorCode": "4000"}]}
+
+class _standInRequestHandler(BaseHTTPRequestHandler):
+    '''
+    routes HTTP requests to the owning standInRobotServer
+    '''
+    protocol_version = "HTTP/1.1"
+    standIn = None
+
+    def setup(self):
+        super().setup()
+        # like the robot server, do not let Nagle's algorithm delay responses
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.__dispatch("GET")
+
+    def do_POST(self):
+        self.__dispatch("POST")
+
+    def do_PATCH(self):
+        self.__dispatch("PATCH")
+
+    def do_DELETE(self):
+        self.__dispatch("DELETE")
+
+    def __dispatch(self, strMethod):
+        url = urlparse(self.path)
+        dicQuery = {strKey: lstValues[-1] for strKey, lstValues in parse_qs(url.query).items()}
+        lstPath = [strPart for strPart in url.path.split("/") if strPart]
+
+        intLength = int(self.headers.get("Content-Length") or 0)
+        bytBody = self.rfile.read(intLength) if intLength else b""
+        strContentType = self.headers.get("Content-Type", "")
+        try:
+            if strContentType.startswith("multipart/form-data"):
+                dicBody = {"files": _multipartFiles(strContentType, bytBody)}
+            else:
+                dicBody = json.loads(bytBody) if bytBody else {}
+        except ValueError:
+            dicBody = None
+
+        if self.standIn.requestLatency:
+            time.sleep(self.standIn.requestLatency)
+
+        if dicBody is None:
+            intStatus, dicResponse = 422, _errorBody("InvalidRequest", "Request body is not valid JSON.")
+        else:
+            intStatus, dicResponse = self.__route(strMethod, lstPath, dicQuery, dicBody)
+
+        bytResponse = json.dumps(dicResponse).encode()
+        self.send_response(intStatus)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(bytResponse)))
+        self.end_headers()
+        self.wfile.write(bytResponse)
+
+    def __route(self, strMethod, lstPath, dicQuery, dicBody):
+        standIn = self.standIn
+        boolWait = dicQuery.get("waitUntilComplete", "false").lower() == "true"
+        fltTimeout = int(dicQuery.get("timeout", 30000)) / 1000
+
+        if lstPath == ["robot", "lights"] and strMethod == "POST":
+            return standIn.setLights(dicBody)
+        if lstPath == ["robot", "lights"] and strMethod == "GET":
+            return 200, {"on": standIn.lightsOn}
+        if lstPath == ["robot", "home"] and strMethod == "POST":
+            return standIn.home(dicBody)
+        if lstPath == ["health"] and strMethod == "GET":
+            return 200, {"name": "stand-in", "robot_model": "OT-2 Standard", "api_version": "stand-in"}
+
+        if lstPath == ["protocols"] and strMethod == "POST":
+            return standIn.addProtocol(dicBody.get('files'))
+
+        if not lstPath or lstPath[0] != "runs":
+            return 404, _errorBody("RouteNotFound", f"{strMethod} /{'/'.join(lstPath)} is not supported by the stand-in.")
+
+        if len(lstPath) == 1:
+            if strMethod == "POST":
+                return standIn.createRun(dicBody)
+            if strMethod == "GET":
+                return standIn.listRuns()
+
+        elif len(lstPath) == 2:
+            if strMethod == "GET":
+                return standIn.getRun(lstPath[1])
+            if strMethod == "DELETE":
+                return standIn.deleteRun(lstPath[1])
+            if strMethod == "PATCH":
+                return standIn.patchRun(lstPath[1], dicBody)
+
+        elif lstPath[2] == "commands":
+            if len(lstPath) == 3 and strMethod == "POST":
+                return standIn.addCommand(lstPath[1], dicBody, boolWait, fltTimeout)
+            if len(lstPath) == 3 and strMethod == "GET":
+                intCursor = int(dicQuery["cursor"]) if "cursor" in dicQuery else None
+                return standIn.listCommands(lstPath[1], intCursor, int(dicQuery.get("pageLength", 20)))
+            if len(lstPath) == 4 and strMethod == "GET":
+                return standIn.getCommand(lstPath[1], lstPath[3], boolWait, fltTimeout)
+
+        elif lstPath[2:] == ["actions"] and strMethod == "POST":
+            return standIn.addAction(lstPath[1], dicBody)
+        elif lstPath[2:] == ["labware_definitions"] and strMethod == "POST":
+            return standIn.addLabwareDefinition(lstPath[1], dicBody)
+        elif lstPath[2:] == ["labware_offsets"] and strMethod == "POST":
+            return standIn.addLabwareOffset(lstPath[1], dicBody)
+
+        return 404, _errorBody("RouteNotFound", f"{strMethod} /{'/'.join(lstPath)} is not supported by the stand-in.")
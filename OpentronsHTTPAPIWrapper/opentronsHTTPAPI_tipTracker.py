@@ -0,0 +1,434 @@
+import json
+import logging
+import os
+import re
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+def tipRackWells(intRows: int = 8,
+                 intColumns: int = 12) -> list:
+    '''
+    the wells of a tip rack in the order tips are taken: down each column,
+    column by column
+    '''
+    return [f"{chr(ord('A') + intRow)}{intColumn + 1}" for intColumn in range(intColumns) for intRow in range(intRows)]
+
+def pipetteChannels(strPipetteName: str) -> int:
+    '''
+    the number of channels of a pipette from its name, e.g.
+    "p300_multi_gen2" -> 8 and "flex_96channel_1000" -> 96
+    '''
+    if "96channel" in strPipetteName:
+        return 96
+    if re.search(r"multi|8channel", strPipetteName):
+        return 8
+    return 1
+
+class _rackGeometry:
+    '''
+    the well order of a tip rack type, shared by every rack of the type
+    '''
+
+    __slots__ = ("wells", "index", "rows", "full", "columnStarts")
+
+    # well order -> geometry
+    cache = {}
+
+    def __init__(self, tupleOrdering):
+        self.wells = tuple(strWell for tupleColumn in tupleOrdering for strWell in tupleColumn)
+        self.index = {strWell: intIndex for intIndex, strWell in enumerate(self.wells)}
+        self.rows = len(tupleOrdering[0])
+        self.full = (1 << len(self.wells)) - 1
+        # a bit at the first well of every column
+        self.columnStarts = sum(1 << (intColumn * self.rows) for intColumn in range(len(tupleOrdering)))
+
+    @classmethod
+    def get(cls, lstOrdering = None):
+        if lstOrdering is None:
+            lstOrdering = [tipRackWells()[intColumn * 8:intColumn * 8 + 8] for intColumn in range(12)]
+        tupleOrdering = tuple(tuple(lstColumn) for lstColumn in lstOrdering)
+        geometry = cls.cache.get(tupleOrdering)
+        if geometry is None:
+            geometry = cls.cache[tupleOrdering] = cls(tupleOrdering)
+        return geometry
+
+class tipManager:
+    '''
+    tracks the tips left in every tip rack as a bitmap and whether each
+    pipette holds a tip, so tips are allocated without a list of used wells
+    and tip presence is answered without asking the robot
+
+    bit i of a rack's bitmap is set while the i-th tip in the rack's order
+    (down each column, column by column) is available, so the next tip is the
+    lowest set bit and the next full column for a multichannel pipette the
+    lowest column whose bits are all set
+
+    with a file the rack state is read back when a client is created, so
+    partly used racks carry over to new runs as long as they keep their
+    names (load name and slot). changes are written in the background at
+    most once per fltSaveDelay, and right away by save, which the client
+    calls on close and with every checkpoint
+
+    usage
+    ----------
+    client = opentronsClient(strRobotIP, strTipStatePath = "tips.json")
+    client.pickUpTip(strTipRack, strPipetteName)   # takes the next tip
+    client.tips.count(strTipRack)
+    client.tips.reset(strTipRack)                  # after refilling the rack
+    '''
+
+    def __init__(self,
+                 strFilePath: str = None,
+                 fltSaveDelay: float = 1.0):
+        '''
+        arguments
+        ----------
+        strFilePath: str
+            the file the rack state is kept in, memory only if None
+            default: None
+
+        fltSaveDelay: float
+            the time a change waits to be written to the file in seconds,
+            together with the changes made meanwhile
+            default: 1.0
+
+        returns
+        ----------
+        None
+        '''
+        # the file is only known once it is read, so reading it is not a change
+        self.filePath = None
+        self.saveDelay = fltSaveDelay
+        # rack name -> (geometry, bitmap of available tips)
+        self.__racks = {}
+        # pipette name -> whether it holds a tip
+        self.__pipettes = {}
+        self.__lock = threading.RLock()
+        # held while the file is written, so writes keep the order of changes
+        self.__writeLock = threading.Lock()
+        self.__dirty = False
+        self.__timer = None
+
+        if strFilePath is not None and os.path.exists(strFilePath):
+            with open(strFilePath, "r") as file:
+                self.restore(json.load(file))
+
+            # LOG - info
+            LOGGER.info(f"Tip state read from: {strFilePath}")
+        self.filePath = strFilePath
+
+    def __contains__(self, strName) -> bool:
+        return strName in self.__racks
+
+    def __repr__(self):
+        return f"tipManager({ {strName: self.count(strName) for strName in self.__racks} })"
+
+    @property
+    def racks(self) -> list:
+        return list(self.__racks)
+
+    # *** racks ***
+
+    def addRack(self,
+                strName: str,
+                lstOrdering: list = None,
+                boolReplace: bool = False):
+        '''
+        starts tracking a tip rack, full unless its state is already known
+
+        arguments
+        ----------
+        strName: str
+            the name of the tip rack labware
+
+        lstOrdering: list
+            the wells of the rack as lists of columns, as in the "ordering"
+            of its definition, a 96 tip rack if None
+            default: None
+
+        boolReplace: bool
+            whether a known state of the rack is replaced by a full rack
+            default: False
+
+        returns
+        ----------
+        None
+        '''
+        with self.__lock:
+            if strName in self.__racks and not boolReplace:
+                return
+            geometry = _rackGeometry.get(lstOrdering)
+            self.__racks[strName] = (geometry, geometry.full)
+            self.__changed()
+
+    def removeRack(self,
+                   strName: str):
+        with self.__lock:
+            self.__racks.pop(strName, None)
+            self.__changed()
+
+    def renameRack(self,
+                   strName: str,
+                   strNewName: str):
+        with self.__lock:
+            self.__racks[strNewName] = self.__racks.pop(strName)
+            self.__changed()
+
+    def reset(self,
+              strName: str = None):
+        '''
+        marks every tip of a rack, or of every rack if None, as available
+        '''
+        with self.__lock:
+            for strRack in ([strName] if strName is not None else list(self.__racks)):
+                geometry, intAvailable = self.__racks[strRack]
+                self.__racks[strRack] = (geometry, geometry.full)
+            self.__changed()
+
+    def count(self,
+              strName: str) -> int:
+        '''
+        the number of tips left in a rack
+        '''
+        return bin(self.__racks[strName][1]).count("1")
+
+    def available(self,
+                  strName: str) -> list:
+        '''
+        the wells of a rack that still hold tips, in the order they are taken
+        '''
+        geometry, intAvailable = self.__racks[strName]
+        return [strWell for intIndex, strWell in enumerate(geometry.wells) if intAvailable >> intIndex & 1]
+
+    def used(self,
+             strName: str) -> list:
+        '''
+        the wells of a rack whose tips were taken
+        '''
+        geometry, intAvailable = self.__racks[strName]
+        return [strWell for intIndex, strWell in enumerate(geometry.wells) if not intAvailable >> intIndex & 1]
+
+    def isAvailable(self,
+                    strName: str,
+                    strWellName: str) -> bool:
+        geometry, intAvailable = self.__racks[strName]
+        return bool(intAvailable >> geometry.index[strWellName] & 1)
+
+    # *** allocation ***
+
+    def __nextIndex(self, geometry, intAvailable, intChannels):
+        if intChannels == 1:
+            if not intAvailable:
+                return None
+            return (intAvailable & -intAvailable).bit_length() - 1
+        if intChannels >= len(geometry.wells):
+            return 0 if intAvailable == geometry.full else None
+        # columns whose first intChannels tips are all available
+        intColumns = geometry.columnStarts
+        for intShift in range(intChannels):
+            intColumns &= intAvailable >> intShift
+        if not intColumns:
+            return None
+        return (intColumns & -intColumns).bit_length() - 1
+
+    def __mask(self, geometry, intIndex, intChannels):
+        # the tips taken by a pick up at intIndex
+        if intChannels >= len(geometry.wells):
+            return geometry.full
+        intCount = min(intChannels, geometry.rows - intIndex % geometry.rows)
+        return ((1 << intCount) - 1) << intIndex
+
+    def nextTip(self,
+                strName: str = None,
+                intChannels: int = 1) -> tuple:
+        '''
+        the next available tip, or full column or rack for multichannel
+        pipettes, without taking it
+
+        arguments
+        ----------
+        strName: str
+            the rack to take from, the first rack with tips left if None
+            default: None
+
+        intChannels: int
+            the channels of the pipette: 1, 8 or 96
+            default: 1
+
+        returns
+        ----------
+        tupleTip: tuple
+            (rack name, well name), the first well of the column or rack for
+            multichannel pipettes
+        '''
+        with self.__lock:
+            if strName is not None and strName not in self.__racks:
+                # a rack not recognised as one when it was loaded
+                self.addRack(strName)
+            for strRack in ([strName] if strName is not None else self.__racks):
+                geometry, intAvailable = self.__racks[strRack]
+                intIndex = self.__nextIndex(geometry, intAvailable, intChannels)
+                if intIndex is not None:
+                    return strRack, geometry.wells[intIndex]
+        raise Exception(f"No {'tips' if intChannels == 1 else f'{intChannels} tips in a row'} left in "
+                        f"{'tip rack ' + strName if strName is not None else 'any tip rack'}.")
+
+    def allocationOrder(self,
+                        strName: str,
+                        intChannels: int = 1) -> list:
+        '''
+        the wells successive pick ups would take from a rack until it runs
+        out, one per pick up, without taking them
+        '''
+        with self.__lock:
+            if strName not in self.__racks:
+                self.addRack(strName)
+            geometry, intAvailable = self.__racks[strName]
+        lstWells = []
+        while (intIndex := self.__nextIndex(geometry, intAvailable, intChannels)) is not None:
+            lstWells.append(geometry.wells[intIndex])
+            intAvailable &= ~self.__mask(geometry, intIndex, intChannels)
+        return lstWells
+
+    def use(self,
+            strName: str,
+            strWellName: str,
+            intChannels: int = 1):
+        '''
+        marks a tip, and the tips below it for multichannel pipettes, as taken
+        '''
+        with self.__lock:
+            geometry, intAvailable = self.__racks[strName]
+            intMask = self.__mask(geometry, geometry.index[strWellName], intChannels)
+            if intAvailable & intMask != intMask:
+                # LOG - warning
+                LOGGER.warning(f"Tip {strWellName} of rack {strName} is taken again although it was used")
+            if intAvailable & intMask:
+                self.__racks[strName] = (geometry, intAvailable & ~intMask)
+                self.__changed()
+
+    # *** pipettes ***
+
+    def pickedUp(self,
+                 strPipetteName: str,
+                 strName: str,
+                 strWellName: str,
+                 intChannels: int = 1,
+                 boolConfirmed: bool = True):
+        '''
+        records a tip picked up by a pipette. the well is marked used even
+        when the pick up is still queued (boolConfirmed false): if it fails
+        whether the tip is still in the rack is not known. whether the
+        pipette holds a tip is then left unknown until the command completes
+        '''
+        with self.__lock:
+            if strName not in self.__racks:
+                self.addRack(strName)
+            self.use(strName, strWellName, intChannels)
+            if boolConfirmed:
+                self.__pipettes[strPipetteName] = True
+            else:
+                self.__pipettes.pop(strPipetteName, None)
+
+    def dropped(self,
+                strPipetteName: str,
+                boolConfirmed: bool = True):
+        '''
+        records a pipette dropping its tip, leaves it unknown while the drop
+        is still queued (boolConfirmed false)
+        '''
+        with self.__lock:
+            if boolConfirmed:
+                self.__pipettes[strPipetteName] = False
+            else:
+                self.__pipettes.pop(strPipetteName, None)
+
+    def forgetPipettes(self):
+        '''
+        forgets which pipettes hold a tip, e.g. after a queued command failed
+        '''
+        with self.__lock:
+            self.__pipettes.clear()
+
+    def setTip(self,
+               strPipetteName: str,
+               boolHasTip: bool):
+        '''
+        records whether a pipette holds a tip, e.g. as verified by the robot
+        '''
+        with self.__lock:
+            self.__pipettes[strPipetteName] = boolHasTip
+
+    def hasTip(self,
+               strPipetteName: str) -> bool:
+        '''
+        whether a pipette holds a tip, None if no pick up, drop or check was
+        seen for it
+        '''
+        return self.__pipettes.get(strPipetteName)
+
+    # *** state ***
+
+    def toDict(self,
+               boolPipettes: bool = True) -> dict:
+        '''
+        the state as plain JSON types: per rack the available bitmap as hex,
+        and its well order when it is not a 96 tip rack
+        '''
+        with self.__lock:
+            geometryDefault = _rackGeometry.get()
+            dicRacks = {}
+            for strName, (geometry, intAvailable) in self.__racks.items():
+                dicRack = {"available": hex(intAvailable)}
+                if geometry is not geometryDefault:
+                    dicRack['ordering'] = [list(geometry.wells[intIndex:intIndex + geometry.rows])
+                                           for intIndex in range(0, len(geometry.wells), geometry.rows)]
+                dicRacks[strName] = dicRack
+            dicState = {"racks": dicRacks}
+            if boolPipettes:
+                dicState['pipettes'] = dict(self.__pipettes)
+            return dicState
+
+    def restore(self,
+                dicState: dict):
+        '''
+        replaces the state of the racks and pipettes in dicState by it
+        '''
+        with self.__lock:
+            for strName, dicRack in dicState.get('racks', {}).items():
+                geometry = _rackGeometry.get(dicRack.get('ordering'))
+                self.__racks[strName] = (geometry, int(dicRack['available'], 16) & geometry.full)
+            self.__pipettes.update(dicState.get('pipettes', {}))
+            self.__changed()
+
+    def __changed(self):
+        # called with the lock held, the write is deferred so the changes of
+        # a burst of pick ups are written together
+        if self.filePath is None:
+            return
+        self.__dirty = True
+        if self.__timer is None:
+            self.__timer = threading.Timer(self.saveDelay, self.save)
+            self.__timer.start()
+
+    def save(self):
+        '''
+        writes the rack state to the file now if it changed since it was
+        last written
+        '''
+        with self.__writeLock:
+            with self.__lock:
+                if self.__timer is not None:
+                    self.__timer.cancel()
+                    self.__timer = None
+                if not self.__dirty or self.filePath is None:
+                    return
+                self.__dirty = False
+                # which pipette holds a tip is not carried over to new runs
+                strState = json.dumps(self.toDict(boolPipettes = False), separators = (",", ":"))
+
+            strTempPath = f"{self.filePath}.tmp"
+            with open(strTempPath, "w") as file:
+                file.write(strState)
+            os.replace(strTempPath, self.filePath)
@@ -0,0 +1,265 @@
+import logging
+import math
+import re
+from typing import Literal, Union
+
+from .opentronsHTTPAPI_pathOptimizer import optimizeVisitOrder, wellPosition
+from .opentronsHTTPAPI_tipTracker import pipetteChannels, tipRackWells
+
+LOGGER = logging.getLogger(__name__)
+
+# estimated duration of each command in seconds, without the liquid flow
+DEFAULT_COMMAND_SECONDS = {"pickUpTip": 5.0,
+                           "aspirate": 1.5,
+                           "dispense": 1.5,
+                           "blowout": 1.0,
+                           "dropTip": 4.0}
+
+# commands the robot runs for each client method
+COMMANDS_PER_METHOD = {"dropTip": 2}
+
+def pipetteMaxVolume(strPipetteName: str) -> float:
+    '''
+    the maximum volume of a pipette from its name, e.g. "p300_single_gen2" -> 300
+    '''
+    match = re.match(r"p(\d+)", strPipetteName)
+    if match is None:
+        raise Exception(f"Cannot tell the volume of pipette {strPipetteName}, pass fltMaxVolume.")
+    return float(match.group(1))
+
+class transferPlan:
+    '''
+    the client method calls planned for a transfer, with their command count
+    and estimated duration, to be checked before they are executed
+    '''
+
+    def __init__(self, lstSteps, intTransfers, dicCommandSeconds, fltFlowRate):
+        # (client method name, keyword arguments)
+        self.steps = lstSteps
+        self.transfers = intTransfers
+        # what the calls returned, once executed
+        self.results = None
+        self.tips = sum(1 for strMethod, dicArguments in lstSteps if strMethod == "pickUpTip")
+        self.aspirates = sum(1 for strMethod, dicArguments in lstSteps if strMethod == "aspirate")
+        self.commandCount = sum(COMMANDS_PER_METHOD.get(strMethod, 1) for strMethod, dicArguments in lstSteps)
+
+        self.estimatedSeconds = 0.0
+        for strMethod, dicArguments in lstSteps:
+            self.estimatedSeconds += dicCommandSeconds.get(strMethod, 0.0)
+            if 'intVolume' in dicArguments:
+                self.estimatedSeconds += dicArguments['intVolume'] / fltFlowRate
+
+    def __repr__(self):
+        return (f"transferPlan({self.transfers} transfers, {self.commandCount} commands, {self.tips} tips, "
+                f"{self.aspirates} aspirates, ~{self.estimatedSeconds:.0f} s)")
+
+    def formatReport(self) -> str:
+        lstLines = [repr(self)]
+        for strMethod, dicArguments in self.steps:
+            lstLines.append(f"  {strMethod}({', '.join(f'{strKey}={value!r}' for strKey, value in dicArguments.items())})")
+        return "\n".join(lstLines)
+
+    def execute(self,
+                client) -> list:
+        '''
+        calls the planned methods on a client
+
+        arguments
+        ----------
+        client: opentronsClient
+            the client to run the plan with
+
+        returns
+        ----------
+        lstCommands: list
+            what every call returned, command handles for most of them
+        '''
+        # LOG - info
+        LOGGER.info(f"Executing {self!r}")
+        return [getattr(client, strMethod)(**dicArguments) for strMethod, dicArguments in self.steps]
+
+def planTransfer(lstSources: list,
+                 lstDestinations: list,
+                 volumes: Union[float, list],
+                 strPipetteName: str,
+                 strTipRack: str,
+                 strTipPolicy: Literal["once", "perSource", "always"] = "perSource",
+                 fltMaxVolume: float = None,
+                 fltDisposalVolume: float = 0,
+                 boolMultiDispense: bool = True,
+                 boolReorder: bool = True,
+                 lstTipWells: list = None,
+                 fltFlowRate: float = 274.7,
+                 dicCommandSeconds: dict = None,
+                 funcPosition = None,
+                 fltTimeBudget: float = 0.1) -> transferPlan:
+    '''
+    plans the pickUpTip / aspirate / dispense / dropTip calls that move
+    liquid from each source to its destination with as few tips and
+    aspirates as the policy allows
+
+    arguments
+    ----------
+    lstSources: list
+        (labware name, well name) to aspirate from, one per transfer, or a
+        single one for all of them
+
+    lstDestinations: list
+        (labware name, well name) to dispense into, one per transfer
+
+    volumes: float or list
+        the volume of each transfer in uL, or one volume for all of them
+
+    strPipetteName: str
+        the name of the pipette
+
+    strTipRack: str
+        the name of the tip rack labware
+
+    strTipPolicy: str
+        when a new tip is used: "once" for the whole transfer, "perSource"
+        when the source changes, "always" for every aspirate
+        default: "perSource"
+
+    fltMaxVolume: float
+        the volume the pipette holds, read from its name if None
+        default: None
+
+    fltDisposalVolume: float
+        extra volume aspirated for a multi-dispense and blown out into the
+        source afterwards
+        default: 0
+
+    boolMultiDispense: bool
+        whether one aspirate may serve several destinations of the same
+        source
+        default: True
+
+    boolReorder: bool
+        whether the transfers may be reordered: grouped by source and
+        visiting destinations column by column in a serpentine, which
+        assumes they do not depend on each other
+        default: True
+
+    lstTipWells: list
+        the wells to pick up tips from, in the order to use them, the first
+        well of each column for multichannel pipettes, a full 96 tip rack if
+        None
+        default: None
+
+    fltFlowRate: float
+        the aspirate and dispense flow rate in uL/s
+        default: 274.7
+
+    dicCommandSeconds: dict
+        estimated seconds per client method, see DEFAULT_COMMAND_SECONDS
+        default: None
+
+    funcPosition: callable
+        funcPosition(strLabwareName, strWellName) -> (x, y) on the deck, when
+        given the destinations of each source are reordered to shorten the
+        gantry's path from the source through them instead of a serpentine
+        default: None
+
+    fltTimeBudget: float
+        the time the reordering of each source's destinations may take in
+        seconds
+        default: 0.1
+
+    returns
+    ----------
+    plan: transferPlan
+        the planned calls
+    '''
+    if len(lstSources) == 1:
+        lstSources = list(lstSources) * len(lstDestinations)
+    if not isinstance(volumes, (list, tuple)):
+        volumes = [volumes] * len(lstDestinations)
+    if not len(lstSources) == len(lstDestinations) == len(volumes):
+        raise Exception(f"Got {len(lstSources)} sources, {len(lstDestinations)} destinations and {len(volumes)} volumes.")
+
+    fltMaxVolume = fltMaxVolume or pipetteMaxVolume(strPipetteName)
+    if fltDisposalVolume >= fltMaxVolume:
+        raise Exception(f"The disposal volume {fltDisposalVolume} uL does not fit the pipette's {fltMaxVolume} uL.")
+
+    lstTransfers = [(tuple(source), tuple(destination), float(fltVolume))
+                    for source, destination, fltVolume in zip(lstSources, lstDestinations, volumes) if fltVolume > 0]
+
+    if boolReorder:
+        # group by source in order of first use, then serpentine over the
+        # destination columns so that consecutive wells are neighbours
+        dicSourceOrder = {}
+        for source, destination, fltVolume in lstTransfers:
+            dicSourceOrder.setdefault(source, len(dicSourceOrder))
+
+        def key(transfer):
+            source, (strLabware, strWell), fltVolume = transfer
+            intRow, intColumn = wellPosition(strWell)
+            return (dicSourceOrder[source], strLabware, intColumn, intRow if intColumn % 2 == 0 else -intRow)
+        lstTransfers.sort(key = key)
+
+        if funcPosition is not None:
+            lstOrdered = []
+            for source in dicSourceOrder:
+                lstGroup = [transfer for transfer in lstTransfers if transfer[0] == source]
+                lstPoints = [funcPosition(*destination) for source_temp, destination, fltVolume in lstGroup]
+                lstOrder = optimizeVisitOrder(lstPoints, fltTimeBudget = fltTimeBudget, tupleStart = funcPosition(*source))
+                lstOrdered.extend(lstGroup[intIndex] for intIndex in lstOrder)
+            lstTransfers = lstOrdered
+
+    # aspirates: (source, [(destination, volume), ...])
+    lstAspirates = []
+    for source, destination, fltVolume in lstTransfers:
+        if fltVolume > fltMaxVolume:
+            # split into equal parts that fit the pipette
+            intParts = math.ceil(fltVolume / fltMaxVolume)
+            lstAspirates.extend((source, [(destination, fltVolume / intParts)]) for _ in range(intParts))
+            continue
+        if boolMultiDispense and lstAspirates and lstAspirates[-1][0] == source:
+            fltHeld = sum(fltPart for destination_temp, fltPart in lstAspirates[-1][1])
+            if fltHeld + fltVolume + fltDisposalVolume <= fltMaxVolume:
+                lstAspirates[-1][1].append((destination, fltVolume))
+                continue
+        lstAspirates.append((source, [(destination, fltVolume)]))
+
+    # a multichannel pipette takes a column, or the whole rack, per pick up
+    lstTipWells = list(lstTipWells) if lstTipWells is not None else tipRackWells()[::pipetteChannels(strPipetteName)]
+    lstSteps = []
+    previousSource = None
+    boolHasTip = False
+    for source, lstDispenses in lstAspirates:
+        if not boolHasTip or strTipPolicy == "always" or (strTipPolicy == "perSource" and source != previousSource):
+            if boolHasTip:
+                lstSteps.append(("dropTip", {"strPipetteName": strPipetteName}))
+            if not lstTipWells:
+                raise Exception(f"Tip rack {strTipRack} runs out of tips for this transfer.")
+            lstSteps.append(("pickUpTip", {"strLabwareName": strTipRack,
+                                           "strPipetteName": strPipetteName,
+                                           "strWellName": lstTipWells.pop(0)}))
+            boolHasTip = True
+        previousSource = source
+
+        boolMulti = len(lstDispenses) > 1
+        fltAspirate = sum(fltVolume for destination, fltVolume in lstDispenses) + (fltDisposalVolume if boolMulti else 0)
+        lstSteps.append(("aspirate", {"strLabwareName": source[0],
+                                      "strWellName": source[1],
+                                      "strPipetteName": strPipetteName,
+                                      "intVolume": fltAspirate,
+                                      "fltFlowRate": fltFlowRate}))
+        for (strLabware, strWell), fltVolume in lstDispenses:
+            lstSteps.append(("dispense", {"strLabwareName": strLabware,
+                                          "strWellName": strWell,
+                                          "strPipetteName": strPipetteName,
+                                          "intVolume": fltVolume,
+                                          "fltFlowRate": fltFlowRate}))
+        if boolMulti and fltDisposalVolume:
+            # the disposal volume goes back into the source
+            lstSteps.append(("blowout", {"strLabwareName": source[0],
+                                         "strWellName": source[1],
+                                         "strPipetteName": strPipetteName,
+                                         "fltFlowRate": fltFlowRate}))
+
+    if boolHasTip:
+        lstSteps.append(("dropTip", {"strPipetteName": strPipetteName}))
+
+    return transferPlan(lstSteps, len(lstTransfers), dicCommandSeconds or DEFAULT_COMMAND_SECONDS, fltFlowRate)
@@ -0,0 +1,70 @@
+'''
+benchmarks how Fleet scales with 1, 8 and 32 simulated robots, each one a
+local stand-in server that takes a fixed time to execute every command
+
+the stand-ins share the benchmark's process, so with very short command
+latencies the clients and servers compete for the interpreter and the
+efficiency reported for large fleets is a lower bound
+
+usage
+----------
+python -m benchmarks.benchmark_fleet [fltCommandLatency]
+'''
+
+import sys
+import time
+
+from OpentronsHTTPAPIWrapper import Fleet, standInRobotServer
+
+INT_EXPERIMENTS_PER_ROBOT = 4
+INT_TRANSFERS_PER_EXPERIMENT = 10
+
+
+def experiment(client):
+    client.loadLabware(strSlot = 1, strLabwareName = "plate")
+    client.loadPipette(strPipetteName = "p300_single_gen2", strMount = "left")
+    for intTransfer in range(INT_TRANSFERS_PER_EXPERIMENT):
+        client.aspirate("plate_1", "A1", "p300_single_gen2", 10)
+        client.dispense("plate_1", "B1", "p300_single_gen2", 10)
+    return client.runID
+
+
+def runBenchmark(intRobots, fltCommandLatency):
+    lstServers = [standInRobotServer(fltCommandLatency = fltCommandLatency) for _ in range(intRobots)]
+    for server in lstServers:
+        server.start()
+
+    try:
+        with Fleet() as fleet:
+            for server in lstServers:
+                fleet.addRobot(server.host, intPort = server.port)
+
+            fltStart = time.perf_counter()
+            fleet.createRuns()
+            fltCreateRuns = time.perf_counter() - fltStart
+
+            lstResults = fleet.dispatch([experiment] * (intRobots * INT_EXPERIMENTS_PER_ROBOT))
+            fltTotal = time.perf_counter() - fltStart
+    finally:
+        for server in lstServers:
+            server.stop()
+
+    intFailed = sum(not result.succeeded for result in lstResults)
+    return fltCreateRuns, fltTotal, len(lstResults), intFailed
+
+
+def main(fltCommandLatency = 0.05):
+    fltBaseline = None
+    print(f"command latency: {fltCommandLatency * 1000:.1f} ms, "
+          f"{INT_EXPERIMENTS_PER_ROBOT} experiments per robot")
+    print(f"{'robots':>6} {'create runs (s)':>16} {'total (s)':>10} {'experiments/s':>14} {'efficiency':>11} {'failed':>7}")
+    for intRobots in (1, 8, 32):
+        fltCreateRuns, fltTotal, intExperiments, intFailed = runBenchmark(intRobots, fltCommandLatency)
+        fltRate = intExperiments / fltTotal
+        fltBaseline = fltBaseline or fltRate
+        print(f"{intRobots:>6} {fltCreateRuns:>16.3f} {fltTotal:>10.3f} {fltRate:>14.1f} "
+              f"{fltRate / (fltBaseline * intRobots):>10.0%} {intFailed:>7}")
+
+
+if __name__ == "__main__":
+    main(*(float(strArg) for strArg in sys.argv[1:2]))
@@ -0,0 +1,85 @@
+'''
+benchmarks setting up a full deck with sequential loadCustomLabware /
+loadLabware / loadPipette / addLabwareOffsets calls against a single
+loadDeck call, on the local stand-in robot server
+
+usage
+----------
+python -m benchmarks.benchmark_loadDeck [fltCommandLatency] [fltRequestLatency]
+'''
+
+import sys
+import time
+
+from OpentronsHTTPAPIWrapper import opentronsClient, standInRobotServer
+
+
+def customDefinition(intIndex):
+    return {"namespace": "custom_beta",
+            "version": 1,
+            "parameters": {"loadName": f"custom_plate_{intIndex}"},
+            "wells": {f"{strRow}{intColumn}": {"depth": 10.5, "totalLiquidVolume": 200}
+                      for strRow in "ABCDEFGH" for intColumn in range(1, 13)}}
+
+
+def deckLayout():
+    '''
+    four custom plates, four tip racks and three plates stacked on adapters,
+    two pipettes and an offset for every plate
+    '''
+    lstLabware = []
+    for intSlot in range(1, 5):
+        lstLabware.append({"slot": intSlot, "definition": customDefinition(intSlot),
+                           "offset": {"x": 0.1, "y": -0.2, "z": 0.3}})
+    for intSlot in range(5, 9):
+        lstLabware.append({"slot": intSlot, "loadName": "opentrons_96_tiprack_300ul"})
+    for intSlot in range(9, 12):
+        lstLabware.append({"slot": intSlot, "loadName": "opentrons_96_well_aluminum_block"})
+        lstLabware.append({"slot": intSlot, "loadName": "nest_96_wellplate_100ul_pcr_full_skirt",
+                           "on": f"opentrons_96_well_aluminum_block_{intSlot}",
+                           "offset": {"x": 0.0, "y": 0.0, "z": 1.0}})
+    return {"labware": lstLabware,
+            "pipettes": [{"pipetteName": "p300_single_gen2", "mount": "left"},
+                         {"pipetteName": "p20_multi_gen2", "mount": "right"}]}
+
+
+def sequentialSetup(client, dicLayout):
+    for dicEntry in dicLayout['labware']:
+        if 'definition' in dicEntry:
+            strName = client.loadCustomLabware(dicLabware = dicEntry['definition'], strSlot = dicEntry['slot'])
+        else:
+            strName = client.loadLabware(strSlot = dicEntry['slot'],
+                                         strLabwareName = dicEntry['loadName'],
+                                         strLabwareLocation = dicEntry.get('on'))
+        if 'offset' in dicEntry and 'on' not in dicEntry:
+            client.addLabwareOffsets(strName, *(dicEntry['offset'][strAxis] for strAxis in "xyz"))
+    for dicPipette in dicLayout['pipettes']:
+        client.loadPipette(strPipetteName = dicPipette['pipetteName'], strMount = dicPipette['mount'])
+
+
+def main(fltCommandLatency = 0.01, fltRequestLatency = 0.005):
+    dicLayout = deckLayout()
+    with standInRobotServer(fltCommandLatency = fltCommandLatency,
+                            fltRequestLatency = fltRequestLatency) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+        fltStart = time.perf_counter()
+        sequentialSetup(client, dicLayout)
+        fltSequential = time.perf_counter() - fltStart
+        client.close()
+
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+        fltStart = time.perf_counter()
+        client.loadDeck(dicLayout)
+        fltLoadDeck = time.perf_counter() - fltStart
+        client.close()
+
+    print(f"command latency:    {fltCommandLatency * 1000:10.1f} ms")
+    print(f"request latency:    {fltRequestLatency * 1000:10.1f} ms")
+    print(f"labware:            {len(dicLayout['labware']):10d}")
+    print(f"sequential:         {fltSequential:10.3f} s")
+    print(f"loadDeck:           {fltLoadDeck:10.3f} s")
+    print(f"speedup:            {fltSequential / fltLoadDeck:10.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(float(strArg) for strArg in sys.argv[1:3]))
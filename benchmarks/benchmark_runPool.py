@@ -0,0 +1,56 @@
+'''
+benchmarks how long a new opentronsClient takes to become usable when its
+run is created eagerly, lazily, or taken from a runPool that warmed it
+while the previous experiment's results were being processed
+
+usage
+----------
+python -m benchmarks.benchmark_runPool [fltRequestLatency] [intExperiments]
+'''
+
+import sys
+import time
+
+from OpentronsHTTPAPIWrapper import opentronsClient, runPool, standInRobotServer
+
+# client-side work between experiments, e.g. analysing the last results
+FLT_ANALYSIS_SECONDS = 0.05
+
+
+def experiment(client):
+    client.loadPipette(strPipetteName = "p300_single_gen2", strMount = "left")
+
+
+def runExperiments(server, intExperiments, **dicClientOptions):
+    '''
+    returns the mean time to construct a client and the total wall time
+    '''
+    fltConstruct = 0.0
+    fltStart = time.perf_counter()
+    for _ in range(intExperiments):
+        fltConstructStart = time.perf_counter()
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port, **dicClientOptions)
+        fltConstruct += time.perf_counter() - fltConstructStart
+        experiment(client)
+        client.close()
+        time.sleep(FLT_ANALYSIS_SECONDS)
+    return fltConstruct / intExperiments, time.perf_counter() - fltStart
+
+
+def main(fltRequestLatency = 0.02, intExperiments = 20):
+    with standInRobotServer(fltRequestLatency = fltRequestLatency) as server:
+        fltEager, fltEagerTotal = runExperiments(server, intExperiments)
+        fltLazy, fltLazyTotal = runExperiments(server, intExperiments, boolLazyRun = True)
+        with runPool(server.host, intPort = server.port) as pool:
+            fltPooled, fltPooledTotal = runExperiments(server, intExperiments, runPool = pool)
+            intHits = pool.hits
+
+    print(f"request latency: {fltRequestLatency * 1000:.1f} ms, {intExperiments} experiments")
+    print(f"{'run creation':<14}{'construct (ms)':>16}{'total (s)':>11}")
+    print(f"{'eager':<14}{fltEager * 1000:>16.2f}{fltEagerTotal:>11.3f}")
+    print(f"{'lazy':<14}{fltLazy * 1000:>16.2f}{fltLazyTotal:>11.3f}")
+    print(f"{'pooled':<14}{fltPooled * 1000:>16.2f}{fltPooledTotal:>11.3f}   ({intHits}/{intExperiments} warm)")
+
+
+if __name__ == "__main__":
+    main(*(strType(strArg) for strType, strArg in zip((float, int), sys.argv[1:3])))
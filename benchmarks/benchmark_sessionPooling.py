@@ -0,0 +1,54 @@
+'''
+benchmarks commands/second of opentronsClient with and without the pooled
+keep-alive session, against the local stand-in robot server
+
+usage
+----------
+python -m benchmarks.benchmark_sessionPooling [intCommands]
+'''
+
+import sys
+import time
+
+import requests
+
+from OpentronsHTTPAPIWrapper import opentronsClient, standInRobotServer
+
+
+def runBenchmark(client, intCommands):
+    '''
+    times intCommands aspirate commands and returns commands/second
+    '''
+    fltStart = time.perf_counter()
+    for _ in range(intCommands):
+        client.aspirate(strLabwareName = "plate_1",
+                        strWellName = "A1",
+                        strPipetteName = "p300_single_gen2",
+                        intVolume = 10)
+    return intCommands / (time.perf_counter() - fltStart)
+
+
+def main(intCommands = 2000):
+    with standInRobotServer() as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+        client.loadLabware(strSlot = 1, strLabwareName = "plate")
+        client.loadPipette(strPipetteName = "p300_single_gen2", strMount = "left")
+
+        # before: module-level requests calls open a new connection per command
+        session = client.session
+        client.session = requests
+        fltBefore = runBenchmark(client, intCommands)
+
+        # after: the client's pooled keep-alive session
+        client.session = session
+        fltAfter = runBenchmark(client, intCommands)
+        client.close()
+
+    print(f"commands:           {intCommands}")
+    print(f"new connection:     {fltBefore:10.1f} commands/s")
+    print(f"pooled session:     {fltAfter:10.1f} commands/s")
+    print(f"speedup:            {fltAfter / fltBefore:10.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(strArg) for strArg in sys.argv[1:2]))
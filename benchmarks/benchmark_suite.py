@@ -0,0 +1,314 @@
+'''
+benchmark suite for opentronsClient, run against the local stand-in robot server
+
+measures
+----------
+- per-method latency (p50/p95/p99) for every client command
+- sustained commands/second for pickUpTip -> aspirate -> dispense -> dropTip,
+  both blocking and pipelined
+- the split of every call into client-side overhead (dict building,
+  json.dumps, logging, response parsing), the HTTP round trip and robot
+  execution
+
+results are written as JSON so runs of different versions can be compared
+
+usage
+----------
+python -m benchmarks.benchmark_suite [--iterations N] [--latency SECONDS]
+                                     [--output results.json] [--compare baseline.json]
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import OpentronsHTTPAPIWrapper
+from OpentronsHTTPAPIWrapper import opentronsClient, standInRobotServer
+from OpentronsHTTPAPIWrapper import opentronsHTTPAPI_clientBuilder as clientBuilder
+from OpentronsHTTPAPIWrapper.opentronsHTTPAPI_instrumentation import parseTimestamp
+
+DIC_CUSTOM_LABWARE = {
+    "namespace": "custom_beta",
+    "version": 1,
+    "parameters": {"loadName": "benchmark_plate"},
+    "wells": {}
+}
+
+
+class _componentTimer:
+    '''
+    accumulates the time spent in each component of a client call
+    '''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.dumps = 0.0
+        self.loads = 0.0
+        self.logging = 0.0
+        self.http = 0.0
+        self.execution = 0.0
+        # time the benchmark itself spends reading timestamps, not charged to the client
+        self.benchmark = 0.0
+
+    def timed(self, strComponent, func):
+        def wrapper(*args, **kwargs):
+            fltStart = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                setattr(self, strComponent, getattr(self, strComponent) + time.perf_counter() - fltStart)
+        return wrapper
+
+
+class _timedJson:
+    def __init__(self, timer):
+        self.dumps = timer.timed("dumps", json.dumps)
+        self.loads = timer.timed("loads", json.loads)
+        self.load = json.load
+
+
+class _timedLogger:
+    def __init__(self, timer, logger):
+        for strLevel in ("debug", "info", "warning", "error"):
+            setattr(self, strLevel, timer.timed("logging", getattr(logger, strLevel)))
+
+
+class _timedSession:
+    '''
+    wraps the client session, timing every request and reading the robot's
+    execution time from the command timestamps
+    '''
+
+    def __init__(self, timer, session):
+        self.__timer = timer
+        self.__session = session
+
+    def __getattr__(self, strName):
+        return getattr(self.__session, strName)
+
+    def request(self, strMethod, **kwargs):
+        fltStart = time.perf_counter()
+        response = self.__session.request(strMethod, **kwargs)
+        fltEnd = time.perf_counter()
+        self.__timer.http += fltEnd - fltStart
+        try:
+            dicData = json.loads(response.text).get('data')
+            if isinstance(dicData, dict) and dicData.get('startedAt') and dicData.get('completedAt'):
+                fltExecution = parseTimestamp(dicData['completedAt']) - parseTimestamp(dicData['startedAt'])
+                self.__timer.execution += fltExecution
+        except ValueError:
+            pass
+        self.__timer.benchmark += time.perf_counter() - fltEnd
+        return response
+
+
+def percentile(lstValues, fltPercentile):
+    lstSorted = sorted(lstValues)
+    intIndex = max(int(round(fltPercentile / 100 * len(lstSorted) + 0.5)) - 1, 0)
+    return lstSorted[min(intIndex, len(lstSorted) - 1)]
+
+
+def setupClient(server):
+    # repeated moves to one well would be elided instead of timed
+    client = opentronsClient(strRobotIP = server.host, intPort = server.port, strRobot = "flex",
+                             boolElideRedundant = False)
+    client.loadLabware(strSlot = 1, strLabwareName = "plate")
+    client.loadLabware(strSlot = 2, strLabwareName = "tips")
+    client.loadLabware(strSlot = 3, strLabwareName = "adapter")
+    client.loadLabware(strSlot = 4, strLabwareName = "adapter")
+    client.loadPipette(strPipetteName = "p300", strMount = "left")
+    return client
+
+
+def methodCalls(client):
+    '''
+    returns (name, call) pairs exercising every client command
+    '''
+    lstLocations = ["adapter_3", "adapter_4"]
+
+    def moveLabware():
+        # shuttle the plate between the two adapters
+        lstLocations.reverse()
+        client.moveLabware("plate_1", lstLocations[0])
+
+    lstActions = ["pause", "play"]
+
+    def controlAction():
+        lstActions.reverse()
+        client.controlAction(lstActions[0])
+
+    def addLabwareOffsets():
+        with contextlib.redirect_stdout(io.StringIO()):
+            client.addLabwareOffsets("tips_2", 0.1, 0.2, 0.3)
+
+    return [
+        ("loadLabware", lambda: client.loadLabware(strSlot = 5, strLabwareName = "reservoir")),
+        ("loadCustomLabware", lambda: client.loadCustomLabware(DIC_CUSTOM_LABWARE, strSlot = 6)),
+        ("loadPipette", lambda: client.loadPipette(strPipetteName = "p300", strMount = "left")),
+        ("homeRobot", client.homeRobot),
+        ("pickUpTip", lambda: client.pickUpTip("tips_2", "p300", strWellName = "A1")),
+        ("liquidProbe", lambda: client.liquidProbe("plate_1", "p300")),
+        ("aspirate", lambda: client.aspirate("plate_1", "A1", "p300", 10)),
+        ("dispense", lambda: client.dispense("plate_1", "A2", "p300", 10)),
+        ("blowout", lambda: client.blowout("plate_1", "A2", "p300")),
+        ("moveToWell", lambda: client.moveToWell("plate_1", "A3", "p300")),
+        ("moveToLabware", lambda: client.moveToLabware("plate_1", "p300")),
+        ("dropTip", lambda: client.dropTip("p300")),
+        ("dropTipInWell", lambda: client.dropTip("p300", boolDropInDisposal = False, strLabwareName = "tips_2")),
+        ("pipetteHasTip", lambda: client.pipetteHasTip("p300", boolVerify = True)),
+        ("moveLabware", moveLabware),
+        ("closeGripper", lambda: client.closeGripper(10)),
+        ("addLabwareOffsets", addLabwareOffsets),
+        ("getRunInfo", client.getRunInfo),
+        ("lights", lambda: client.lights(True)),
+        ("controlAction", controlAction),
+    ]
+
+
+def benchmarkMethods(server, intIterations):
+    timer = _componentTimer()
+    client = setupClient(server)
+    # lights and controlAction go through the control connection
+    client.session = _timedSession(timer, client.session)
+    client.controlSession = _timedSession(timer, client.controlSession)
+
+    jsonOriginal, loggerOriginal = clientBuilder.json, clientBuilder.LOGGER
+    clientBuilder.json = _timedJson(timer)
+    clientBuilder.LOGGER = _timedLogger(timer, loggerOriginal)
+
+    dicResults = {}
+    try:
+        for strName, funcCall in methodCalls(client):
+            lstTotal = []
+            dicComponents = {"dictBuildingAndOther": 0.0, "jsonDumps": 0.0, "logging": 0.0,
+                             "responseParsing": 0.0, "roundTrip": 0.0, "execution": 0.0}
+            funcCall()  # warm up
+            for _ in range(intIterations):
+                timer.reset()
+                fltStart = time.perf_counter()
+                funcCall()
+                fltTotal = time.perf_counter() - fltStart - timer.benchmark
+                lstTotal.append(fltTotal)
+
+                fltRobot = timer.http
+                fltClient = fltTotal - fltRobot
+                dicComponents["jsonDumps"] += timer.dumps
+                dicComponents["responseParsing"] += timer.loads
+                dicComponents["logging"] += timer.logging
+                dicComponents["dictBuildingAndOther"] += fltClient - timer.dumps - timer.loads - timer.logging
+                dicComponents["execution"] += timer.execution
+                dicComponents["roundTrip"] += fltRobot - timer.execution
+
+            dicResults[strName] = {
+                "p50_us": percentile(lstTotal, 50) * 1e6,
+                "p95_us": percentile(lstTotal, 95) * 1e6,
+                "p99_us": percentile(lstTotal, 99) * 1e6,
+                "mean_us": sum(lstTotal) / len(lstTotal) * 1e6,
+                "split_mean_us": {strKey: fltValue / intIterations * 1e6
+                                  for strKey, fltValue in dicComponents.items()}
+            }
+    finally:
+        clientBuilder.json, clientBuilder.LOGGER = jsonOriginal, loggerOriginal
+        # controlAction leaves the run playing or paused, which blocks new runs
+        client.controlAction("stop")
+        client.close()
+
+    return dicResults
+
+
+def benchmarkSequence(server, intCycles, boolPipelined):
+    client = setupClient(server)
+    client.pipelined = boolPipelined
+    run = server.runs[client.runID]
+    intCommandsBefore = len(run.commands)
+
+    fltStart = time.perf_counter()
+    for _ in range(intCycles):
+        client.pickUpTip("tips_2", "p300", strWellName = "A1")
+        client.aspirate("plate_1", "A1", "p300", 10)
+        client.dispense("plate_1", "A2", "p300", 10)
+        client.dropTip("p300")
+    client.waitForCommands()
+    fltElapsed = time.perf_counter() - fltStart
+    client.close()
+
+    intCommands = len(run.commands) - intCommandsBefore
+    return {"cycles": intCycles,
+            "commands": intCommands,
+            "seconds": fltElapsed,
+            "commands_per_second": intCommands / fltElapsed}
+
+
+def compare(dicResults, dicBaseline):
+    print(f"\n{'method':<20} {'baseline p50':>14} {'p50':>10} {'change':>8}")
+    for strName, dicMethod in dicResults["methods"].items():
+        dicOld = dicBaseline.get("methods", {}).get(strName)
+        if dicOld is None:
+            continue
+        fltChange = dicMethod["p50_us"] / dicOld["p50_us"] - 1
+        print(f"{strName:<20} {dicOld['p50_us']:>12.0f}us {dicMethod['p50_us']:>8.0f}us {fltChange:>+8.1%}")
+    for strName, dicSequence in dicResults["sequences"].items():
+        dicOld = dicBaseline.get("sequences", {}).get(strName)
+        if dicOld is None:
+            continue
+        fltChange = dicSequence["commands_per_second"] / dicOld["commands_per_second"] - 1
+        print(f"{strName:<20} {dicOld['commands_per_second']:>10.1f}/s {dicSequence['commands_per_second']:>8.1f}/s {fltChange:>+8.1%}")
+
+
+def main(lstArguments = None):
+    parser = argparse.ArgumentParser(description = __doc__.split("\n\n")[0].strip())
+    parser.add_argument("--iterations", type = int, default = 200)
+    parser.add_argument("--cycles", type = int, default = 100)
+    parser.add_argument("--latency", type = float, default = 0.0,
+                        help = "simulated execution time of every command in seconds")
+    parser.add_argument("--output", help = "write the results to this JSON file")
+    parser.add_argument("--compare", help = "compare against a previous JSON results file")
+    arguments = parser.parse_args(lstArguments)
+
+    with standInRobotServer(fltCommandLatency = arguments.latency) as server:
+        dicResults = {
+            "meta": {
+                "package_version": OpentronsHTTPAPIWrapper.__version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "iterations": arguments.iterations,
+                "command_latency_s": arguments.latency
+            },
+            "methods": benchmarkMethods(server, arguments.iterations),
+            "sequences": {
+                "tip_cycle_blocking": benchmarkSequence(server, arguments.cycles, False),
+                "tip_cycle_pipelined": benchmarkSequence(server, arguments.cycles, True)
+            }
+        }
+
+    print(f"{'method':<20} {'p50':>9} {'p95':>9} {'p99':>9}   client overhead split (mean)")
+    for strName, dicMethod in dicResults["methods"].items():
+        dicSplit = dicMethod["split_mean_us"]
+        fltClient = dicSplit["dictBuildingAndOther"] + dicSplit["jsonDumps"] + dicSplit["logging"] + dicSplit["responseParsing"]
+        print(f"{strName:<20} {dicMethod['p50_us']:>7.0f}us {dicMethod['p95_us']:>7.0f}us {dicMethod['p99_us']:>7.0f}us"
+              f"   client {fltClient:>5.0f}us (dumps {dicSplit['jsonDumps']:.0f}, loads {dicSplit['responseParsing']:.0f},"
+              f" logging {dicSplit['logging']:.0f}), round trip {dicSplit['roundTrip']:.0f}us, execution {dicSplit['execution']:.0f}us")
+    for strName, dicSequence in dicResults["sequences"].items():
+        print(f"{strName:<20} {dicSequence['commands_per_second']:>9.1f} commands/s")
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding = "utf-8") as f:
+            json.dump(dicResults, f, indent = 2)
+
+    if arguments.compare:
+        with open(arguments.compare, "r", encoding = "utf-8") as f:
+            compare(dicResults, json.load(f))
+
+    return dicResults
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
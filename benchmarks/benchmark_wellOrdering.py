@@ -0,0 +1,54 @@
+'''
+benchmarks the gantry travel of plate-wide operations on 96, 384 and 1536
+well layouts when wells are visited in data order (shuffled), in a column
+serpentine, and in the order found by optimizeVisitOrder within its time
+budget. half of the wells are visited, as in a typical cherry pick
+
+usage
+----------
+python -m benchmarks.benchmark_wellOrdering [fltTimeBudget] [fltFraction]
+'''
+
+import random
+import sys
+import time
+
+from OpentronsHTTPAPIWrapper.opentronsHTTPAPI_pathOptimizer import (gridCoordinate, optimizeVisitOrder,
+                                                                      pathLength, serpentineOrder)
+
+# rows, columns and well pitch in mm of SBS plates
+LAYOUTS = {96: (8, 12, 9.0),
+           384: (16, 24, 4.5),
+           1536: (32, 48, 2.25)}
+
+# gantry speed of moveToWell in mm/s
+FLT_SPEED = 400.0
+
+
+def wellName(intRow, intColumn):
+    strRow = chr(ord("A") + intRow) if intRow < 26 else "A" + chr(ord("A") + intRow - 26)
+    return f"{strRow}{intColumn + 1}"
+
+
+def main(fltTimeBudget = 0.1, fltFraction = 0.5):
+    random.seed(0)
+    print(f"time budget: {fltTimeBudget * 1000:.0f} ms, {fltFraction:.0%} of wells visited, travel at {FLT_SPEED:.0f} mm/s")
+    print(f"{'wells':>6}{'visits':>8}{'data (s)':>10}{'serpentine (s)':>16}{'optimized (s)':>15}{'saved':>8}{'solve (ms)':>12}")
+    for intWells, (intRows, intColumns, fltPitch) in LAYOUTS.items():
+        lstWells = [wellName(intRow, intColumn) for intRow in range(intRows) for intColumn in range(intColumns)]
+        lstVisits = random.sample(lstWells, int(len(lstWells) * fltFraction))
+        lstPoints = [gridCoordinate(strWell, fltPitch) for strWell in lstVisits]
+
+        fltData = pathLength(lstPoints)
+        fltSerpentine = pathLength(lstPoints, serpentineOrder(lstPoints))
+        fltStart = time.perf_counter()
+        lstOrder = optimizeVisitOrder(lstPoints, fltTimeBudget = fltTimeBudget)
+        fltSolve = time.perf_counter() - fltStart
+        fltOptimized = pathLength(lstPoints, lstOrder)
+
+        print(f"{intWells:>6}{len(lstVisits):>8}{fltData / FLT_SPEED:>10.2f}{fltSerpentine / FLT_SPEED:>16.2f}"
+              f"{fltOptimized / FLT_SPEED:>15.2f}{1 - fltOptimized / fltData:>8.0%}{fltSolve * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(*(float(strArg) for strArg in sys.argv[1:3]))
@@ -18,5 +18,6 @@ setup(
     python_requires=">=3.8",
     packages=find_packages(),
     install_requires=["requests"],
+    extras_require={"async": ["aiohttp"]},
     url="https://github.com/yourusername/my_project",
 )
@@ -0,0 +1,25 @@
+import pytest
+
+from OpentronsHTTPAPIWrapper import opentronsClient, standInRobotServer
+
+@pytest.fixture
+def server():
+    with standInRobotServer() as server:
+        yield server
+
+@pytest.fixture
+def makeClient(server):
+    '''
+    makeClient(**dicOptions) creates a client of the stand-in server, closed
+    after the test
+    '''
+    lstClients = []
+
+    def make(**dicOptions):
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port, **dicOptions)
+        lstClients.append(client)
+        return client
+
+    yield make
+    for client in lstClients:
+        client.close()
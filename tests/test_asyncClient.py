@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from OpentronsHTTPAPIWrapper import standInRobotServer
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from OpentronsHTTPAPIWrapper import AsyncOpentronsClient
+
+async def runExperiment(server):
+    async with AsyncOpentronsClient(strRobotIP = server.host, intPort = server.port) as client:
+        await client.loadPipette("p300_single_gen2", "left")
+        strRack = await client.loadLabware(1, "opentrons_96_tiprack_300ul")
+        strPlate = await client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+        await client.pickUpTip(strRack, "p300_single_gen2")
+        await client.aspirate(strPlate, "A1", "p300_single_gen2", 50)
+        await client.dispense(strPlate, "B1", "p300_single_gen2", 50)
+        await client.dropTip("p300_single_gen2")
+        return client.runID
+
+def test_robots_driven_from_one_event_loop():
+    with standInRobotServer(fltCommandLatency = 0.01) as serverA, standInRobotServer(fltCommandLatency = 0.01) as serverB:
+        async def main():
+            return await asyncio.gather(runExperiment(serverA), runExperiment(serverB))
+
+        strRunA, strRunB = asyncio.run(main())
+        for server, strRunID in ((serverA, strRunA), (serverB, strRunB)):
+            lstTypes = [dicCommand['commandType'] for dicCommand in server.runs[strRunID].commands]
+            assert lstTypes == ["loadPipette", "loadLabware", "loadLabware", "pickUpTip", "aspirate", "dispense", "moveToAddressableAreaForDropTip", "dropTipInPlace"]
+
+def test_failed_command_raises():
+    with standInRobotServer(lstFailingCommandTypes = ["loadPipette"]) as server:
+        async def main():
+            async with AsyncOpentronsClient(strRobotIP = server.host, intPort = server.port) as client:
+                await client.loadPipette("p300_single_gen2", "left")
+
+        with pytest.raises(Exception, match = "InjectedFailure"):
+            asyncio.run(main())
@@ -0,0 +1,28 @@
+from OpentronsHTTPAPIWrapper import opentronsClient
+
+def test_checkpoint_resumes_run(makeClient, tmp_path):
+    strPath = str(tmp_path / "checkpoint.json")
+    client = makeClient(strCheckpointPath = strPath)
+    client.loadPipette("p300_single_gen2", "left")
+    strRack = client.loadLabware(1, "opentrons_96_tiprack_300ul")
+    strPlate = client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+    client.pickUpTip(strRack, "p300_single_gen2")
+
+    resumed = opentronsClient.fromCheckpoint(strPath)
+    try:
+        assert resumed.runID == client.runID
+        assert resumed.labware[strPlate]["id"] == client.labware[strPlate]["id"]
+        assert resumed.pipettes["p300_single_gen2"]["id"] == client.pipettes["p300_single_gen2"]["id"]
+        assert resumed.tips.used(strRack) == ["A1"]
+    finally:
+        resumed.close()
+
+def test_attach_run_reads_deck(makeClient):
+    client = makeClient()
+    client.loadPipette("p300_single_gen2", "left")
+    strPlate = client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+
+    attached = makeClient(strRunID = client.runID)
+    assert list(attached.labware) == [strPlate]
+    assert attached.labware[strPlate]["slot"] == "2"
+    assert "p300_single_gen2" in attached.pipettes
@@ -0,0 +1,31 @@
+import threading
+import time
+
+import pytest
+
+from OpentronsHTTPAPIWrapper import opentronsClient, standInRobotServer
+
+def test_stop_reaches_the_robot_while_a_command_blocks():
+    with standInRobotServer(dicCommandLatency = {"loadLabware": 2.0}) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port, intPoolSize = 1)
+        client.warmControlChannel()
+        thread = threading.Thread(target = client.loadLabware, args = (1, "corning_96_wellplate_360ul_flat"))
+        thread.start()
+        time.sleep(0.1)
+
+        # the only command connection is taken by the blocked command
+        fltStart = time.perf_counter()
+        client.lights(True)
+        client.controlAction("stop")
+        fltControlSeconds = time.perf_counter() - fltStart
+        thread.join()
+
+        assert server.lightsOn
+        assert fltControlSeconds < 1.0
+        assert server.runs[client.runID].status == "stopped"
+        client.close()
+
+def test_unknown_action_is_rejected(makeClient):
+    client = makeClient()
+    with pytest.raises(Exception, match = "Invalid action"):
+        client.controlAction("rewind")
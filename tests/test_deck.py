@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from OpentronsHTTPAPIWrapper import deckModel
+
+def test_deck_model_indexes_stacks():
+    deck = deckModel()
+    deck.add("adapter_1", "id-adapter", "adapter", "opentrons/adapter/1", slot = 1)
+    deck.add("plate_1", "id-plate", "plate", "opentrons/plate/1", strParentID = "id-adapter")
+
+    assert deck["plate_1"].slot == 1
+    assert [record.name for record in deck.onSlot(1)] == ["adapter_1", "plate_1"]
+    assert deck.parent("plate_1").name == "adapter_1"
+
+    deck.move("adapter_1", slot = 3)
+    assert [record.name for record in deck.onSlot(3)] == ["adapter_1", "plate_1"]
+    assert deck.onSlot(1) == []
+
+def test_deck_model_is_a_mutable_mapping():
+    deck = deckModel()
+    deck["plate_2"] = {"id": "id-plate", "slot": 2, "loadName": "plate", "definitionUri": "opentrons/plate/1"}
+    assert deck.byID("id-plate").name == "plate_2"
+    assert json.loads(json.dumps(deck.toDict()))["plate_2"]["location"] == {"slotName": "2"}
+    del deck["plate_2"]
+    assert len(deck) == 0
+
+def test_move_labware_follows_robot(makeClient):
+    client = makeClient(strRobot = "flex")
+    strPlate = client.loadLabware("D1", "corning_96_wellplate_360ul_flat")
+    client.moveLabware(strPlate, strDestinationSlot = "C2")
+    assert client.labware[strPlate].slot == "C2"
+    with pytest.raises(Exception, match = "without strDestinationLabware"):
+        client.moveLabware(strPlate)
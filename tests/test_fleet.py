@@ -0,0 +1,74 @@
+import socket
+
+from OpentronsHTTPAPIWrapper import Fleet, standInRobotServer
+
+def loadPlate(client):
+    client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+    return client.runID
+
+def closedPort() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_dispatch_spreads_experiments_over_robots():
+    with standInRobotServer(fltCommandLatency = 0.02) as serverA, standInRobotServer(fltCommandLatency = 0.02) as serverB:
+        with Fleet() as fleet:
+            fleet.addRobot(serverA.host, intPort = serverA.port, strName = "a")
+            fleet.addRobot(serverB.host, intPort = serverB.port, strName = "b")
+            assert fleet.createRuns() == {}
+            lstResults = fleet.dispatch([loadPlate] * 6)
+
+        assert [result.index for result in lstResults] == list(range(6))
+        assert all(result.succeeded and result.result == result.runID for result in lstResults)
+        assert {result.robot for result in lstResults} == {"a", "b"}
+        assert len(serverA.runs) + len(serverB.runs) >= 6
+
+def test_failed_experiment_is_retried():
+    lstAttempts = []
+
+    def flaky(client):
+        lstAttempts.append(client.runID)
+        if len(lstAttempts) == 1:
+            raise RuntimeError("first attempt fails")
+        return "done"
+
+    with standInRobotServer() as server:
+        with Fleet() as fleet:
+            strName = fleet.addRobot(server.host, intPort = server.port)
+            [result] = fleet.dispatch([flaky], intRetries = 1)
+
+        assert result.succeeded and result.result == "done"
+        assert len(lstAttempts) == 2 and lstAttempts[0] != lstAttempts[1]
+        assert [str(error) for error in fleet.robots[strName].errors] == ["first attempt fails"]
+
+def test_failure_without_retries_is_reported():
+    def failing(client):
+        raise ValueError("broken")
+
+    with standInRobotServer() as server:
+        with Fleet() as fleet:
+            fleet.addRobot(server.host, intPort = server.port)
+            [result] = fleet.map(lambda client, intValue: failing(client), [1])
+
+    assert not result.succeeded
+    assert isinstance(result.error, ValueError)
+
+def test_unreachable_robot_leaves_its_experiments_to_the_others():
+    with standInRobotServer() as server:
+        with Fleet(intMaxRetries = 0) as fleet:
+            fleet.addRobot(server.host, intPort = server.port, strName = "up")
+            fleet.addRobot("127.0.0.1", intPort = closedPort(), strName = "down")
+            assert list(fleet.createRuns()) == ["down"]
+            lstResults = fleet.dispatch([loadPlate] * 3)
+
+    assert all(result.succeeded and result.robot == "up" for result in lstResults)
+
+def test_lazy_clients_without_commands_leave_no_run():
+    with standInRobotServer() as server:
+        with Fleet(boolLazyRun = True) as fleet:
+            fleet.addRobot(server.host, intPort = server.port)
+            [result] = fleet.dispatch([lambda client: None])
+
+        assert result.succeeded and result.runID is None
+        assert server.runs == {}
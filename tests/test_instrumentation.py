@@ -0,0 +1,50 @@
+from OpentronsHTTPAPIWrapper import commandTimingAggregator, opentronsClient, standInRobotServer
+from OpentronsHTTPAPIWrapper.opentronsHTTPAPI_instrumentation import parseTimestamp, timingHistogram
+
+def test_hooks_see_every_request(makeClient):
+    client = makeClient()
+    lstTimings = []
+    client.addInstrumentationHook(lstTimings.append)
+    client.loadPipette("p300_single_gen2", "left")
+    client.lights(True)
+    client.removeInstrumentationHook(lstTimings.append)
+    client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+
+    assert [(timing.requestKind, timing.commandType) for timing in lstTimings] == [("command", "loadPipette"),
+                                                                                   ("lights", "lights")]
+    timing = lstTimings[0]
+    assert timing.statusCode == 201
+    assert timing.roundTripSeconds >= 0 and timing.executionSeconds >= 0
+
+def test_failing_hook_does_not_break_the_client(makeClient):
+    client = makeClient()
+
+    def brokenHook(timing):
+        raise RuntimeError("hook failed")
+
+    client.addInstrumentationHook(brokenHook)
+    client.loadPipette("p300_single_gen2", "left")
+    assert "p300_single_gen2" in client.pipettes
+
+def test_aggregator_histograms_per_command_type():
+    with standInRobotServer(dicCommandLatency = {"loadLabware": 0.02}) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+        aggregator = commandTimingAggregator()
+        client.addInstrumentationHook(aggregator)
+        for intSlot in range(1, 4):
+            client.loadLabware(intSlot, "corning_96_wellplate_360ul_flat")
+        client.close()
+
+    dicReport = aggregator.report()
+    assert dicReport["loadLabware"]["roundTrip"]["count"] == 3
+    assert dicReport["loadLabware"]["execution"]["mean"] >= 0.02
+    assert "loadLabware" in aggregator.formatReport()
+
+def test_histogram_and_timestamps():
+    histogram = timingHistogram()
+    for fltSeconds in (0.001, 0.001, 0.5):
+        histogram.add(fltSeconds)
+    assert histogram.percentile(50) == 0.001
+    assert histogram.maximum == 0.5
+    assert parseTimestamp("2024-01-01T00:00:01Z") - parseTimestamp("2024-01-01T00:00:00+00:00") == 1
+    assert parseTimestamp(None) is None
@@ -0,0 +1,55 @@
+import json
+import os
+
+from OpentronsHTTPAPIWrapper import hashLabwareDefinition, labwareDefinitionCache
+
+DIC_PLATE = {"namespace": "custom_beta", "version": 1,
+             "parameters": {"loadName": "custom_plate"},
+             "wells": {"A1": {"x": 10, "y": 70}}}
+
+def writeDefinition(strPath, dicLabware, intIndent = None):
+    with open(strPath, "w", encoding = "utf-8") as f:
+        json.dump(dicLabware, f, indent = intIndent)
+
+def test_files_are_reread_only_when_changed(tmp_path):
+    strPath = str(tmp_path / "plate.json")
+    writeDefinition(strPath, DIC_PLATE)
+    cache = labwareDefinitionCache()
+
+    strHash, dicLabware = cache.load(strPath)
+    assert cache.load(strPath) == (strHash, dicLabware)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # handed out definitions are not rehashed, and formatting does not count
+    assert cache.hash(dicLabware) == strHash == hashLabwareDefinition(dict(reversed(list(DIC_PLATE.items()))))
+
+    writeDefinition(strPath, dict(DIC_PLATE, version = 2), intIndent = 2)
+    os.utime(strPath, ns = (0, 10 ** 18))
+    strChanged, dicChanged = cache.load(strPath)
+    assert strChanged != strHash and dicChanged["version"] == 2
+    assert cache.misses == 2
+
+def test_directory_is_shared_between_caches(tmp_path):
+    strPath = str(tmp_path / "plate.json")
+    writeDefinition(strPath, DIC_PLATE)
+    strHash, dicLabware = labwareDefinitionCache(str(tmp_path / "cache")).load(strPath)
+
+    cache = labwareDefinitionCache(str(tmp_path / "cache"))
+    assert cache.load(strPath)[0] == strHash
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.clear()
+    assert cache.get(strHash) == dicLabware
+    assert cache.get("unknown") is None
+
+def test_client_uploads_a_definition_once(makeClient, tmp_path):
+    strPath = str(tmp_path / "plate.json")
+    writeDefinition(strPath, DIC_PLATE)
+    client = makeClient(labwareCache = labwareDefinitionCache())
+    lstTimings = []
+    client.addInstrumentationHook(lstTimings.append)
+
+    client.loadCustomLabwareFromFile(1, strPath)
+    client.loadCustomLabwareFromFile(2, strPath)
+
+    assert [timing.requestKind for timing in lstTimings].count("labwareDefinition") == 1
+    assert client.labwareCache.hits == 1
+    assert client.labware.onSlot(2)[0].definitionUri == "custom_beta/custom_plate/1"
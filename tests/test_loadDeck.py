@@ -0,0 +1,53 @@
+import pytest
+
+def test_layout_is_loaded_in_stacking_order(makeClient):
+    client = makeClient()
+    # the plate is listed before the adapter it sits on
+    client.loadDeck({"labware": [{"slot": 1, "loadName": "corning_96_wellplate_360ul_flat", "on": "opentrons_96_flat_bottom_adapter_1"},
+                                 {"slot": 1, "loadName": "opentrons_96_flat_bottom_adapter"},
+                                 {"slot": 2, "loadName": "opentrons_96_tiprack_300ul"}],
+                     "pipettes": [{"pipetteName": "p300_single_gen2", "mount": "left"}]})
+
+    adapter, plate = client.labware.onSlot(1)
+    assert adapter.name == "opentrons_96_flat_bottom_adapter_1"
+    assert plate.parentID == adapter.id
+    assert "opentrons_96_tiprack_300ul_2" in client.tips
+    assert client.pipettes["p300_single_gen2"]["mount"] == "left"
+    assert set(client.commandOrigins.values()) == {"loadDeck"}
+
+def test_offsets_refer_to_the_labware_below(makeClient):
+    client = makeClient()
+    strAdapter = client.loadLabware(3, "opentrons_96_flat_bottom_adapter")
+    client.loadDeck({"labware": [{"slot": 1, "loadName": "opentrons_96_flat_bottom_adapter"},
+                                 {"slot": 1, "loadName": "corning_96_wellplate_360ul_flat",
+                                  "on": "opentrons_96_flat_bottom_adapter_1", "offset": {"x": 0.5}},
+                                 {"slot": 3, "loadName": "nest_96_wellplate_100ul_pcr_full_skirt",
+                                  "on": strAdapter, "offset": {"z": -0.2}},
+                                 {"slot": 4, "loadName": "nest_12_reservoir_15ml", "offset": {"y": 1}}]})
+
+    dicOffsets = {dicOffset["definitionUri"]: dicOffset for dicOffset in client.labwareOffsets}
+    assert dicOffsets["opentrons/corning_96_wellplate_360ul_flat/1"]["location"] == {
+        "slotName": "1", "definitionUri": "opentrons/opentrons_96_flat_bottom_adapter/1"}
+    # the adapter loaded before the layout is found on the deck
+    assert dicOffsets["opentrons/nest_96_wellplate_100ul_pcr_full_skirt/1"]["location"] == {
+        "slotName": "3", "definitionUri": "opentrons/opentrons_96_flat_bottom_adapter/1"}
+    assert dicOffsets["opentrons/nest_96_wellplate_100ul_pcr_full_skirt/1"]["vector"] == {"x": 0.0, "y": 0.0, "z": -0.2}
+    assert dicOffsets["opentrons/nest_12_reservoir_15ml/1"]["location"] == {"slotName": "4"}
+
+def test_invalid_layouts_are_rejected(makeClient):
+    client = makeClient()
+    with pytest.raises(Exception, match = "unknown labware"):
+        client.loadDeck({"labware": [{"slot": 1, "loadName": "corning_96_wellplate_360ul_flat", "on": "missing_1"}]})
+    with pytest.raises(Exception, match = "stacking cycle"):
+        client.loadDeck({"labware": [{"slot": 1, "loadName": "a", "on": "b_1"},
+                                     {"slot": 1, "loadName": "b", "on": "a_1"}]})
+    with pytest.raises(Exception, match = "placed twice"):
+        client.loadDeck({"labware": [{"slot": 1, "loadName": "a"}, {"slot": 1, "loadName": "a"}]})
+    assert len(client.labware) == 0
+
+def test_offset_on_labware_of_unknown_definition_is_rejected(makeClient):
+    client = makeClient()
+    client.labware["plate_on_deck"] = {"id": "labware-1", "slot": 2}
+    with pytest.raises(Exception, match = "unknown definition"):
+        client.loadDeck({"labware": [{"slot": 2, "loadName": "corning_96_wellplate_360ul_flat",
+                                      "on": "plate_on_deck", "offset": {"z": 1}}]})
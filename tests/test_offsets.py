@@ -0,0 +1,30 @@
+def test_offsets_are_added_from_the_deck_model(makeClient):
+    client = makeClient()
+    strAdapter = client.loadLabware(1, "opentrons_96_flat_bottom_adapter")
+    strPlate = client.loadLabware(1, "corning_96_wellplate_360ul_flat", strLabwareLocation = strAdapter)
+    lstTimings = []
+    client.addInstrumentationHook(lstTimings.append)
+
+    client.addLabwareOffsets(strPlate, 0.1, 0, -0.2)
+
+    # no request reads the run to find the labware
+    assert [timing.requestKind for timing in lstTimings] == ["labwareOffset"]
+    dicOffset = client.labwareOffsets[-1]
+    assert dicOffset["definitionUri"] == "opentrons/corning_96_wellplate_360ul_flat/1"
+    assert dicOffset["location"] == {"slotName": "1", "definitionUri": "opentrons/opentrons_96_flat_bottom_adapter/1"}
+    assert dicOffset["vector"] == {"x": 0.1, "y": 0.0, "z": -0.2}
+
+def test_calibration_file_round_trip(makeClient, tmp_path):
+    strPath = str(tmp_path / "calibration.json")
+    client = makeClient()
+    strPlate = client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+    strReservoir = client.loadLabware(3, "nest_12_reservoir_15ml")
+    client.applyLabwareOffsets({strPlate: {"x": 0.5}, strReservoir: {"z": 1}})
+    client.saveLabwareOffsets(strPath)
+
+    later = makeClient()
+    later.loadLabware(2, "corning_96_wellplate_360ul_flat")
+    later.loadLabware(4, "nest_12_reservoir_15ml")
+    # the reservoir is in another slot than it was calibrated in
+    assert later.loadLabwareOffsetsFromFile(strPath) == {strPlate: {"x": 0.5, "y": 0.0, "z": 0.0}}
+    assert len(later.labwareOffsets) == 1
@@ -0,0 +1,40 @@
+import random
+
+from OpentronsHTTPAPIWrapper import optimizeVisitOrder, pathLength
+from OpentronsHTTPAPIWrapper.opentronsHTTPAPI_pathOptimizer import gridCoordinate, serpentineOrder, wellCoordinates
+
+def assertNoLongerThanSerpentines(lstPoints, tupleStart = None, fltTimeBudget = 0.05):
+    lstOrder = optimizeVisitOrder(lstPoints, fltTimeBudget = fltTimeBudget, tupleStart = tupleStart)
+    assert sorted(lstOrder) == list(range(len(lstPoints)))
+    fltLength = pathLength(lstPoints, lstOrder, tupleStart)
+    for boolByColumn in (True, False):
+        lstSerpentine = serpentineOrder(lstPoints, boolByColumn)
+        assert fltLength <= pathLength(lstPoints, lstSerpentine, tupleStart) + 1e-9
+        assert fltLength <= pathLength(lstPoints, lstSerpentine[::-1], tupleStart) + 1e-9
+    return lstOrder
+
+def test_never_longer_than_the_serpentine():
+    objRandom = random.Random(7)
+    lstWells = [f"{strRow}{intColumn}" for strRow in "ABCDEFGH" for intColumn in range(1, 13)]
+    for _ in range(20):
+        lstPoints = [gridCoordinate(strWell) for strWell in objRandom.sample(lstWells, objRandom.randint(3, 40))]
+        assertNoLongerThanSerpentines(lstPoints)
+        assertNoLongerThanSerpentines(lstPoints, tupleStart = (objRandom.uniform(0, 130), objRandom.uniform(0, 90)))
+
+    # scattered points, and no time to improve at all
+    lstPoints = [(objRandom.uniform(0, 400), objRandom.uniform(0, 300)) for _ in range(200)]
+    assertNoLongerThanSerpentines(lstPoints, fltTimeBudget = 0.0)
+    assertNoLongerThanSerpentines(lstPoints)
+
+def test_short_inputs_and_definition_coordinates():
+    assert optimizeVisitOrder([]) == []
+    assert optimizeVisitOrder([(0, 0), (10, 0)], tupleStart = (12, 0)) == [1, 0]
+    assert wellCoordinates({"wells": {"A1": {"x": 14.4, "y": 74.2}, "A2": {"x": None, "y": 1}}}) == {"A1": (14.4, 74.2)}
+    assert wellCoordinates({}) is None
+
+def test_client_orders_visits_on_the_deck(makeClient):
+    client = makeClient()
+    strPlate = client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+    lstVisits = [(strPlate, strWell, 10) for strWell in ("H12", "A1", "H1", "A12")]
+    lstOrdered = client.orderWellVisits(lstVisits, tupleStart = (strPlate, "A1"))
+    assert lstOrdered[0][1] == "A1" and sorted(lstOrdered) == sorted(lstVisits)
@@ -0,0 +1,27 @@
+import pytest
+
+from OpentronsHTTPAPIWrapper import opentronsClient, standInRobotServer
+
+def test_pipelined_commands_are_queued_then_completed(makeClient):
+    client = makeClient()
+    client.loadPipette("p300_single_gen2", "left")
+    strPlate = client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+
+    with client.pipelinedCommands():
+        lstCommands = [client.moveToWell(strPlate, f"A{intColumn}", "p300_single_gen2") for intColumn in range(1, 5)]
+
+    assert not client.pipelined
+    assert all(command.status == "succeeded" for command in lstCommands)
+    assert client.pendingCommands == []
+
+def test_pipelined_failure_raises_on_wait():
+    with standInRobotServer(fltCommandLatency = 0.01, lstFailingCommandTypes = ["moveToWell"]) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port, boolPipelined = True)
+        client.loadPipette("p300_single_gen2", "left")
+        strPlate = client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+        command = client.moveToWell(strPlate, "A1", "p300_single_gen2")
+        assert command.status == "queued"
+        with pytest.raises(Exception, match = "moveToWell failed"):
+            client.waitForCommands()
+        assert command.status == "failed"
+        client.close()
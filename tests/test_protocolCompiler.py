@@ -0,0 +1,61 @@
+import pytest
+
+from OpentronsHTTPAPIWrapper import opentronsClient
+
+def test_compiled_protocol_is_python():
+    client = opentronsClient("10.0.0.1", boolCompile = True)
+    client.homeRobot()
+    strRack = client.loadLabware(1, "opentrons_96_tiprack_300ul")
+    strPlate = client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+    client.loadPipette("p300_single_gen2", "left")
+    client.pickUpTip(strRack, "p300_single_gen2")
+    client.aspirate(strLabwareName = strPlate, strWellName = "A1", strPipetteName = "p300_single_gen2", intVolume = 50)
+    client.dispense(strLabwareName = strPlate, strWellName = "B1", strPipetteName = "p300_single_gen2", intVolume = 50)
+    client.dropTip("p300_single_gen2")
+
+    strProtocol = client.compileProtocol()
+    compile(strProtocol, "protocol.py", "exec")
+    assert "def run(" in strProtocol
+    assert "aspirate(" in strProtocol and "dispense(" in strProtocol
+
+def test_compiled_protocol_runs_on_robot(makeClient, server):
+    client = makeClient(boolCompile = True)
+    client.loadPipette("p300_single_gen2", "left")
+    strRunID = client.runCompiledProtocol()
+    assert server.runs[strRunID].protocolId in server.protocols
+    assert server.runs[strRunID].status == "running"
+    client.controlAction("stop")
+
+def test_addressable_areas_compile_to_protocol_locations():
+    client = opentronsClient("10.0.0.1", strRobot = "flex", boolCompile = True)
+    client.loadPipette("flex_1channel_1000", "left")
+    strPlate = client.loadLabware("D1", "corning_96_wellplate_360ul_flat")
+    client.moveToLabware(strPlate, "flex_1channel_1000", intMinimumZHeight = 80)
+    for strArea in ("movableTrashA3", "movableTrashB3", "1and8ChannelWasteChute"):
+        client.sendCommand({"data": {"commandType": "moveToAddressableArea",
+                                     "params": {"pipetteId": client.pipettes["flex_1channel_1000"]["id"],
+                                                "addressableAreaName": strArea,
+                                                "offset": {"x": 0, "y": 0, "z": 5}},
+                                     "intent": "setup"}})
+
+    strProtocol = client.compileProtocol()
+    compile(strProtocol, "protocol.py", "exec")
+    assert ("pipette_left.move_to(protocol.deck.position_for('D1').move(types.Point(x = 0.0, y = 0.0, z = 0.0)), "
+            "force_direct = False, minimum_z_height = 80.0, speed = 100.0)") in strProtocol
+    assert "pipette_left.move_to(trash.top(x = 0.0, y = 0.0, z = 5.0), force_direct = False)" in strProtocol
+    assert "trash_B3 = protocol.load_trash_bin('B3')" in strProtocol
+    assert "waste_chute = protocol.load_waste_chute()" in strProtocol
+    assert "waste_chute.top(x = 0.0, y = 0.0, z = 5.0)" in strProtocol
+
+def test_inexpressible_areas_are_rejected_when_captured():
+    client = opentronsClient("10.0.0.1", boolCompile = True)
+    client.loadPipette("p300_single_gen2", "left")
+    client.sendCommand({"data": {"commandType": "moveToAddressableArea",
+                                 "params": {"pipetteId": client.pipettes["p300_single_gen2"]["id"],
+                                            "addressableAreaName": "fixedTrash"}}})
+    assert "protocol.fixed_trash.top(" in client.compileProtocol()
+
+    with pytest.raises(Exception, match = "movableTrashA3 of the ot2 cannot be compiled"):
+        client.sendCommand({"data": {"commandType": "moveToAddressableArea",
+                                     "params": {"pipetteId": client.pipettes["p300_single_gen2"]["id"],
+                                                "addressableAreaName": "movableTrashA3"}}})
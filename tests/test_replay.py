@@ -0,0 +1,31 @@
+from OpentronsHTTPAPIWrapper import replaySession
+
+def test_record_and_replay_round_trip(makeClient, tmp_path):
+    strPath = str(tmp_path / "session.jsonl.gz")
+    client = makeClient(strRecordingPath = strPath)
+    # loadDeck presets the labware and pipette IDs
+    client.loadDeck({"labware": [{"slot": 1, "loadName": "opentrons_96_tiprack_300ul"},
+                                 {"slot": 3, "definition": {"namespace": "custom_beta", "version": 1,
+                                                            "parameters": {"loadName": "custom_plate"},
+                                                            "wells": {"A1": {"x": 10, "y": 70}, "A2": {"x": 19, "y": 70}}}}],
+                     "pipettes": [{"pipetteName": "p300_single_gen2", "mount": "left"}]})
+    client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+    client.pickUpTip("opentrons_96_tiprack_300ul_1", "p300_single_gen2")
+    client.aspirate("corning_96_wellplate_360ul_flat_2", "A1", "p300_single_gen2", 50)
+    client.dropTip("p300_single_gen2")
+    client.stopRecording()
+
+    replayed = makeClient()
+    report = replaySession(replayed, strPath)
+
+    assert not report.diverged, report.formatReport()
+    assert report.commands == len(client.commandOrigins)
+    assert replayed.runID != client.runID
+
+    # preset and robot assigned IDs alike are recorded on the client
+    assert replayed.labware.onSlot(1)[0].loadName == "opentrons_96_tiprack_300ul"
+    assert replayed.labware.onSlot(2)[0].id == report.ids[client.labware.onSlot(2)[0].id]
+    assert replayed.pipettes["p300_single_gen2"]["id"] == report.ids.get(client.pipettes["p300_single_gen2"]["id"],
+                                                                         client.pipettes["p300_single_gen2"]["id"])
+    assert "opentrons_96_tiprack_300ul_1" in replayed.tips.racks
+    assert replayed.wellCoordinates["custom_beta/custom_plate/1"]["A2"] == (19.0, 70.0)
@@ -0,0 +1,23 @@
+def test_redundant_moves_are_elided_when_enabled(makeClient, server):
+    client = makeClient(boolElideRedundant = True)
+    client.loadPipette("p300_single_gen2", "left")
+    strPlate = client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+    run = server.runs[client.runID]
+
+    client.moveToWell(strPlate, "A1", "p300_single_gen2")
+    intCommands = len(run.commands)
+    assert client.moveToWell(strPlate, "A1", "p300_single_gen2") is None
+    assert len(run.commands) == intCommands
+    assert client.state.report() == {"elided": {"moveToWell": 1}, "total": 1}
+
+    client.homeRobot()
+    client.moveToWell(strPlate, "A1", "p300_single_gen2")
+    assert len(run.commands) == intCommands + 1
+
+def test_moves_are_sent_by_default(makeClient, server):
+    client = makeClient()
+    client.loadPipette("p300_single_gen2", "left")
+    strPlate = client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+    client.moveToWell(strPlate, "A1", "p300_single_gen2")
+    assert client.moveToWell(strPlate, "A1", "p300_single_gen2") is not None
+    assert client.state.elidedCount == 0
@@ -0,0 +1,39 @@
+import time
+
+from OpentronsHTTPAPIWrapper import analyzeRunIdleGaps, opentronsClient, standInRobotServer
+
+def test_gaps_are_attributed_to_client_methods():
+    with standInRobotServer(fltCommandLatency = 0.005) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+        client.loadPipette("p300_single_gen2", "left")
+        strRack = client.loadLabware(1, "opentrons_96_tiprack_300ul")
+        strPlate = client.loadLabware(2, "corning_96_wellplate_360ul_flat")
+        client.pickUpTip(strRack, "p300_single_gen2")
+        time.sleep(0.1)
+        client.aspirate(strPlate, "A1", "p300_single_gen2", 50)
+        client.dropTip("p300_single_gen2")
+
+        report = analyzeRunIdleGaps(client)
+        client.close()
+
+    assert report.commands == 7
+    assert len(report.gaps) == 6
+    # the robot waited for the script's sleep before the aspirate
+    assert report.largestGaps(1)[0].method == "aspirate"
+    assert report.largestGaps(1)[0].seconds >= 0.1
+    # both commands of a drop into the trash belong to dropTip
+    assert report.byMethod["dropTip"]["gaps"] == 2
+    assert 0 < report.idleFraction < 1
+    assert "aspirate" in report.formatReport()
+
+def test_origins_are_kept_per_run(makeClient):
+    client = makeClient()
+    client.loadPipette("p300_single_gen2", "left")
+    client.sendCommand({"data": {"commandType": "home", "params": {}, "intent": "setup"}}, boolWait = True)
+    assert list(client.commandOrigins.values()) == ["loadPipette", "sendCommand"]
+
+    client.loadDeck({"labware": [{"slot": 1, "loadName": "corning_96_wellplate_360ul_flat"}]})
+    assert list(client.commandOrigins.values())[-1] == "loadDeck"
+
+    attached = makeClient(strRunID = client.runID)
+    assert attached.commandOrigins == {}
@@ -0,0 +1,33 @@
+from OpentronsHTTPAPIWrapper import runCollector
+
+def test_retired_runs_are_collected_in_batches(server, makeClient):
+    with runCollector(server.host, intPort = server.port, intKeepRuns = 1, intBatchSize = 2) as collector:
+        lstRunIDs = []
+        for _ in range(4):
+            client = makeClient(runCollector = collector)
+            lstRunIDs.append(client.runID)
+            client.close()
+
+        # the third retired run triggered a batch, keeping the newest one
+        assert collector.deletedRuns == lstRunIDs[:2]
+        assert collector.retiredRuns == lstRunIDs[2:]
+        assert sorted(server.runs) == sorted(lstRunIDs[2:])
+
+        assert collector.collect(boolAll = True) == lstRunIDs[2:]
+        assert server.runs == {}
+
+def test_sweep_deletes_only_old_untracked_runs(server, makeClient):
+    with runCollector(server.host, intPort = server.port) as collector:
+        stale = makeClient()
+        strStaleRunID = stale.runID
+        server.runs[strStaleRunID].createdAt = "2000-01-01T00:00:00Z"
+        tracked = makeClient(runCollector = collector)
+        server.runs[tracked.runID].createdAt = "2000-01-01T00:00:00Z"
+        strCurrentRunID = makeClient().runID
+
+        assert collector.sweep(fltMaxAge = 3600) == [strStaleRunID]
+        assert tracked.runID in server.runs and len(server.runs) == 2
+        # the current run is only swept on request
+        assert collector.sweep(fltMaxAge = 0) == []
+        assert collector.sweep(fltMaxAge = 0, boolIncludeCurrent = True) == [strCurrentRunID]
+        assert list(server.runs) == [tracked.runID]
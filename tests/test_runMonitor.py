@@ -0,0 +1,56 @@
+import json
+import time
+from datetime import datetime, timezone
+
+from OpentronsHTTPAPIWrapper import runMonitor
+
+class skewedRunClient:
+    '''
+    stands in for a client whose robot's clock is 1000 s ahead and whose run
+    finished three commands well apart before the first poll
+    '''
+
+    runID = "run"
+
+    def __init__(self):
+        fltRobotNow = time.time() + 1000
+        self.commands = [{"id": str(intIndex), "commandType": "home", "status": "succeeded",
+                          "completedAt": datetime.fromtimestamp(fltRobotNow - fltAgo, timezone.utc).isoformat()}
+                         for intIndex, fltAgo in enumerate((50, 40, 5))]
+
+    def getRunCommands(self, intCursor = None, intPageLength = 20):
+        return {"data": self.commands[intCursor:intCursor + intPageLength],
+                "meta": {"cursor": intCursor, "totalLength": len(self.commands)}}
+
+    def sendRequest(self, strMethod, strPath, strRequestKind = None):
+        class response:
+            status_code = 200
+            text = json.dumps({"data": {"status": "running"}})
+        return response
+
+def test_rates_follow_the_robot_clock():
+    monitor = runMonitor(skewedRunClient(), fltWindow = 30, boolSkipHistory = False)
+    assert monitor.poll()
+    assert monitor.completed == 3
+
+    # seen in one poll, but only the last command completed within the window
+    assert monitor.commandsPerMinute == 2.0
+    time.sleep(0.2)
+    assert 0.2 <= monitor.idleSeconds < 1
+
+def test_callbacks_follow_the_run(makeClient):
+    client = makeClient()
+    lstCompleted, lstStopped = [], []
+    with runMonitor(client, funcOnComplete = lstCompleted.append, funcOnStop = lstStopped.append,
+                    fltMinInterval = 0.01, fltMaxInterval = 0.05) as monitor:
+        client.loadPipette("p300_single_gen2", "left")
+        client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+        client.controlAction("stop")
+        for _ in range(200):
+            if not monitor.running:
+                break
+            time.sleep(0.01)
+
+    assert [dicCommand["commandType"] for dicCommand in lstCompleted] == ["loadPipette", "loadLabware"]
+    assert lstStopped[0]["status"] == "stopped"
+    assert monitor.commandsPerMinute == 2 * 60.0 / monitor.window
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+import requests
+
+from OpentronsHTTPAPIWrapper import runPool
+
+def test_clients_take_warm_runs(server, makeClient):
+    with runPool(server.host, intPort = server.port) as pool:
+        first = makeClient(runPool = pool)
+        strFirstRunID = first.runID
+        first.close()
+        second = makeClient(runPool = pool)
+
+        assert second.runID != strFirstRunID
+        assert (pool.hits, pool.misses) == (2, 0)
+        assert server.runs[second.runID].current and not server.runs[strFirstRunID].current
+
+def test_cold_pool_creates_runs_on_demand(server):
+    with runPool(server.host, intPort = server.port, boolWarm = False) as pool:
+        strRunID = pool.acquire()
+        assert strRunID in server.runs
+        assert (pool.hits, pool.misses) == (0, 1)
+    with pytest.raises(Exception, match = "closed"):
+        pool.acquire()
+
+def test_warming_waits_for_the_released_run_to_stop(server, makeClient):
+    with runPool(server.host, intPort = server.port, fltRetryInterval = 0.02) as pool:
+        client = makeClient(runPool = pool)
+        strRunID = client.runID
+        client.controlAction("play")
+        client.close()
+        # the robot refuses a new run while the released one is running
+        time.sleep(0.1)
+        assert len(server.runs) == 1
+
+        requests.post(f"http://{server.host}:{server.port}/runs/{strRunID}/actions",
+                      json = {"data": {"actionType": "stop"}})
+        assert pool.acquire(fltTimeout = 5) != strRunID
+        assert pool.hits == 2
+
+def test_close_deletes_the_warm_run(server):
+    pool = runPool(server.host, intPort = server.port)
+    pool.acquire()
+    pool.release(next(iter(server.runs)))
+    pool.close()
+    assert len(server.runs) == 1
@@ -0,0 +1,45 @@
+from OpentronsHTTPAPIWrapper import opentronsClient, runStateMirror, standInRobotServer
+
+def sendLoads(client, intCount):
+    for intSlot in range(1, intCount + 1):
+        client.sendCommand({"data": {"commandType": "loadLabware",
+                                     "params": {"location": {"slotName": str(intSlot)},
+                                                "loadName": "corning_96_wellplate_360ul_flat",
+                                                "namespace": "opentrons", "version": "1"},
+                                     "intent": "setup"}},
+                           boolWait = False)
+
+def test_stream_follows_the_run_until_settled():
+    with standInRobotServer(dicCommandLatency = {"loadLabware": 0.01}) as server:
+        client = opentronsClient(strRobotIP = server.host, intPort = server.port)
+        sendLoads(client, 5)
+        mirror = runStateMirror(client, intPageLength = 2)
+
+        lstSeen = list(mirror.stream(fltInterval = 0.01, fltTimeout = 5))
+        client.close()
+
+    assert mirror.settled and mirror.cursor == mirror.totalLength == 5
+    assert mirror.counts["succeeded"] == 5 and not mirror.counts.get("queued") and not mirror.failed
+    # every command is reported finished once, whatever it was seen as before
+    assert sum(dicCommand["status"] == "succeeded" for dicCommand in lstSeen) == 5
+
+def test_sync_only_fetches_from_the_cursor(makeClient):
+    client = makeClient()
+    sendLoads(client, 3)
+    client.pendingCommands[-1].wait()
+    mirror = runStateMirror(client, boolKeepCommands = False)
+    assert len(mirror.sync()) == 3 and mirror.commands == {}
+
+    lstCursors = []
+    getRunCommands = client.getRunCommands
+    def recordCursor(intCursor = None, intPageLength = 20):
+        lstCursors.append(intCursor)
+        return getRunCommands(intCursor = intCursor, intPageLength = intPageLength)
+    client.getRunCommands = recordCursor
+
+    assert mirror.sync() == []
+    sendLoads(client, 1)
+    client.pendingCommands[-1].wait()
+    assert [dicCommand["commandType"] for dicCommand in mirror.sync()] == ["loadLabware"]
+    assert lstCursors == [3, 3]
+    assert mirror.counts == {"succeeded": 4}
@@ -0,0 +1,52 @@
+from OpentronsHTTPAPIWrapper.opentronsHTTPAPI_sessionRecorder import _rawJson, readSession, sessionRecorder
+
+def test_client_records_every_request(makeClient, tmp_path):
+    strPath = str(tmp_path / "session.jsonl.gz")
+    client = makeClient(strRecordingPath = strPath)
+    client.loadPipette("p300_single_gen2", "left")
+    client.loadLabware(1, "corning_96_wellplate_360ul_flat")
+    client.stopRecording()
+
+    lstLines = list(readSession(strPath))
+    assert "session" in lstLines[0]
+    lstCommands = [dicLine["c"] for dicLine in lstLines[1:] if dicLine["k"] == "command"]
+    assert lstCommands == ["loadPipette", "loadLabware"]
+    assert lstLines[-1]["r"]["data"]["result"]["labwareId"] == client.labware.onSlot(1)[0].id
+
+def test_full_buffers_are_written_in_the_background(tmp_path):
+    strPath = str(tmp_path / "session.jsonl.gz")
+    recorder = sessionRecorder(strPath, intBufferSize = 2)
+
+    class timing:
+        requestStart, requestKind, commandType = 0.0, "command", "home"
+        method, url, params, statusCode = "POST", "http://robot/runs/1/commands", None, 201
+        payload, responseText, roundTripSeconds = '{"data":{}}', "not json", 0.001
+
+    for _ in range(5):
+        recorder(timing)
+    recorder.flush()
+    recorder.close()
+    # both are no-ops on a closed recorder
+    recorder.flush()
+    recorder.close()
+    assert len(list(readSession(strPath))) == 6
+    assert recorder.recorded == 5
+
+def test_bodies_are_embedded_without_parsing(tmp_path):
+    assert _rawJson('{"a":1}') == '{"a":1}'
+    assert _rawJson('{\n"a": 1\n}') == '{"a":1}'
+    assert _rawJson("plain text") == '"plain text"'
+    assert _rawJson("") == "null"
+
+    # a body that only looks like JSON costs its line, not the recording
+    strPath = str(tmp_path / "session.jsonl.gz")
+    with sessionRecorder(strPath) as recorder:
+        class timing:
+            requestStart, requestKind, commandType = 0.0, "lights", "lights"
+            method, url, params, statusCode = "POST", "http://robot/robot/lights", None, 200
+            payload, responseText, roundTripSeconds = "{broken}", "{}", 0.001
+        recorder(timing)
+        timing.payload = '{"on":true}'
+        recorder(timing)
+    lstLines = list(readSession(strPath))
+    assert len(lstLines) == 2 and lstLines[1]["b"] == {"on": True}
@@ -0,0 +1,40 @@
+import requests
+
+from OpentronsHTTPAPIWrapper import standInRobotServer
+
+HEADERS = {"opentrons-version": "*"}
+
+def test_commands_run_in_order_and_complete(server):
+    strBase = f"http://{server.host}:{server.port}"
+    strRunID = requests.post(f"{strBase}/runs", headers = HEADERS).json()['data']['id']
+
+    dicCommand = {"data": {"commandType": "loadPipette",
+                           "params": {"pipetteName": "p300_single_gen2", "mount": "left"},
+                           "intent": "setup"}}
+    response = requests.post(f"{strBase}/runs/{strRunID}/commands", headers = HEADERS, json = dicCommand,
+                             params = {"waitUntilComplete": True})
+    assert response.status_code == 201
+    assert response.json()['data']['status'] == "succeeded"
+
+    dicRun = requests.get(f"{strBase}/runs/{strRunID}", headers = HEADERS).json()['data']
+    assert [dicPipette['pipetteName'] for dicPipette in dicRun['pipettes']] == ["p300_single_gen2"]
+
+def test_failure_injection_and_unknown_routes():
+    with standInRobotServer(lstFailingCommandTypes = ["home"]) as server:
+        strBase = f"http://{server.host}:{server.port}"
+        strRunID = requests.post(f"{strBase}/runs", headers = HEADERS).json()['data']['id']
+        response = requests.post(f"{strBase}/runs/{strRunID}/commands", headers = HEADERS,
+                                 json = {"data": {"commandType": "home", "params": {}, "intent": "setup"}},
+                                 params = {"waitUntilComplete": True})
+        assert response.json()['data']['status'] == "failed"
+        assert response.json()['data']['error']['errorType'] == "InjectedFailure"
+
+        assert requests.get(f"{strBase}/runs/unknown", headers = HEADERS).status_code == 404
+        assert requests.get(f"{strBase}/modules", headers = HEADERS).status_code == 404
+
+def test_only_one_run_is_current(server):
+    strBase = f"http://{server.host}:{server.port}"
+    strFirst = requests.post(f"{strBase}/runs", headers = HEADERS).json()['data']['id']
+    strSecond = requests.post(f"{strBase}/runs", headers = HEADERS).json()['data']['id']
+    assert not server.runs[strFirst].current
+    assert server.runs[strSecond].current
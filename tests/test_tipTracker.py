@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from OpentronsHTTPAPIWrapper import tipManager
+
+def test_single_and_column_allocation():
+    tips = tipManager()
+    tips.addRack("rack")
+    assert tips.nextTip("rack") == ("rack", "A1")
+    tips.use("rack", "A1")
+    # the first column is no longer full
+    assert tips.nextTip("rack", 8) == ("rack", "A2")
+    tips.use("rack", "A2", 8)
+    assert tips.count("rack") == 87
+    assert tips.allocationOrder("rack", 8)[:2] == ["A3", "A4"]
+
+def test_state_survives_in_file(tmp_path):
+    strPath = str(tmp_path / "tips.json")
+    tips = tipManager(strPath, fltSaveDelay = 60)
+    tips.addRack("rack")
+    tips.use("rack", "A1")
+    # the write waits for further changes
+    assert not os.path.exists(strPath)
+    tips.save()
+    with open(strPath) as file:
+        assert "\n" not in file.read()
+    assert tipManager(strPath).used("rack") == ["A1"]
+
+def test_changes_are_written_together_in_the_background(tmp_path):
+    strPath = str(tmp_path / "tips.json")
+    tips = tipManager(strPath, fltSaveDelay = 0.05)
+    tips.addRack("rack")
+    for strWell in ("A1", "B1", "C1"):
+        tips.use("rack", strWell)
+    time.sleep(0.3)
+    assert tipManager(strPath).used("rack") == ["A1", "B1", "C1"]
+
+    # nothing changed, so nothing is written
+    intModified = os.stat(strPath).st_mtime_ns
+    tips.save()
+    assert os.stat(strPath).st_mtime_ns == intModified
+
+def test_reusing_a_tip_is_reported(caplog):
+    tips = tipManager()
+    tips.addRack("rack")
+    tips.use("rack", "A1")
+    tips.use("rack", "A1")
+    assert "taken again" in caplog.text
+    assert tips.count("rack") == 95
+
+def test_client_writes_tips_on_close(makeClient, tmp_path):
+    strPath = str(tmp_path / "tips.json")
+    client = makeClient(strTipStatePath = strPath)
+    client.loadPipette("p300_single_gen2", "left")
+    strRack = client.loadLabware(1, "opentrons_96_tiprack_300ul")
+    client.pickUpTip(strRack, "p300_single_gen2")
+    client.close()
+    assert tipManager(strPath).used(strRack) == ["A1"]
+
+def test_pick_up_takes_next_tip(makeClient):
+    client = makeClient()
+    client.loadPipette("p300_single_gen2", "left")
+    strRack = client.loadLabware(1, "opentrons_96_tiprack_300ul")
+    client.pickUpTip(strRack, "p300_single_gen2")
+    client.dropTip("p300_single_gen2")
+    client.pickUpTip(None, "p300_single_gen2")
+    assert client.tips.used(strRack) == ["A1", "B1"]
+    assert client.pipetteHasTip("p300_single_gen2")
+    with pytest.raises(Exception, match = "without a tip rack"):
+        client.pickUpTip(None, "p300_single_gen2", strWellName = "C1")
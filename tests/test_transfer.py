@@ -0,0 +1,39 @@
+from OpentronsHTTPAPIWrapper import planTransfer
+
+def loadTransferDeck(client):
+    client.loadPipette("p300_single_gen2", "left")
+    strRack = client.loadLabware(1, "opentrons_96_tiprack_300ul")
+    strReservoir = client.loadLabware(2, "nest_12_reservoir_15ml")
+    strPlate = client.loadLabware(3, "corning_96_wellplate_360ul_flat")
+    return strRack, strReservoir, strPlate
+
+def test_sources_share_tips_and_aspirates():
+    plan = planTransfer([("reservoir", "A1"), ("reservoir", "A1"), ("reservoir", "A2")],
+                        [("plate", "A1"), ("plate", "B1"), ("plate", "C1")],
+                        100, "p300_single_gen2", "rack")
+
+    assert [strMethod for strMethod, dicArguments in plan.steps] == [
+        "pickUpTip", "aspirate", "dispense", "dispense", "dropTip",
+        "pickUpTip", "aspirate", "dispense", "dropTip"]
+    assert [dicArguments["strWellName"] for strMethod, dicArguments in plan.steps if strMethod == "pickUpTip"] == ["A1", "B1"]
+    assert (plan.tips, plan.aspirates, plan.transfers) == (2, 2, 3)
+    assert plan.commandCount == len(plan.steps) + 2
+
+def test_preview_leaves_tips_untouched(makeClient):
+    client = makeClient()
+    strRack, strReservoir, strPlate = loadTransferDeck(client)
+
+    preview = client.transfer([(strReservoir, "A1")], [(strPlate, "A1"), (strPlate, "A2")], 50,
+                              "p300_single_gen2", strRack, strTipPolicy = "always", boolMultiDispense = False, boolExecute = False)
+    assert preview.tips == 2 and preview.results is None
+    assert client.tips.used(strRack) == []
+
+    # the tips are taken as the plan runs, the preview did not reserve them
+    plan = client.transfer([(strReservoir, "A1")], [(strPlate, "A1"), (strPlate, "A2")], 50,
+                           "p300_single_gen2", strRack, strTipPolicy = "always", boolMultiDispense = False)
+    assert client.tips.used(strRack) == ["A1", "B1"]
+    assert len(plan.results) == len(plan.steps)
+
+    nextPlan = client.planTransfer([(strReservoir, "A1")], [(strPlate, "A3")], 50, "p300_single_gen2", strRack)
+    assert nextPlan.steps[0] == ("pickUpTip", {"strLabwareName": strRack, "strPipetteName": "p300_single_gen2", "strWellName": "C1"})
+    assert client.tips.used(strRack) == ["A1", "B1"]